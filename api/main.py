@@ -1,26 +1,19 @@
-from fastapi import FastAPI, HTTPException, Body, Query
-from fastapi.responses import HTMLResponse
+import time
+_IMPORT_STARTED = time.perf_counter()
+
+from fastapi import FastAPI, HTTPException, Body, Query, Request
+from fastapi.responses import HTMLResponse, StreamingResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 import os
 import json
 from datetime import datetime
 from typing import List, Dict, Any, Optional
+from contextlib import asynccontextmanager
 from fastapi import UploadFile, File, Form
 
-# AI Utils
-try:
-    from api.ai_utils import transcribir_audio, extraer_informacion
-except ImportError:
-    import sys
-    sys.path.append("api")
-    from ai_utils import transcribir_audio, extraer_informacion
-
-# Services
-from api.services.sheets import gs_manager, get_directory_from_db, find_header_row, ALL_DEPTS, INITIAL_DIRECTORY
-from api.services.work_order import process_and_save_work_order, get_next_sequence
-
-# Load environment variables from .env file manually
+# Load environment variables from .env file manually, before the services
+# below read their settings at import time
 def load_env_file(filepath=".env"):
     if os.path.exists(filepath):
         with open(filepath, "r") as f:
@@ -38,7 +31,38 @@ if os.path.exists(".env"):
 elif os.path.exists("../.env"):
     load_env_file("../.env")
 
-app = FastAPI(title="Holtmont Workspace Backend")
+# AI Utils
+try:
+    from api.ai_utils import transcribir_audio, extraer_informacion
+except ImportError:
+    import sys
+    sys.path.append("api")
+    from ai_utils import transcribir_audio, extraer_informacion
+
+# Services
+from api.services.sheets import gs_manager, get_directory_from_db, parse_directory, ALL_DEPTS, INITIAL_DIRECTORY
+from api.services.async_sheets import async_gs_manager
+from api.services.work_order import process_and_save_work_order, get_next_sequence
+from api.services.tracker_update import save_tracker_tasks, update_task, update_ppc_task
+from api.services.etag import ETagMemo, ResponseCache, body_etag, etag_matches
+from api.services.row_query import RowQuery
+from api.services.credentials import CredentialStore
+from api.services.kpi import kpi_groups, team_kpi
+from api.services.cascade import CascadeTree, SITES_SHEET, PROJECTS_SHEET
+from api.services.agenda import SourceCache, agenda_sheets, combined_calendar, unified_agenda, work_sheets, PERSONAL_SHEET
+from api.services.dates import parse_sheet_date
+from api.services.clients import async_client_resolver, client_directory
+from api.services.infobank import INFOBANK_SHEET, InfoBankIndex, parse_month, parse_year
+from api.services.weekly_plan import WeekIndexRegistry, weekly_plan_sheet
+from api.services.row_parser import RowParser, SectionCursor, check_sheet_values, parse_sheet_data, parse_sheet_rows
+
+@asynccontextmanager
+async def lifespan(app):
+    yield
+    # Release the pooled Sheets connections
+    await async_gs_manager.aclose()
+
+app = FastAPI(title="Holtmont Workspace Backend", lifespan=lifespan)
 
 # CORS Configuration
 app.add_middleware(
@@ -47,8 +71,68 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
+# --- Cold start timing ---
+# import: loading this module and its dependencies; first request: includes the lazy Sheets connection
+STARTUP_TIMINGS = {"importSeconds": None, "firstRequest": None}
+
+@app.middleware("http")
+async def record_first_request(request: Request, call_next):
+    if STARTUP_TIMINGS["firstRequest"] is not None:
+        return await call_next(request)
+    # Claimed before the first await, so concurrent requests skip the timing
+    started = time.perf_counter()
+    first = STARTUP_TIMINGS["firstRequest"] = {
+        "path": request.url.path,
+        "sinceImport": round(started - _IMPORT_STARTED - STARTUP_TIMINGS["importSeconds"], 4)
+    }
+    response = await call_next(request)
+    first["seconds"] = round(time.perf_counter() - started, 4)
+    print(f"Cold start: import {STARTUP_TIMINGS['importSeconds']}s, first request {first['path']} {first['seconds']}s")
+    return response
+
+# --- Conditional GET ---
+# Responses carry a strong ETag over their bytes. etag_memo remembers which
+# sheet version each ETag was rendered from, so a repeated request whose
+# If-None-Match still matches the current version gets a 304 without
+# reading or serializing the sheet.
+DATA_CACHE_CONTROL = "private, no-cache"  # always revalidate; cheap while unchanged
+CONFIG_CACHE_CONTROL = "private, max-age=30"  # the directory changes rarely
+etag_memo = ETagMemo()
+
+def request_key(request):
+    return request.url.path + "?" + request.url.query
+
+def not_modified(etag, cache_control):
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+
+async def conditional_hit(request, source_sheet, cache_control):
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return None
+    version = await async_gs_manager.get_version(source_sheet)
+    etag = etag_memo.lookup(request_key(request), version)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag, cache_control)
+    return None
+
+def json_bytes(result):
+    return json.dumps(result, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def conditional_json(request, result, cache_control, version=None):
+    # version: sheet version the result was built from (None: no 304 shortcut next time)
+    body = json_bytes(result)
+    etag = body_etag(body)
+    etag_memo.remember(request_key(request), version, etag)
+    return conditional_body(request, etag, body, cache_control)
+
+def conditional_body(request, etag, body, cache_control):
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return not_modified(etag, cache_control)
+    return Response(body, media_type="application/json", headers={"ETag": etag, "Cache-Control": cache_control})
+
 # --- Endpoints ---
 
 @app.get("/", response_class=HTMLResponse)
@@ -66,9 +150,55 @@ class SavePPCRequest(BaseModel):
     payload: List[Dict[str, Any]]
     activeUser: str
 
+class TrackerBatchRequest(BaseModel):
+    sheet: str
+    tasks: List[Dict[str, Any]]
+    username: Optional[str] = None
+
+class TrackerTaskRequest(BaseModel):
+    sheet: str
+    task: Dict[str, Any]
+    username: Optional[str] = None
+
+class PPCTaskRequest(BaseModel):
+    task: Dict[str, Any]
+    username: Optional[str] = None
+
+# Config bodies for every role, serialized once per DB_DIRECTORY version.
+# Roles without a layout of their own share the default one.
+CONFIG_ROLES = ("WORKORDER_USER", "TONITA", "PPC_ADMIN", "ADMIN_CONTROL", "ADMIN")
+CONFIG_DEFAULT_ROLE = "DEFAULT"
+CONFIG_FALLBACK_SECONDS = 10  # cache lifetime when DB_DIRECTORY has no version
+config_cache = ResponseCache()
+credential_store = CredentialStore(async_gs_manager)
+
+def config_version(version):
+    # Without a version (missing sheet, failed lookup) the bodies are kept for a short time slot
+    return version if version is not None else ("ttl", int(time.monotonic() // CONFIG_FALLBACK_SECONDS))
+
 @app.get("/api/config")
-def api_get_system_config(role: str = Query(..., description="User Role")):
-    full_directory = get_directory_from_db()
+async def api_get_system_config(request: Request, role: str = Query(..., description="User Role")):
+    layout = role if role in CONFIG_ROLES else CONFIG_DEFAULT_ROLE
+    cached = config_cache.get(layout, config_version(await async_gs_manager.get_version("DB_DIRECTORY")))
+    if cached is None:
+        values = await async_gs_manager.get_sheet_values("DB_DIRECTORY")
+        # Keyed on the version the values were read at, so a stale cached read is never pinned
+        version = config_version(async_gs_manager.cache.version("DB_DIRECTORY", values) if values else None)
+        full_directory = parse_directory(values)
+        for other in CONFIG_ROLES + (CONFIG_DEFAULT_ROLE,):
+            rendered = config_cache.put(other, version, json_bytes(build_system_config(other, full_directory)))
+            if other == layout:
+                cached = rendered
+    etag, body = cached
+    return conditional_body(request, etag, body, CONFIG_CACHE_CONTROL)
+
+@app.get("/api/stats/config")
+def api_config_stats():
+    return {"success": True, "config": config_cache.stats()}
+
+def build_system_config(role, full_directory):
+    # When a role sees the whole directory as its staff, "staff" is left out
+    # and staffIsDirectory set instead of sending the list twice.
 
     ppc_module_master = { "id": "PPC_MASTER", "label": "PPC Maestro", "icon": "fa-tasks", "color": "#fd7e14", "type": "ppc_native" }
     ppc_module_weekly = { "id": "WEEKLY_PLAN", "label": "Planeación Semanal", "icon": "fa-calendar-alt", "color": "#6f42c1", "type": "weekly_plan_view" }
@@ -121,7 +251,7 @@ def api_get_system_config(role: str = Query(..., description="User Role")):
         return {
             "departments": ALL_DEPTS,
             "allDepartments": ALL_DEPTS,
-            "staff": full_directory,
+            "staffIsDirectory": True,
             "directory": full_directory,
             "specialModules": special_modules,
             "accessProjects": True
@@ -136,7 +266,7 @@ def api_get_system_config(role: str = Query(..., description="User Role")):
     return {
         "departments": ALL_DEPTS,
         "allDepartments": ALL_DEPTS,
-        "staff": full_directory,
+        "staffIsDirectory": True,
         "directory": full_directory,
         "specialModules": default_modules,
         "accessProjects": True
@@ -148,6 +278,47 @@ def api_get_next_seq():
     next_val = int(seq_str) + 1
     return str(next_val).zfill(4)
 
+@app.get("/api/stats/cache")
+def api_cache_stats():
+    return {"success": True, "sheets": gs_manager.cache.stats()}
+
+@app.get("/api/stats/etag")
+def api_etag_stats():
+    return {"success": True, "etags": etag_memo.stats()}
+
+@app.get("/api/stats/scheduler")
+def api_scheduler_stats():
+    return {"success": True, "scheduler": gs_manager.scheduler.stats()}
+
+@app.get("/api/stats/startup")
+def api_startup_stats():
+    # Must not trigger the lazy connection itself
+    return {
+        "success": True,
+        **STARTUP_TIMINGS,
+        "connected": gs_manager.connected,
+        "connectSeconds": round(gs_manager.connect_seconds, 4) if gs_manager.connect_seconds is not None else None
+    }
+
+async def match_client(name):
+    # {"input", "canonical", "score"} against the known clients; canonical is None when nothing is close enough
+    if not name or not str(name).strip():
+        return None
+    resolver = await async_client_resolver(async_gs_manager)
+    canonical, score = resolver.resolve(name)
+    return {"input": name, "canonical": canonical, "score": score}
+
+@app.get("/api/clients/resolve")
+async def api_resolve_client(name: str = Query(..., description="Client name as typed")):
+    match = await match_client(name)
+    if match is None:
+        raise HTTPException(status_code=400, detail="Falta nombre de cliente")
+    return {"success": True, **match}
+
+@app.get("/api/stats/clients")
+def api_client_stats():
+    return {"success": True, "clients": client_directory.stats()}
+
 @app.post("/api/transcribe_and_analyze")
 async def api_transcribe_analyze(file: UploadFile = File(...), apiKey: Optional[str] = Form(None)):
     groq_key = apiKey or os.environ.get("GROQ_API_KEY")
@@ -163,128 +334,360 @@ async def api_transcribe_analyze(file: UploadFile = File(...), apiKey: Optional[
         extraction_res = extraer_informacion(groq_key, transcription)
         if extraction_res.get("error"):
              return {"success": False, "message": extraction_res["error"], "transcription": transcription}
-             
+
+        data = extraction_res["extraction"]
+        client_match = await match_client(data.get("cliente")) if data else None
+        if client_match and client_match["canonical"]:
+            data["cliente"] = client_match["canonical"]
+
         return {
             "success": True,
             "transcription": transcription,
-            "data": extraction_res["extraction"]
+            "data": data,
+            "clientMatch": client_match
         }
 
     except Exception as e:
         return {"success": False, "message": str(e)}
 
+# The work-order pipeline stays on the sync manager; FastAPI runs it in the threadpool
 @app.post("/api/savePPC")
 def api_save_ppc_data(req: SavePPCRequest):
     return process_and_save_work_order(req.payload, req.activeUser)
 
-@app.post("/api/login")
-def api_login(creds: LoginRequest):
-    username_key = creds.username.strip().upper()
-    values = gs_manager.get_sheet_values("USERS")
-    user_found = None
+# Tracker edits: changed cells only, one batchUpdate per sheet, per-cell conflict check instead of a lock
+@app.post("/api/tracker/batch")
+def api_save_tracker_batch(req: TrackerBatchRequest):
+    return save_tracker_tasks(req.sheet, req.tasks, req.username)
 
-    if values and len(values) > 1:
-        headers = [h.upper().strip() for h in values[0]]
-        try:
-            user_idx = headers.index("USERNAME")
-            pass_idx = headers.index("PASSWORD")
-            role_idx = headers.index("ROLE")
-            label_idx = headers.index("LABEL")
-
-            for row in values[1:]:
-                if len(row) > user_idx and row[user_idx].strip().upper() == username_key:
-                    if len(row) > pass_idx and row[pass_idx] == creds.password:
-                        user_found = {
-                            "success": True,
-                            "role": row[role_idx] if len(row) > role_idx else "USER",
-                            "name": row[label_idx] if len(row) > label_idx else username_key,
-                            "username": username_key
-                        }
-                    break
-        except ValueError:
-            pass
-
-    if not user_found and gs_manager.is_mock:
-        MOCK_USER_DB = {
-            "LUIS_CARLOS":      {"pass": "admin2025", "role": "ADMIN", "label": "Administrador (Mock)"},
-            "ANTONIA_VENTAS":   {"pass": "tonita2025", "role": "TONITA", "label": "Ventas (Mock)"},
-            "PREWORK_ORDER":    {"pass": "workorder2026", "role": "WORKORDER_USER", "label": "Workorder (Mock)"},
-        }
+@app.post("/api/tracker/task")
+def api_update_task(req: TrackerTaskRequest):
+    return update_task(req.sheet, req.task, req.username)
 
-        if username_key in MOCK_USER_DB:
-            u = MOCK_USER_DB[username_key]
-            if u["pass"] == creds.password:
-                user_found = {
-                    "success": True,
-                    "role": u["role"],
-                    "name": u["label"],
-                    "username": username_key
-                }
+@app.post("/api/tracker/ppc")
+def api_update_ppc_task(req: PPCTaskRequest):
+    return update_ppc_task(req.task, req.username)
 
-    if user_found:
-        return user_found
+@app.post("/api/login")
+async def api_login(creds: LoginRequest):
+    user = await credential_store.authenticate(creds.username, creds.password)
+    if user:
+        return {
+            "success": True,
+            "role": user["role"],
+            "name": user["name"],
+            "username": user["username"]
+        }
 
     return {"success": False, "message": "Usuario o contraseña incorrectos."}
 
-@app.get("/api/data")
-def get_data(sheet: str = Query(..., description="Name of the sheet to fetch")):
-    values = gs_manager.get_sheet_values(sheet)
-
-    if not values:
-        return {"success": True, "data": [], "history": [], "headers": [], "message": f"Falta hoja: {sheet}"}
-
-    if len(values) < 2:
-        return {"success": True, "data": [], "history": [], "headers": [], "message": "Vacía"}
-
-    header_row_index = find_header_row(values)
-    if header_row_index == -1:
-        return {"success": True, "data": [], "headers": [], "message": "Sin formato válido"}
-
-    raw_headers = [str(h).strip() for h in values[header_row_index]]
-    valid_indices = [i for i, h in enumerate(raw_headers) if h]
-    clean_headers = [raw_headers[i] for i in valid_indices]
-
-    data_rows = values[header_row_index + 1:]
-    active_tasks = []
-    history_tasks = []
-    is_reading_history = False
-
-    for i, row in enumerate(data_rows):
-        row_str = "|".join([str(c).upper() for c in row])
-        if "TAREAS REALIZADAS" in row_str:
-            is_reading_history = True
-            continue
-
-        if not any(str(c).strip() for c in row):
-            continue
-
-        if valid_indices and len(row) > valid_indices[0] and str(row[valid_indices[0]]).upper() == str(clean_headers[0]).upper():
-            continue
-
-        row_obj = {}
-        has_data = False
-
-        for k, col_index in enumerate(valid_indices):
-            header_name = clean_headers[k]
-            val = row[col_index] if col_index < len(row) else ""
-            if str(val).strip():
-                has_data = True
-            row_obj[header_name] = val
-
-        if has_data:
-            row_obj['_rowIndex'] = header_row_index + i + 2
-            if is_reading_history:
-                history_tasks.append(row_obj)
-            else:
-                active_tasks.append(row_obj)
+@app.get("/api/stats/kpi")
+def api_kpi_stats():
+    return {"success": True, "kpi": kpi_cache.stats()}
+
+@app.get("/api/stats/login")
+def api_login_stats():
+    return {"success": True, "login": credential_store.stats()}
+
+# KPI payload, rebuilt only when the directory or one of the staff sheets changes
+KPI_CACHE_CONTROL = "private, no-cache"
+kpi_cache = ResponseCache(max_entries=1)
+
+@app.get("/api/kpi")
+async def api_kpi(request: Request, username: str = Query(..., description="Requesting user")):
+    user = await credential_store.lookup(username)
+    if not user or user["role"] != "ADMIN":
+        return {"success": False, "message": "Acceso Denegado. Privilegios insuficientes."}
+
+    directory_values = await async_gs_manager.get_sheet_values("DB_DIRECTORY")
+    directory = parse_directory(directory_values)
+    ventas, tracker = kpi_groups(directory)
+    names = list(dict.fromkeys(ventas + tracker))
+
+    current = (await async_gs_manager.get_version("DB_DIRECTORY"),) + tuple([await async_gs_manager.get_version(n) for n in names])
+    cached = kpi_cache.get(tuple(names), current if any(v is not None for v in current) else None)
+    if cached is None:
+        # One batchGet for every staff sheet
+        values_by_sheet = await async_gs_manager.get_many(names)
+        # Keyed on the versions the values were read at, so a stale cached read is never pinned
+        cache = async_gs_manager.cache
+        read = (cache.version("DB_DIRECTORY", directory_values) if directory_values else None,)
+        read += tuple(cache.version(n, values_by_sheet.get(n)) if values_by_sheet.get(n) else None for n in names)
+        schemas = {n: await async_gs_manager.get_schema(n, v) for n, v in values_by_sheet.items() if v and len(v) >= 2}
+        body = json_bytes(team_kpi(directory, values_by_sheet, schemas))
+        cached = kpi_cache.put(tuple(names), read if any(v is not None for v in read) else None, body)
+    etag, body = cached
+    return conditional_body(request, etag, body, KPI_CACHE_CONTROL)
+
+# Week -> rows index per PPC sheet version: Monday's burst of week requests share one scan
+week_indexes = WeekIndexRegistry()
+
+@app.get("/api/stats/weekly-plan")
+def api_weekly_plan_stats():
+    return {"success": True, "weeklyPlan": week_indexes.stats()}
+
+@app.get("/api/weekly-plan")
+async def api_weekly_plan(
+    request: Request,
+    username: str = Query(..., description="Requesting user (ANTONIA_VENTAS reads PPCV4)"),
+    week: Optional[int] = Query(None, ge=1, le=53, description="Only this ISO week"),
+    from_week: Optional[int] = Query(None, ge=1, le=53, description="First ISO week of a range"),
+    to_week: Optional[int] = Query(None, ge=1, le=53, description="Last ISO week of a range")
+):
+    if week is not None:
+        from_week = to_week = week
+    if from_week is not None and to_week is not None and from_week > to_week:
+        raise HTTPException(status_code=400, detail="Rango de semanas inválido")
+
+    sheet = weekly_plan_sheet(username)
+    hit = await conditional_hit(request, sheet, DATA_CACHE_CONTROL)
+    if hit:
+        return hit
+    index = week_indexes.get(sheet, await async_gs_manager.get_version(sheet))
+    if index is None:
+        values = await async_gs_manager.get_sheet_values(sheet)
+        if values is None:
+            return {"success": False, "message": f"No existe la hoja {sheet}"}
+        index = week_indexes.build(sheet, values, async_gs_manager.cache.version(sheet, values))
+    if not index.found:
+        return {"success": False, "message": f"Cabeceras no encontradas en {sheet}."}
+
+    result = {"success": True, "headers": index.headers, "data": index.select(from_week, to_week), "weeks": index.weeks}
+    return conditional_json(request, result, DATA_CACHE_CONTROL, index.version)
+
+# Site -> sub-project tree, rebuilt when DB_SITIOS or DB_PROYECTOS changes; each view's bytes cached on both versions
+CASCADE_CACHE_CONTROL = "private, no-cache"
+cascade_cache = ResponseCache()
+cascade_state = {"tree": None}
+
+async def current_cascade_tree(version):
+    tree = cascade_state["tree"]
+    if tree is not None and version is not None and tree.version == version:
+        return tree
+    names = [SITES_SHEET, PROJECTS_SHEET]
+    values = await async_gs_manager.get_many(names)
+    read = tuple(async_gs_manager.cache.version(n, values.get(n)) if values.get(n) else None for n in names)
+    tree = CascadeTree(values.get(SITES_SHEET), values.get(PROJECTS_SHEET), read if any(v is not None for v in read) else None)
+    cascade_state["tree"] = tree
+    return tree
+
+@app.get("/api/stats/cascade")
+def api_cascade_stats():
+    return {"success": True, "cascade": cascade_cache.stats()}
+
+@app.get("/api/cascade-tree")
+async def api_cascade_tree(
+    request: Request,
+    site: Optional[str] = Query(None, description="Only this site, with its sub-projects"),
+    lazy: bool = Query(False, description="Sites only, with subProjectCount instead of subProjects")
+):
+    current = (await async_gs_manager.get_version(SITES_SHEET), await async_gs_manager.get_version(PROJECTS_SHEET))
+    current = current if any(v is not None for v in current) else None
+    key = ("site", site.strip()) if site else ("summary" if lazy else "tree")
+    cached = cascade_cache.get(key, current)
+    if cached is None:
+        tree = await current_cascade_tree(current)
+        result = tree.site(site) if site else (tree.summary() if lazy else tree.full())
+        cached = cascade_cache.put(key, tree.version, json_bytes(result))
+    etag, body = cached
+    return conditional_body(request, etag, body, CASCADE_CACHE_CONTROL)
+
+# ANTONIA_VENTAS rows filed by (client, year, month); appended rows are filed without a rebuild
+infobank_index = InfoBankIndex()
+
+async def current_infobank():
+    version = await async_gs_manager.get_version(INFOBANK_SHEET)
+    if version is None or infobank_index.version != version:
+        values = await async_gs_manager.get_sheet_values(INFOBANK_SHEET)
+        infobank_index.refresh(values, async_gs_manager.cache.version(INFOBANK_SHEET, values) if values else None)
+    return infobank_index
+
+@app.get("/api/stats/infobank")
+def api_infobank_stats():
+    return {"success": True, "infobank": infobank_index.stats()}
+
+@app.get("/api/infobank")
+async def api_infobank(
+    request: Request,
+    month: str = Query(..., description="Month name in Spanish (ENERO...DICIEMBRE)"),
+    company: str = Query(..., description="Client; resolved to the single closest known client (response includes client and score)"),
+    year: str = Query("2025"),
+    folder: Optional[str] = Query(None, description="Accepted for compatibility; not used")
+):
+    target_month = parse_month(month)
+    if target_month is None:
+        return {"success": False, "message": "Mes inválido"}
+    hit = await conditional_hit(request, INFOBANK_SHEET, DATA_CACHE_CONTROL)
+    if hit:
+        return hit
+    index = await current_infobank()
+    data, client, score = index.lookup(company, parse_year(year), target_month)
+    result = {"success": True, "data": data, "client": client, "score": score}
+    return conditional_json(request, result, DATA_CACHE_CONTROL, index.version)
+
+@app.get("/api/infobank/clients")
+async def api_infobank_clients(request: Request):
+    hit = await conditional_hit(request, INFOBANK_SHEET, DATA_CACHE_CONTROL)
+    if hit:
+        return hit
+    index = await current_infobank()
+    return conditional_json(request, {"success": True, "data": index.clients}, DATA_CACHE_CONTROL, index.version)
+
+# Agenda sources sorted by date once per sheet version; only changed sheets are re-read, in one batchGet
+agenda_sources = SourceCache()
+
+async def load_agenda_sources(names):
+    sources = {}
+    stale = []
+    for name in names:
+        events = agenda_sources.get(name, await async_gs_manager.get_version(name))
+        if events is not None:
+            sources[name] = events
+        else:
+            stale.append(name)
+    if stale:
+        values_by_sheet = await async_gs_manager.get_many(stale)
+        for name in stale:
+            values = values_by_sheet.get(name)
+            if values:
+                sources[name] = agenda_sources.build(name, values, async_gs_manager.cache.version(name, values))
+    return sources
+
+def agenda_window(from_date, to_date):
+    start = parse_sheet_date(from_date) if from_date else None
+    end = parse_sheet_date(to_date) if to_date else None
+    if (from_date and start is None) or (to_date and end is None):
+        raise HTTPException(status_code=400, detail="Fecha inválida")
+    if start and end and start > end:
+        raise HTTPException(status_code=400, detail="Rango de fechas inválido")
+    return start, end
+
+@app.get("/api/stats/agenda")
+def api_agenda_stats():
+    return {"success": True, "agenda": agenda_sources.stats()}
+
+@app.get("/api/agenda")
+async def api_agenda(
+    username: str = Query(..., description="User whose agenda is shown"),
+    from_date: Optional[str] = Query(None, alias="from", description="First day (dd/mm/yy or yyyy-mm-dd)"),
+    to_date: Optional[str] = Query(None, alias="to", description="Last day (dd/mm/yy or yyyy-mm-dd)")
+):
+    start, end = agenda_window(from_date, to_date)
+    sources = await load_agenda_sources(agenda_sheets(username))
+    return unified_agenda(username, sources, start, end)
+
+@app.get("/api/agenda/calendar")
+async def api_agenda_calendar(
+    sheet: str = Query(..., description="Staff sheet (its \"(VENTAS)\" mirror is included)"),
+    from_date: Optional[str] = Query(None, alias="from", description="First day (dd/mm/yy or yyyy-mm-dd)"),
+    to_date: Optional[str] = Query(None, alias="to", description="Last day (dd/mm/yy or yyyy-mm-dd)")
+):
+    start, end = agenda_window(from_date, to_date)
+    sources = await load_agenda_sources(work_sheets(sheet) + [PERSONAL_SHEET])
+    return combined_calendar(sheet, sources, start, end)
+
+STREAM_CHUNK_ROWS = 500 # NDJSON rows per chunk written to the socket
+
+def ndjson_line(obj):
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+def stream_sheet_rows(meta, header_row, data_rows, first_row, cursors, query=None):
+    # NDJSON: a "meta" line, one line per row ("data" or "history"), then an "end" line with the cursors
+    parser = RowParser(header_row, query)
+    yield ndjson_line({"type": "meta", **meta, "headers": parser.headers})
+    chunk = []
+    for section, row_obj in parser.paged_rows(data_rows, first_row, cursors):
+        chunk.append(ndjson_line({"type": section, "row": row_obj}))
+        if len(chunk) >= STREAM_CHUNK_ROWS:
+            yield "".join(chunk)
+            chunk = []
+    if chunk:
+        yield "".join(chunk)
+    yield ndjson_line({"type": "end", "page": {section: c.info() for section, c in cursors.items()}})
+
+def data_response(request, result, stream, version=None):
+    if not stream:
+        return conditional_json(request, result, DATA_CACHE_CONTROL, version)
+    return StreamingResponse(iter([ndjson_line({"type": "meta", **result})]), media_type="application/x-ndjson")
 
+@app.get("/api/data")
+async def get_data(
+    request: Request,
+    sheet: str = Query(..., description="Name of the sheet to fetch"),
+    tail: Optional[int] = Query(None, ge=1, description="Only the last N rows"),
+    offset: int = Query(0, ge=0, description="Active rows to skip"),
+    limit: Optional[int] = Query(None, ge=1, description="Max active rows"),
+    history_offset: int = Query(0, ge=0, description="History rows to skip"),
+    history_limit: Optional[int] = Query(None, ge=1, description="Max history rows (defaults to limit)"),
+    format: str = Query("json", pattern="^(json|ndjson)$", description="ndjson streams one row per line"),
+    fields: Optional[str] = Query(None, description="Comma-separated columns to return (aliases allowed)"),
+    where: Optional[List[str]] = Query(None, description="COL=value, COL~text, COL>=date or COL<=date; repeatable"),
+    sort: Optional[str] = Query(None, description="Comma-separated columns, '-' prefix for descending")
+):
+    cursors = {
+        "data": SectionCursor(offset, limit),
+        "history": SectionCursor(history_offset, history_limit if history_limit is not None else limit)
+    }
+    stream = format == "ndjson"
+    meta = {"success": True}
+    version = None
+
+    if not tail:
+        hit = None if stream else await conditional_hit(request, sheet, DATA_CACHE_CONTROL)
+        if hit:
+            return hit
+        values = await async_gs_manager.get_sheet_values(sheet)
+        version = async_gs_manager.cache.version(sheet, values) if values else None
+        schema = await async_gs_manager.get_schema(sheet, values) if values and len(values) >= 2 else None
+        schema, error = check_sheet_values(sheet, values, schema)
+        if error:
+            return data_response(request, error, stream)
+        rows, first_row = values[schema.data_start:], schema.header_row + 2
+    else:
+        # Header from the first rows, data from the last N: two small reads instead of the whole tab.
+        # Rows above the window are not seen, so a "TAREAS REALIZADAS" marker only splits history inside it.
+        head = await async_gs_manager.get_head(sheet)
+        schema = await async_gs_manager.get_schema(sheet, head) if head and len(head) >= 2 else None
+        schema, error = check_sheet_values(sheet, head, schema)
+        if error:
+            return data_response(request, error, stream)
+
+        window = await async_gs_manager.get_tail(sheet, tail, min_row=schema.header_row + 2)
+        if window is None:
+            return data_response(request, check_sheet_values(sheet, None)[1], stream)
+        first_row, rows = window
+        meta["window"] = {"firstRow": first_row, "rows": len(rows)}
+
+    query = None
+    if fields or where or sort:
+        try:
+            query = RowQuery.parse(schema, fields, where, sort)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    if stream:
+        return StreamingResponse(
+            stream_sheet_rows(meta, schema.raw_headers, rows, first_row, cursors, query),
+            media_type="application/x-ndjson"
+        )
+    result = parse_sheet_rows(schema.raw_headers, rows, first_row, cursors, query)
+    result.update(meta)
+    return data_response(request, result, stream, version)
+
+@app.get("/api/data/batch")
+async def get_data_batch(sheets: str = Query(..., description="Comma-separated sheet names")):
+    names = [name.strip() for name in sheets.split(",") if name.strip()]
+    if not names:
+        raise HTTPException(status_code=400, detail="Falta parámetro sheets")
+
+    values_by_sheet = await async_gs_manager.get_many(names)
     return {
         "success": True,
-        "data": active_tasks,
-        "history": history_tasks,
-        "headers": clean_headers
+        "sheets": { name: parse_sheet_data(name, values_by_sheet.get(name)) for name in names }
     }
 
+STARTUP_TIMINGS["importSeconds"] = round(time.perf_counter() - _IMPORT_STARTED, 4)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,187 @@
+import heapq
+import threading
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+
+from api.services.dates import parse_sheet_date
+from api.services.row_parser import parse_sheet_data
+
+# Ports of the Apps Script apiFetchCombinedCalendarData / apiFetchUnifiedAgenda.
+# Each source sheet's active rows are kept sorted by date (newest first) per
+# sheet version, so a from/to window is two bisects per source. The sources
+# are then k-way merged by date and deduped by ID / FOLIO / CONCEPTO+FECHA.
+
+SALES_SHEET = "ANTONIA_VENTAS"
+PERSONAL_SHEET = "AGENDA_PERSONAL"
+HABITS_SHEET = "HABITOS_LOG"
+PERSONAL_CLIENT = "PERSONAL"
+
+
+def base_name(sheet_name):
+    name = str(sheet_name).strip()
+    if name.upper().endswith("(VENTAS)"):
+        name = name[:-len("(VENTAS)")]
+    return name.strip()
+
+
+def work_sheets(sheet_name):
+    # ANTONIA_VENTAS distributes the sales tasks, so only her own sheet is read
+    base = base_name(sheet_name)
+    return [SALES_SHEET] if base.upper() == SALES_SHEET else [base, base + " (VENTAS)"]
+
+
+def event_key(record):
+    concepto = record.get("CONCEPTO")
+    return record.get("ID") or record.get("FOLIO") or (f"{concepto}{record.get('FECHA', '')}" if concepto else None)
+
+
+def _date_columns(headers):
+    # FECHA first, then any other date-like header (the Apps Script sorted on the first date cell)
+    named = [h for h in headers if h.upper() == "FECHA"]
+    return named + [h for h in headers if ("FECHA" in h.upper() or "ALTA" in h.upper()) and h not in named]
+
+
+def event_date(record, columns):
+    for col in columns:
+        value = record.get(col)
+        if value:
+            date = parse_sheet_date(str(value))
+            if date:
+                return date
+    return None
+
+
+class SourceEvents:
+    """Active rows of one sheet version: dated ones newest first, then undated ones."""
+
+    def __init__(self, values, name, version=None):
+        self.version = version
+        parsed = parse_sheet_data(name, values)
+        records = parsed.get("data", [])
+        columns = _date_columns(parsed.get("headers", []))
+        dated = []
+        self.undated = []
+        for record in records:
+            date = event_date(record, columns)
+            if date is None:
+                self.undated.append(record)
+            else:
+                dated.append((date, record))
+        dated.sort(key=lambda item: item[0], reverse=True)  # stable: sheet order within a day
+        self.dated = dated
+        self._keys = [-d.toordinal() for d, _ in dated]  # ascending, for bisect
+
+    def window(self, start=None, end=None):
+        # (date, record) pairs with start <= date <= end, newest first
+        if start is None and end is None:
+            return self.dated
+        lo = bisect_left(self._keys, -end.toordinal()) if end is not None else 0
+        hi = bisect_right(self._keys, -start.toordinal()) if start is not None else len(self._keys)
+        return self.dated[lo:hi]
+
+
+class SourceCache:
+    """SourceEvents per sheet, valid while the sheet version is unchanged."""
+
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.builds = 0
+
+    def get(self, name, version):
+        if version is None:
+            return None
+        with self._lock:
+            events = self._entries.get(name)
+            if events is None or events.version != version:
+                return None
+            self._entries.move_to_end(name)
+            self.hits += 1
+            return events
+
+    def build(self, name, values, version):
+        events = SourceEvents(values, name, version)
+        with self._lock:
+            self.builds += 1
+            if version is not None:
+                self._entries[name] = events
+                self._entries.move_to_end(name)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return events
+
+    def stats(self):
+        with self._lock:
+            return {"size": len(self._entries), "hits": self.hits, "builds": self.builds}
+
+
+def merge_events(dated, undated=()):
+    """
+    dated: lists of (date, record), each newest first; undated: lists of
+    records appended after them. Records come out newest first, and only
+    the first record per event_key is kept (records without a key are dropped).
+    """
+    seen = set()
+    merged = []
+    records = [r for _, r in heapq.merge(*dated, key=lambda item: item[0], reverse=True)]
+    for record in records + [r for group in undated for r in group]:
+        key = event_key(record)
+        if key and key not in seen:
+            seen.add(key)
+            merged.append(record)
+    return merged
+
+
+def is_mine(record, user, exact=False):
+    # AGENDA_PERSONAL / HABITOS_LOG row of a user; exact=False also keeps rows without USUARIO
+    owner = str(record.get("USUARIO") or "").strip().upper()
+    return owner == user or (not exact and not owner)
+
+
+def as_calendar_event(record):
+    return {**record, "CONCEPTO": record.get("TITULO") or record.get("CONCEPTO"), "CLIENTE": PERSONAL_CLIENT}
+
+
+def combined_calendar(sheet_name, sources, start=None, end=None):
+    """sources: sheet name -> SourceEvents (missing sheets may be absent)."""
+    dated, undated = [], []
+    for name in work_sheets(sheet_name):
+        events = sources.get(name)
+        if events is not None:
+            dated.append(events.window(start, end))
+            undated.append(events.undated)
+    personal = sources.get(PERSONAL_SHEET)
+    if personal is not None:
+        user = base_name(sheet_name).upper()
+        dated.append([(d, as_calendar_event(r)) for d, r in personal.window(start, end) if is_mine(r, user, exact=True)])
+        undated.append([as_calendar_event(r) for r in personal.undated if is_mine(r, user, exact=True)])
+    windowed = start is not None or end is not None
+    return {"success": True, "data": merge_events(dated, undated if not windowed else [])}
+
+
+def unified_agenda(username, sources, start=None, end=None):
+    user = str(username).strip().upper()
+    work = {name: events for name, events in sources.items() if name != PERSONAL_SHEET}
+    personal_events = []
+    personal = sources.get(PERSONAL_SHEET)
+    if personal is not None:
+        personal_events = [r for _, r in personal.window(start, end) if is_mine(r, user)]
+        if start is None and end is None:
+            personal_events += [r for r in personal.undated if is_mine(r, user)]
+    habits = []
+    habit_log = sources.get(HABITS_SHEET)
+    if habit_log is not None:
+        # Habits are not dated events: never windowed
+        habits = [r for _, r in habit_log.dated if is_mine(r, user)] + [r for r in habit_log.undated if is_mine(r, user)]
+    return {
+        "success": True,
+        "workTasks": combined_calendar(username, work, start, end)["data"],
+        "personalEvents": personal_events,
+        "habits": habits
+    }
+
+
+def agenda_sheets(username):
+    return work_sheets(username) + [PERSONAL_SHEET, HABITS_SHEET]
@@ -0,0 +1,334 @@
+import asyncio
+import os
+import time
+from urllib.parse import quote
+
+import httpx
+from gspread.utils import fill_gaps
+from google.auth.transport.requests import Request as AuthRequest
+
+from api.services.cache import ROW_COUNT
+from api.services.ranges import sheet_range, slice_values, rows_range, column_range
+from api.services.sheets import (
+    gs_manager, REGISTRY_REFRESH_SECONDS, HEADER_SCAN_ROWS, VERSION_CHECK_SECONDS,
+    assemble_columns, trim_tail
+)
+from api.services.scheduler import READ, WRITE, PRIORITY_INTERACTIVE
+
+SHEETS_API_URL = "https://sheets.googleapis.com/v4/spreadsheets"
+DRIVE_FILES_URL = "https://www.googleapis.com/drive/v3/files"
+HTTP_MAX_CONNECTIONS = int(os.environ.get("SHEETS_HTTP_MAX_CONNECTIONS", "20"))
+HTTP_TIMEOUT_SECONDS = float(os.environ.get("SHEETS_HTTP_TIMEOUT", "30"))
+
+
+class SheetsHTTPError(Exception):
+    def __init__(self, status_code, message):
+        super().__init__(f"Sheets API error {status_code}: {message}")
+        self.status_code = status_code
+
+
+class AsyncGSheetsManager:
+    """
+    asyncio counterpart of GSheetsManager with the same read/append/batch
+    surface. It shares the sync manager's connection settings and value
+    cache, so a write through either one is seen by both. Real Sheets calls
+    go through a single pooled httpx.AsyncClient; in mock mode the calls are
+    served locally by the sync manager (mock, SQLite or replica).
+    """
+
+    def __init__(self, manager, transport=None):
+        self.manager = manager
+        self._transport = transport
+        self._http = None
+        self._token_lock = asyncio.Lock()
+        self._titles = None  # tab titles, resolved in one metadata call
+        self._titles_owner = None  # spreadsheet the titles were loaded from
+        self._titles_loaded_at = 0.0
+        self._col_counts = {}  # title -> grid column count
+
+    @property
+    def cache(self):
+        return self.manager.cache
+
+    @property
+    def is_local(self):
+        return self.manager.is_local
+
+    async def _ensure_connected(self):
+        # First use opens the spreadsheet (auth + metadata); do it off the loop
+        if not self.manager.connected:
+            await asyncio.to_thread(self.manager.ensure_connected)
+
+    async def _local(self, fn, *args, **kwargs):
+        # Local calls can block too: a replica read may pull from Google, and the
+        # simulator's latency and the scheduler's quota waits sleep. Keep them off the loop
+        return await asyncio.to_thread(fn, *args, **kwargs)
+
+    # --- HTTP plumbing ---
+
+    def _client(self):
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=HTTP_MAX_CONNECTIONS, max_keepalive_connections=HTTP_MAX_CONNECTIONS),
+                timeout=HTTP_TIMEOUT_SECONDS,
+                transport=self._transport
+            )
+        return self._http
+
+    async def _auth_headers(self):
+        creds = self.manager.creds
+        async with self._token_lock:
+            if not creds.valid:
+                # google-auth only ships a blocking refresh; keep it off the loop
+                await asyncio.to_thread(creds.refresh, AuthRequest())
+        return {"Authorization": f"Bearer {creds.token}"}
+
+    async def _request(self, method, path, priority=PRIORITY_INTERACTIVE, **kwargs):
+        # Same quota buckets, lanes and 429 backoff as the sync manager
+        kind = READ if method == "GET" else WRITE
+        return await self.manager.scheduler.run_async(kind, self._send, method, path, priority=priority, **kwargs)
+
+    async def _send(self, method, path, **kwargs):
+        headers = await self._auth_headers()
+        # path is appended verbatim: "", "/values/...", ":batchUpdate"
+        url = f"{SHEETS_API_URL}/{self.manager.ss.id}{path}"
+        response = await self._client().request(method, url, headers=headers, **kwargs)
+        if response.status_code >= 400:
+            raise SheetsHTTPError(response.status_code, response.text[:500])
+        return response.json()
+
+    async def aclose(self):
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    # --- Tab registry ---
+
+    async def _load_titles(self):
+        meta = await self._request("GET", "", params={"fields": "sheets.properties(title,gridProperties.columnCount)"})
+        props = [s["properties"] for s in meta.get("sheets", [])]
+        self._titles = {p["title"] for p in props}
+        self._col_counts = {p["title"]: p.get("gridProperties", {}).get("columnCount") for p in props}
+        self._titles_owner = self.manager.ss
+        self._titles_loaded_at = time.monotonic()
+        return self._titles
+
+    async def _get_titles(self):
+        if self._titles is None or self._titles_owner is not self.manager.ss:
+            return await self._load_titles()
+        return self._titles
+
+    async def _has_sheet(self, sheet_name):
+        titles = await self._get_titles()
+        if sheet_name not in titles and time.monotonic() - self._titles_loaded_at >= REGISTRY_REFRESH_SECONDS:
+            titles = await self._load_titles()
+        return sheet_name in titles
+
+    async def _add_sheet(self, sheet_name):
+        body = {"requests": [{"addSheet": {"properties": {
+            "title": sheet_name,
+            "gridProperties": {"rowCount": 1000, "columnCount": 26}
+        }}}]}
+        await self._request("POST", ":batchUpdate", json=body)
+        if self._titles is not None:
+            self._titles.add(sheet_name)
+        # The sync manager's handle registry does not know the new tab yet
+        self.manager.forget_worksheet(sheet_name)
+
+    # --- Change tracking ---
+
+    async def get_version(self, sheet_name):
+        # Same token as GSheetsManager.get_version; the Drive lookup is shared with it
+        await self._ensure_connected()
+        if self.is_local:
+            return await self._local(self.manager.get_version, sheet_name)
+
+        checked_at, version = self.manager.file_version
+        if version is not None and time.monotonic() - checked_at < VERSION_CHECK_SECONDS:
+            return version
+        try:
+            headers = await self._auth_headers()
+            response = await self._client().get(
+                f"{DRIVE_FILES_URL}/{self.manager.ss.id}",
+                params={"fields": "version,modifiedTime", "supportsAllDrives": "true"},
+                headers=headers
+            )
+            if response.status_code >= 400:
+                raise SheetsHTTPError(response.status_code, response.text[:500])
+        except Exception as e:
+            print(f"Error checking spreadsheet version: {e}")
+            return None
+        return self.manager.record_file_version(response.json())
+
+    # --- Public surface ---
+
+    async def get_sheet_values(self, sheet_name, priority=PRIORITY_INTERACTIVE):
+        await self._ensure_connected()
+        if self.is_local:
+            return await self._local(self.manager.get_sheet_values, sheet_name, priority=priority)
+
+        cached = self.cache.get(sheet_name)
+        if cached is not None:
+            return cached
+
+        version = await self.get_version(sheet_name) if self.cache.enabled else None
+        unchanged = self.cache.revalidate(sheet_name, version)
+        if unchanged is not None:
+            return unchanged
+
+        try:
+            if not await self._has_sheet(sheet_name):
+                return None
+            data = await self._request("GET", "/values/" + quote(sheet_range(sheet_name), safe=""), priority=priority)
+        except Exception as e:
+            # print(f"Error fetching sheet {sheet_name}: {e}")
+            return None
+
+        values = data.get("values", [])
+        values = fill_gaps(values) if values else []
+        self.cache.put(sheet_name, values, version=version)
+        return values
+
+    async def get_many(self, sheet_names, ranges=None, priority=PRIORITY_INTERACTIVE):
+        await self._ensure_connected()
+        if self.is_local:
+            return await self._local(self.manager.get_many, sheet_names, ranges, priority=priority)
+
+        try:
+            titles = await self._get_titles()
+        except Exception as e:
+            print(f"Error loading sheet list: {e}")
+            return {name: None for name in sheet_names}
+
+        versions = {}
+        if self.cache.enabled:
+            for name in self.manager._versions_to_check(sheet_names, ranges):
+                versions[name] = await self.get_version(name)
+        results, to_fetch = self.manager._plan_batch(sheet_names, ranges, lambda name: name in titles, versions)
+        if not to_fetch:
+            return results
+
+        params = [("ranges", sheet_range(name, a1)) for name, a1 in to_fetch]
+        try:
+            response = await self._request("GET", "/values:batchGet", params=params, priority=priority)
+        except Exception as e:
+            print(f"Error in batch fetch of {len(to_fetch)} sheets: {e}")
+            return results
+
+        return self.manager._store_batch(to_fetch, response.get("valueRanges", []), results, versions)
+
+    # --- Range-limited reads (see GSheetsManager for the semantics) ---
+
+    async def get_ranges(self, sheet_name, ranges, priority=PRIORITY_INTERACTIVE):
+        await self._ensure_connected()
+        if self.is_local:
+            return await self._local(self.manager.get_ranges, sheet_name, ranges, priority=priority)
+
+        full = self.cache.get(sheet_name)
+        if full is not None:
+            return [slice_values(full, a1) for a1 in ranges]
+        results = [self.cache.get((sheet_name, a1)) for a1 in ranges]
+        missing = [a1 for a1, values in zip(ranges, results) if values is None]
+        if not missing:
+            return results
+
+        try:
+            if not await self._has_sheet(sheet_name):
+                return None
+            params = [("ranges", sheet_range(sheet_name, a1)) for a1 in missing]
+            response = await self._request("GET", "/values:batchGet", params=params, priority=priority)
+        except Exception as e:
+            print(f"Error reading {missing} from {sheet_name}: {e}")
+            return None
+        return self.manager._store_ranges(sheet_name, ranges, results, missing, response.get("valueRanges", []))
+
+    async def get_row_count(self, sheet_name, priority=PRIORITY_INTERACTIVE):
+        await self._ensure_connected()
+        if self.is_local:
+            return await self._local(self.manager.get_row_count, sheet_name, priority=priority)
+
+        full = self.cache.get(sheet_name)
+        if full is not None:
+            return len(full)
+        count = self.cache.get((sheet_name, ROW_COUNT))
+        if count is not None:
+            return count
+        column = await self.get_ranges(sheet_name, ["A:A"], priority=priority)
+        if column is None:
+            return None
+        self.cache.put((sheet_name, ROW_COUNT), len(column[0]))
+        return len(column[0])
+
+    async def get_head(self, sheet_name, n=HEADER_SCAN_ROWS, priority=PRIORITY_INTERACTIVE):
+        values = await self.get_ranges(sheet_name, [f"1:{n}"], priority=priority)
+        return values[0] if values is not None else None
+
+    async def get_tail(self, sheet_name, n, min_row=1, priority=PRIORITY_INTERACTIVE):
+        await self._ensure_connected()
+        if self.is_local:
+            return await self._local(self.manager.get_tail, sheet_name, n, min_row, priority=priority)
+
+        count = await self.get_row_count(sheet_name, priority=priority)
+        if count is None:
+            return None
+        start = max(min_row, count - n + 1)
+        values = await self.get_ranges(sheet_name, [rows_range(start, col_count=self._col_counts.get(sheet_name))], priority=priority)
+        if values is None:
+            return None
+        return trim_tail(start, values[0], n)
+
+    async def get_columns(self, sheet_name, names, priority=PRIORITY_INTERACTIVE):
+        schema = await self.get_schema(sheet_name, priority=priority)
+        if schema is None:
+            return None
+        cols = schema.cols(names)
+        if not cols:
+            return []
+        header_row = schema.header_row if schema.found else 0
+        columns = await self.get_ranges(sheet_name, [column_range(c + 1, header_row + 1) for c in cols], priority=priority)
+        return assemble_columns(columns) if columns is not None else None
+
+    async def get_schema(self, sheet_name, values=None, priority=PRIORITY_INTERACTIVE):
+        if values is None:
+            values = self.cache.peek(sheet_name)
+        version = self.cache.version(sheet_name, values) if values is not None else await self.get_version(sheet_name)
+        schema = self.manager.schemas.get(sheet_name, version)
+        if schema is not None:
+            return schema
+        if values is None:
+            values = await self.get_head(sheet_name, priority=priority)
+            if values is None:
+                return None
+        return self.manager.schemas.build(sheet_name, values, version)
+
+    async def append_row(self, sheet_name, values, priority=PRIORITY_INTERACTIVE):
+        return await self.append_rows(sheet_name, [values], priority=priority)
+
+    async def append_rows(self, sheet_name, rows, priority=PRIORITY_INTERACTIVE):
+        if not rows:
+            return None
+        await self._ensure_connected()
+        if self.is_local:
+            return await self._local(self.manager.append_rows, sheet_name, rows, priority=priority)
+
+        try:
+            if not await self._has_sheet(sheet_name):
+                await self._add_sheet(sheet_name)
+            result = await self._request(
+                "POST",
+                "/values/" + quote(sheet_range(sheet_name), safe="") + ":append",
+                params={"valueInputOption": "RAW", "insertDataOption": "INSERT_ROWS"},
+                json={"values": rows},
+                priority=priority
+            )
+        except Exception as e:
+            print(f"Error appending to sheet {sheet_name}: {e}")
+            self.cache.invalidate(sheet_name)
+            raise
+
+        self.cache.append(sheet_name, rows)
+        self.manager.file_version = (0.0, None)  # our own edit made the memoized Drive version stale
+        return result
+
+
+async_gs_manager = AsyncGSheetsManager(gs_manager)
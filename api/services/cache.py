@@ -0,0 +1,184 @@
+import threading
+import time
+from collections import OrderedDict
+
+# Ranged reads are cached under (sheet_name, a1) keys next to the whole-sheet
+# entry; the sheet's data row count uses the ROW_COUNT pseudo-range.
+ROW_COUNT = "#rows"
+
+
+class SheetCache:
+    """
+    Read-through cache for worksheet values.
+    Entries expire after `ttl` seconds and the least recently used sheet is
+    evicted once `max_entries` is exceeded. A ttl <= 0 disables caching.
+    Cached values are shared with callers and must be treated as read-only.
+    An entry may carry the sheet version it was read at; once expired it is
+    kept (until evicted) so a matching version check can renew it without a
+    re-download.
+    """
+
+    def __init__(self, ttl=15.0, max_entries=128, clock=time.monotonic):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._clock = clock
+        self._entries = OrderedDict()  # sheet_name -> [expires_at, values, version]
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.revalidations = 0
+
+    @property
+    def enabled(self):
+        return self.ttl > 0 and self.max_entries > 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[0] <= self._clock():
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def peek(self, key):
+        # Fresh values without touching stats or LRU order
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry[1] if entry is not None and entry[0] > self._clock() else None
+
+    def version(self, key, values=None):
+        # Version a fresh entry was read at (None if unknown, patched or expired).
+        # With `values`, only if the entry still holds that very list.
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= self._clock():
+                return None
+            if values is not None and entry[1] is not values:
+                return None
+            return entry[2]
+
+    def revalidate(self, key, version):
+        """Renew an expired entry read at `version`; returns its values, or None if it changed."""
+        if version is None:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[2] is None or entry[2] != version:
+                return None
+            entry[0] = self._clock() + self.ttl
+            self._entries.move_to_end(key)
+            self.revalidations += 1
+            return entry[1]
+
+    def put(self, key, values, version=None):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[key] = [self._clock() + self.ttl, values, version]
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def _drop_ranges(self, sheet_name, keep_count=False):
+        # Caller holds the lock.
+        for key in [k for k in self._entries if isinstance(k, tuple) and k[0] == sheet_name]:
+            if keep_count and key[1] == ROW_COUNT:
+                continue
+            del self._entries[key]
+            self.invalidations += 1
+
+    def append(self, key, rows):
+        # Patch a live entry after a successful write instead of dropping it,
+        # so the next read of the same sheet is still served from memory.
+        # Ranged entries of the sheet are dropped; its row count is bumped.
+        with self._lock:
+            self._drop_ranges(key, keep_count=True)
+            count = self._entries.get((key, ROW_COUNT))
+            if count is not None:
+                count[1] += len(rows)
+            entry = self._entries.get(key)
+            if entry is None:
+                return False
+            if entry[0] <= self._clock():
+                del self._entries[key]
+                return False
+            entry[1].extend(["" if v is None else str(v) for v in row] for row in rows)
+            entry[2] = None  # our write moved the sheet past the recorded version
+            return True
+
+    def insert(self, key, row, rows):
+        # Like append, for rows inserted before sheet row `row` (1-based).
+        with self._lock:
+            self._drop_ranges(key, keep_count=True)
+            count = self._entries.get((key, ROW_COUNT))
+            if count is not None:
+                count[1] += len(rows)
+            entry = self._entries.get(key)
+            if entry is None:
+                return False
+            if entry[0] <= self._clock():
+                del self._entries[key]
+                return False
+            entry[1][row - 1:row - 1] = [["" if v is None else str(v) for v in r] for r in rows]
+            entry[2] = None  # our write moved the sheet past the recorded version
+            return True
+
+    def patch(self, key, cells):
+        # Like append, for cells overwritten in place: (row, col, value), 1-based.
+        # Patched rows are copied first, so lists handed out earlier don't change.
+        with self._lock:
+            self._drop_ranges(key, keep_count=True)
+            entry = self._entries.get(key)
+            if entry is None:
+                return False
+            if entry[0] <= self._clock():
+                del self._entries[key]
+                return False
+            values = entry[1]
+            copied = set()
+            for row, col, value in cells:
+                while len(values) < row:
+                    values.append([])
+                if row not in copied:
+                    values[row - 1] = list(values[row - 1])
+                    copied.add(row)
+                cells_row = values[row - 1]
+                if len(cells_row) < col:
+                    cells_row.extend([""] * (col - len(cells_row)))
+                cells_row[col - 1] = "" if value is None else str(value)
+            entry[2] = None  # our write moved the sheet past the recorded version
+            return True
+
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None:
+                self.invalidations += len(self._entries)
+                self._entries.clear()
+            else:
+                if self._entries.pop(key, None) is not None:
+                    self.invalidations += 1
+                if not isinstance(key, tuple):
+                    self._drop_ranges(key)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hitRate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "revalidations": self.revalidations,
+                "size": len(self._entries),
+                "maxEntries": self.max_entries,
+                "ttl": self.ttl
+            }
@@ -0,0 +1,136 @@
+from datetime import datetime
+
+from api.services.schema import find_header_row
+
+# Port of the Apps Script apiFetchCascadeTree: DB_SITIOS rows are the tree's
+# sites and DB_PROYECTOS rows hang under the site named in their ID_SITIO
+# column. Sites are indexed by id once, so each project finds its parent
+# with a dict lookup instead of a scan over every site.
+
+SITES_SHEET = "DB_SITIOS"
+PROJECTS_SHEET = "DB_PROYECTOS"
+CREATED_FORMATS = ("%d/%m/%Y %H:%M:%S", "%d/%m/%Y %H:%M", "%d/%m/%Y", "%d/%m/%y",
+                   "%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%d")
+
+
+def find_col(headers, *words):
+    # First header containing any of the words (the Apps Script findIndex + includes)
+    return next((i for i, h in enumerate(headers) if any(w in h for w in words)), -1)
+
+
+def format_created_at(value):
+    text = str(value).strip()
+    for fmt in CREATED_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).strftime("%d/%m/%y %H:%M")
+        except ValueError:
+            continue
+    return text
+
+
+def _table(values):
+    # (upper-cased headers, data rows) or None when the sheet has no header row
+    if not values:
+        return None
+    header_idx = find_header_row(values)
+    if header_idx == -1 or len(values) <= header_idx + 1:
+        return None
+    return [str(h).upper().strip() for h in values[header_idx]], values[header_idx + 1:]
+
+
+def _cell(row, idx, default=""):
+    if idx == -1:
+        return default
+    return str(row[idx]) if idx < len(row) else ""
+
+
+def build_sites(values):
+    table = _table(values)
+    if table is None:
+        return []
+    headers, rows = table
+    id_col = find_col(headers, "ID")
+    name_col = find_col(headers, "NOMBRE")
+    if id_col == -1 or name_col == -1:
+        return []
+    client_col = find_col(headers, "CLIENTE")
+    type_col = find_col(headers, "TIPO")
+    status_col = find_col(headers, "ESTATUS")
+    date_col = find_col(headers, "FECHA")
+
+    sites = []
+    for row in rows:
+        if id_col >= len(row) or not row[id_col]:
+            continue
+        created = row[date_col] if -1 < date_col < len(row) else ""
+        sites.append({
+            "id": str(row[id_col]).strip(),
+            "name": _cell(row, name_col).strip(),
+            "client": _cell(row, client_col),
+            "type": _cell(row, type_col, "CLIENTE"),
+            "status": _cell(row, status_col, "ACTIVO"),
+            "createdAt": format_created_at(created) if created else "",
+            "subProjects": [],
+            "expanded": False
+        })
+    return sites
+
+
+def attach_projects(sites, values):
+    # Hash join: one dict of sites by id, one pass over the project rows
+    table = _table(values)
+    if table is None:
+        return
+    headers, rows = table
+    parent_col = find_col(headers, "SITIO", "PADRE")
+    name_col = find_col(headers, "NOMBRE", "SUBPROYECTO")
+    if parent_col == -1 or name_col == -1:
+        return
+    type_col = find_col(headers, "TIPO", "ESPECIALIDAD")
+    status_col = find_col(headers, "ESTATUS")
+
+    by_id = {}
+    for site in sites:
+        by_id.setdefault(site["id"], site)  # first site wins on a repeated id
+
+    for row in rows:
+        if parent_col >= len(row) or not row[parent_col]:
+            continue
+        parent = by_id.get(str(row[parent_col]).strip())
+        if parent is None:
+            continue
+        name = _cell(row, name_col).strip()
+        parent["subProjects"].append({
+            "id": row[0],
+            "name": name,
+            "type": _cell(row, type_col, "GENERAL"),
+            "status": _cell(row, status_col, "ACTIVO"),
+            "icon": "fa-tasks" if "PPC" in name.upper() else "fa-clipboard-list"
+        })
+
+
+class CascadeTree:
+    """Site -> sub-project tree built from one version of each sheet."""
+
+    def __init__(self, site_values, project_values, version=None):
+        self.version = version
+        self.sites = build_sites(site_values)
+        attach_projects(self.sites, project_values)
+        self._by_id = {}
+        for site in self.sites:
+            self._by_id.setdefault(site["id"], site)
+
+    def full(self):
+        return {"success": True, "data": self.sites}
+
+    def summary(self):
+        # Sites only, with how many sub-projects each would expand to
+        data = [{**{k: v for k, v in site.items() if k != "subProjects"},
+                 "subProjects": [], "subProjectCount": len(site["subProjects"])} for site in self.sites]
+        return {"success": True, "data": data}
+
+    def site(self, site_id):
+        site = self._by_id.get(str(site_id).strip())
+        if site is None:
+            return {"success": False, "message": f"Sitio no encontrado: {site_id}"}
+        return {"success": True, "data": [site]}
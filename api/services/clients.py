@@ -0,0 +1,150 @@
+import re
+import threading
+import unicodedata
+from collections import Counter
+
+# Canonical client names. Hand-typed cells, the AI extraction and the forms
+# spell the same company many ways ("Acme", "ACME S.A. de C.V.", "acme sa");
+# names are compared on a normalized key, and unknown spellings are matched
+# against the known clients through a trigram index (Dice coefficient).
+
+CLIENT_SHEETS = ["ANTONIA_VENTAS", "PPCV3"]
+CLIENT_COLUMNS = ["CLIENTE"]
+MIN_SCORE = 0.6  # below this a name is left as typed
+# Company-type suffixes that don't tell clients apart
+LEGAL_WORDS = {"SA", "DE", "CV", "SAB", "SAPI", "RL", "SRL", "SC", "INC", "LLC", "CO", "CIA"}
+
+_NON_ALNUM_RE = re.compile(r"[^A-Z0-9 ]+")
+
+
+def client_key(name):
+    """Upper-case, accent-free, punctuation-free name without legal suffixes."""
+    text = unicodedata.normalize("NFKD", str(name or "").upper())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    words = _NON_ALNUM_RE.sub(" ", text.replace(".", "")).split()
+    # Only trailing legal words are dropped ("GRUPO DE ACME" keeps its DE)
+    while len(words) > 1 and words[-1] in LEGAL_WORDS:
+        words.pop()
+    return " ".join(words)
+
+
+def trigrams(key):
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class ClientResolver:
+    """Known client names indexed by key and by trigram."""
+
+    def __init__(self, names=()):
+        self.names = []  # canonical name per client id (first spelling seen, upper-cased)
+        self._grams = []
+        self._by_key = {}
+        self._postings = {}  # trigram -> client ids
+        for name in names:
+            self.add(name)
+
+    def add(self, name):
+        # Returns the client's canonical name; new keys are indexed incrementally
+        key = client_key(name)
+        if not key:
+            return None
+        cid = self._by_key.get(key)
+        if cid is not None:
+            return self.names[cid]
+        cid = len(self.names)
+        grams = trigrams(key)
+        self.names.append(" ".join(str(name).upper().split()))
+        self._grams.append(len(grams))
+        self._by_key[key] = cid
+        for gram in grams:
+            self._postings.setdefault(gram, []).append(cid)
+        return self.names[cid]
+
+    def resolve(self, name, min_score=MIN_SCORE):
+        """(canonical name, score) of the best known match, or (None, 0.0)."""
+        key = client_key(name)
+        if not key:
+            return None, 0.0
+        cid = self._by_key.get(key)
+        if cid is not None:
+            return self.names[cid], 1.0
+        grams = trigrams(key)
+        shared = Counter()
+        for gram in grams:
+            shared.update(self._postings.get(gram, ()))
+        best, best_score = None, 0.0
+        for cid, count in shared.items():
+            score = 2.0 * count / (len(grams) + self._grams[cid])
+            if score > best_score:
+                best, best_score = cid, score
+        if best is None or best_score < min_score:
+            return None, round(best_score, 3)
+        return self.names[best], round(best_score, 3)
+
+    def canonical(self, name, min_score=MIN_SCORE):
+        # The canonical spelling if one matches well enough, else the name as given
+        match, _ = self.resolve(name, min_score)
+        return match if match is not None else name
+
+    def __len__(self):
+        return len(self.names)
+
+
+def names_from_columns(values):
+    # CLIENTE cells as returned by get_columns (header row first)
+    return [row[0] for row in (values or [])[1:] if row and str(row[0]).strip() and client_key(row[0]) != "CLIENTE"]
+
+
+class ClientDirectory:
+    """Resolver over the clients of CLIENT_SHEETS, rebuilt when one of them changes."""
+
+    def __init__(self):
+        self._resolver = None
+        self._versions = None
+        self._lock = threading.Lock()
+        self.builds = 0
+
+    def get(self, versions):
+        # versions: (spreadsheet, version of each CLIENT_SHEETS tab)
+        with self._lock:
+            if self._resolver is None or None in versions or versions != self._versions:
+                return None
+            return self._resolver
+
+    def build(self, columns_by_sheet, versions):
+        resolver = ClientResolver(name for sheet in CLIENT_SHEETS for name in names_from_columns(columns_by_sheet.get(sheet)))
+        with self._lock:
+            self._resolver = resolver
+            self._versions = versions
+            self.builds += 1
+        return resolver
+
+    def stats(self):
+        with self._lock:
+            return {"clients": len(self._resolver) if self._resolver is not None else 0, "builds": self.builds}
+
+
+client_directory = ClientDirectory()
+
+
+def client_resolver(manager):
+    """Current resolver, reading the CLIENTE columns through a GSheetsManager when they changed."""
+    versions = tuple(manager.get_version(sheet) for sheet in CLIENT_SHEETS)
+    versions = (manager.ss,) + versions
+    resolver = client_directory.get(versions)
+    if resolver is None:
+        columns = {sheet: manager.get_columns(sheet, CLIENT_COLUMNS) for sheet in CLIENT_SHEETS}
+        resolver = client_directory.build(columns, versions)
+    return resolver
+
+
+async def async_client_resolver(manager):
+    """client_resolver for an AsyncGSheetsManager."""
+    versions = tuple([await manager.get_version(sheet) for sheet in CLIENT_SHEETS])
+    versions = (manager.manager.ss,) + versions
+    resolver = client_directory.get(versions)
+    if resolver is None:
+        columns = {sheet: await manager.get_columns(sheet, CLIENT_COLUMNS) for sheet in CLIENT_SHEETS}
+        resolver = client_directory.build(columns, versions)
+    return resolver
@@ -0,0 +1,148 @@
+import asyncio
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+import sys
+import time
+
+# Login credentials from the USERS sheet, indexed by normalized username.
+# PASSWORD cells hold "pbkdf2_sha256$<iterations>$<salt>$<hash>" strings
+# (make one with `python -m api.services.credentials <password>`); cells
+# still in plain text are compared in constant time until they are replaced.
+
+HASH_SCHEME = "pbkdf2_sha256"
+# Cost of new hashes; stored hashes keep the cost they were made with
+KDF_ITERATIONS = int(os.environ.get("LOGIN_KDF_ITERATIONS", 600000))
+USER_COLUMNS = ["USERNAME", "PASSWORD", "ROLE", "LABEL"]
+USER_INDEX_MAX_AGE = 30.0  # seconds; also rebuilt whenever the USERS version changes
+
+_dummy_hash = None
+
+
+def normalize_username(username):
+    return str(username).strip().upper()
+
+
+def _b64(raw):
+    return base64.b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _unb64(text):
+    return base64.b64decode(text + "=" * (-len(text) % 4))
+
+
+def hash_password(password, iterations=None, salt=None):
+    iterations = iterations or KDF_ITERATIONS
+    salt = salt or secrets.token_bytes(16)
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, iterations)
+    return f"{HASH_SCHEME}${iterations}${_b64(salt)}${_b64(digest)}"
+
+
+def verify_password(password, stored):
+    """
+    Checks a login attempt against a PASSWORD cell. CPU-bound by design:
+    call it off the event loop. Unknown users (stored=None) still pay one
+    KDF so response time doesn't reveal which usernames exist.
+    """
+    global _dummy_hash
+    if not stored:
+        if _dummy_hash is None:
+            _dummy_hash = hash_password(secrets.token_hex(8))
+        verify_password(password, _dummy_hash)
+        return False
+    if stored.startswith(HASH_SCHEME + "$"):
+        try:
+            _, iterations, salt, digest = stored.split("$")
+            expected = _unb64(digest)
+            actual = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), _unb64(salt), int(iterations))
+        except ValueError:
+            print("Malformed password hash in USERS")
+            return False
+        return hmac.compare_digest(actual, expected)
+    # Legacy plain-text cell
+    return hmac.compare_digest(password.encode("utf-8"), stored.encode("utf-8"))
+
+
+def build_user_index(values):
+    # values: USERS columns as returned by get_columns (header row first); first row per username wins
+    users = {}
+    if not values or len(values) < 2:
+        return users
+    headers = [str(h).upper().strip() for h in values[0]]
+    if "USERNAME" not in headers or "PASSWORD" not in headers:
+        return users
+    user_idx = headers.index("USERNAME")
+    pass_idx = headers.index("PASSWORD")
+    role_idx = headers.index("ROLE") if "ROLE" in headers else -1
+    label_idx = headers.index("LABEL") if "LABEL" in headers else -1
+
+    for row in values[1:]:
+        username = normalize_username(row[user_idx]) if len(row) > user_idx else ""
+        if not username or username in users:
+            continue
+        users[username] = {
+            "username": username,
+            "password": row[pass_idx] if len(row) > pass_idx else "",
+            "role": row[role_idx] if -1 < role_idx < len(row) else "USER",
+            "name": row[label_idx] if -1 < label_idx < len(row) else username
+        }
+    return users
+
+
+class CredentialStore:
+    """
+    In-memory USERS index for /api/login. Rebuilt from the four credential
+    columns when the sheet version changes (or the spreadsheet is swapped),
+    and at least every USER_INDEX_MAX_AGE seconds; concurrent logins share
+    one rebuild.
+    """
+
+    def __init__(self, sheets, sheet_name="USERS", max_age=USER_INDEX_MAX_AGE, clock=time.monotonic):
+        self.sheets = sheets  # AsyncGSheetsManager
+        self.sheet_name = sheet_name
+        self.max_age = max_age
+        self._clock = clock
+        self.users = {}
+        self._source = None  # (spreadsheet, version) the index was built from
+        self._built_at = 0.0
+        self._lock = asyncio.Lock()
+        self.builds = 0
+
+    def _current(self, source):
+        return source[1] is not None and source == self._source and self._clock() - self._built_at < self.max_age
+
+    async def refresh(self):
+        version = await self.sheets.get_version(self.sheet_name)
+        source = (self.sheets.manager.ss, version)
+        if self._current(source):
+            return
+        async with self._lock:
+            if self._current(source):
+                return
+            values = await self.sheets.get_columns(self.sheet_name, USER_COLUMNS)
+            self.users = build_user_index(values)
+            self._source = source
+            self._built_at = self._clock()
+            self.builds += 1
+
+    async def lookup(self, username):
+        await self.refresh()
+        return self.users.get(normalize_username(username))
+
+    async def authenticate(self, username, password):
+        """The user's index entry if the password matches, else None. The KDF runs in a worker thread."""
+        user = await self.lookup(username)
+        ok = await asyncio.to_thread(verify_password, password, user["password"] if user else None)
+        return user if ok and user else None
+
+    def stats(self):
+        return {"users": len(self.users), "builds": self.builds}
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("Uso: python -m api.services.credentials <contraseña>")
+        sys.exit(1)
+    print(hash_password(sys.argv[1]))
@@ -0,0 +1,23 @@
+from datetime import date, datetime
+from functools import lru_cache
+
+# Dates as they appear in the sheets: dd/mm/yy or dd/mm/yyyy (Apps Script
+# pDate rule: a 2-digit year is 20yy), or ISO yyyy-mm-dd, optionally with a time.
+
+
+@lru_cache(maxsize=8192)
+def parse_sheet_date(value):
+    """date for a sheet cell, or None if it holds no recognisable date."""
+    text = str(value).strip().split(" ")[0].split("T")[0]
+    if not text:
+        return None
+    try:
+        if "/" in text:
+            day, month, year = text.split("/")
+            year = int(year)
+            return date(year + 2000 if year < 100 else year, int(month), int(day))
+        if "-" in text:
+            return datetime.strptime(text, "%Y-%m-%d").date()
+    except ValueError:
+        return None
+    return None
@@ -0,0 +1,96 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+# Conditional GET support: strong ETags over the exact response bytes, and a
+# memo of the sheet version each ETag was rendered from so a request whose
+# If-None-Match still matches can be answered without reading the sheet.
+
+ETAG_MEMO_SIZE = 512
+
+
+def body_etag(body):
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match, etag):
+    if not if_none_match or not etag:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Strong comparison: weak validators (W/"...") never match
+    return etag in (tag.strip() for tag in if_none_match.split(","))
+
+
+class ETagMemo:
+    """request key -> (source version, etag), least recently used first out."""
+
+    def __init__(self, max_entries=ETAG_MEMO_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+
+    def lookup(self, key, version):
+        # ETag rendered for `key` from this exact version, if any
+        if version is None:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def remember(self, key, version, etag):
+        with self._lock:
+            if version is None:
+                self._entries.pop(key, None)
+                return
+            self._entries[key] = (version, etag)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {"size": len(self._entries), "hits": self.hits}
+
+
+class ResponseCache:
+    """Serialized response bodies per key, valid while their source version is current."""
+
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (version, etag, body)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.builds = 0
+
+    def get(self, key, version):
+        # (etag, body) rendered from this exact version, or None
+        if version is None:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1], entry[2]
+
+    def put(self, key, version, body):
+        etag = body_etag(body)
+        with self._lock:
+            self.builds += 1
+            if version is not None:
+                self._entries[key] = (version, etag, body)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return etag, body
+
+    def stats(self):
+        with self._lock:
+            return {"size": len(self._entries), "hits": self.hits, "builds": self.builds}
@@ -0,0 +1,135 @@
+from bisect import insort
+
+from api.services.clients import ClientResolver, client_key
+from api.services.dates import parse_sheet_date
+from api.services.row_parser import RowParser
+from api.services.schema import SheetSchema
+
+# Port of the Apps Script apiFetchInfoBankData / apiFetchDistinctClients over
+# the ANTONIA_VENTAS tracker. Active rows are filed once under
+# (client key, year, month) as the records the Info Bank shows, and the
+# distinct clients are kept sorted. A requested company is resolved to one
+# known client (see clients.py) instead of substring-matched both ways, so
+# "ACME" no longer returns both "ACME NORTE" and "ACME SUR". When a new sheet
+# version only adds rows at the end (the usual case: new quotes are
+# appended), only those rows are filed.
+
+INFOBANK_SHEET = "ANTONIA_VENTAS"
+DEFAULT_YEAR = 2025
+MONTHS = {
+    "ENERO": 1, "FEBRERO": 2, "MARZO": 3, "ABRIL": 4, "MAYO": 5, "JUNIO": 6,
+    "JULIO": 7, "AGOSTO": 8, "SEPTIEMBRE": 9, "OCTUBRE": 10, "NOVIEMBRE": 11, "DICIEMBRE": 12
+}
+DATE_COLUMNS = ["FECHA INICIO", "FECHA_INICIO", "FECHA DE INICIO", "FECHA", "ALTA", "FECHA ALTA", "FECHA_ALTA", "FECHA VISITA"]
+# Output field -> candidate headers, first present one wins
+RECORD_COLUMNS = {
+    "FECHA_INICIO": DATE_COLUMNS,
+    "AREA": ["AREA", "DEPARTAMENTO", "ESPECIALIDAD"],
+    "CONCEPTO": ["CONCEPTO", "DESCRIPCION", "DESCRIPCIÓN", "ACTIVIDAD"],
+    "VENDEDOR": ["VENDEDOR", "RESPONSABLE", "ENCARGADO", "INVOLUCRADOS"],
+    "ESTATUS": ["ESTATUS", "STATUS", "ESTADO"],
+    "FOLIO": ["FOLIO", "ID"],
+    "COTIZACION": ["COTIZACION", "ARCHIVO", "LINK", "URL", "PDF"]
+}
+
+
+def normalize_client(value):
+    return str(value).strip().upper()
+
+
+def parse_month(month_name):
+    return MONTHS.get(str(month_name).upper().strip())
+
+
+def parse_year(year):
+    try:
+        return int(str(year).strip()) or DEFAULT_YEAR
+    except ValueError:
+        return DEFAULT_YEAR
+
+
+class InfoBankIndex:
+    """(client, year, month) -> Info Bank records for one ANTONIA_VENTAS version."""
+
+    def __init__(self):
+        self.version = None
+        self.clients = []  # sorted distinct clients of the active rows
+        self.resolver = ClientResolver()
+        self._by_key = {}  # (client key, year, month) -> records in sheet order
+        self._header = None
+        self._rows = []  # copy of the data rows filed so far, to recognise appends
+        self._in_history = False
+        self._columns = {}
+        self.builds = 0
+        self.appends = 0
+
+    def refresh(self, values, version):
+        schema = SheetSchema.from_values(values) if values and len(values) >= 2 else None
+        if schema is None or not schema.found:
+            self._reset(None)
+            self.version = version
+            return
+        rows = values[schema.data_start:]
+        n = len(self._rows)
+        if schema.raw_headers == self._header and len(rows) >= n and rows[:n] == self._rows:
+            if len(rows) > n:
+                self.appends += 1
+        else:
+            self._reset(schema.raw_headers)
+            self.builds += 1
+            n = 0
+        self._file(rows[n:], n)
+        self._rows.extend(list(r) for r in rows[n:])
+        self.version = version
+
+    def _reset(self, header):
+        self.clients = []
+        self.resolver = ClientResolver()
+        self._by_key = {}
+        self._header = header
+        self._rows = []
+        self._in_history = False
+        columns = {}
+        for i, h in enumerate(header or []):
+            columns[h.upper().strip()] = i  # a repeated header keeps its last column
+        self._columns = columns
+
+    def _col(self, names):
+        return next((self._columns[n] for n in names if n in self._columns), -1)
+
+    def _file(self, rows, first_row):
+        if self._in_history or not rows:
+            return
+        client_col = self._col(["CLIENTE"])
+        if client_col == -1:
+            return
+        date_col = self._col(DATE_COLUMNS)
+        fields = [(field, self._col(names)) for field, names in RECORD_COLUMNS.items()]
+        known = set(self.clients)
+
+        for section, _, row in RowParser(self._header).iter_rows(rows, first_row, build=False):
+            if section == "history":
+                self._in_history = True
+                break
+            client = normalize_client(row[client_col])
+            if not client:
+                continue
+            if client not in known:
+                known.add(client)
+                insort(self.clients, client)
+                self.resolver.add(client)
+            date = parse_sheet_date(str(row[date_col])) if date_col != -1 and row[date_col] else None
+            if date is None:
+                continue
+            record = {field: (row[col] if col != -1 else "") for field, col in fields}
+            self._by_key.setdefault((client_key(client), date.year, date.month), []).append(record)
+
+    def lookup(self, company, year, month):
+        """(records of the client `company` resolves to, in sheet order; canonical name; score)."""
+        client, score = self.resolver.resolve(company)
+        if client is None:
+            return [], None, score
+        return self._by_key.get((client_key(client), year, month), []), client, score
+
+    def stats(self):
+        return {"clients": len(self.clients), "keys": len(self._by_key), "builds": self.builds, "appends": self.appends}
@@ -0,0 +1,80 @@
+from itertools import compress
+from operator import itemgetter
+
+from api.services.dates import parse_sheet_date
+from api.services.row_parser import RowParser
+from api.services.schema import SheetSchema
+
+# Port of the Apps Script apiFetchTeamKPIData: per person, how many active
+# tasks are finished (volume) and their average days from start to end date
+# (efficiency). Each sheet is handled column by column: the status, start and
+# end columns are pulled out once, and the filter and date math run over
+# those columns instead of over per-row dicts.
+
+DONE_WORDS = ("DONE", "COMPLETED", "FINALIZADO", "TERMINADO")
+STATUS_COLUMNS = ["ESTATUS", "STATUS"]
+START_COLUMNS = ["FECHA", "ALTA", "FECHA INICIO"]
+# Real end date first, then planned ones (same priority as the Apps Script)
+END_COLUMNS = ["FECHA TERMINO", "FECHA FIN", "FECHA_FIN", "FECHA ENTREGA", "FECHA RESPUESTA"]
+
+
+def kpi_groups(directory):
+    # (ventas names, tracker names) as the Apps Script splits the directory
+    ventas = [u["name"] for u in directory if u["dept"] == "VENTAS" and u["name"] != "ANTONIA_VENTAS"]
+    tracker = [u["name"] for u in directory
+               if u["dept"] not in ("VENTAS", "ADMINISTRACION") and u["name"] not in ("ADMINISTRADOR", "PREWORK_ORDER")]
+    return ventas, tracker
+
+
+def column(rows, index):
+    return list(map(itemgetter(index), rows))
+
+
+def coalesce(rows, schema, names):
+    # Per row, the first non-empty value among the named columns (JS `a || b || c`)
+    columns = [column(rows, schema.columns[n]) for n in names if n in schema.columns]
+    if not columns:
+        return [""] * len(rows)
+    if len(columns) == 1:
+        return columns[0]
+    return [next(filter(None, values), "") for values in zip(*columns)]
+
+
+def person_kpi(name, values, schema=None):
+    if values is None:
+        return {"name": name, "volume": 0, "efficiency": 0, "error": "Hoja no encontrada"}
+    schema = schema or SheetSchema.from_values(values)
+    if len(values) < 2 or not schema.found:
+        return {"name": name, "volume": 0, "efficiency": 0}
+
+    rows = [row for section, _, row in RowParser(schema.raw_headers).iter_rows(values[schema.data_start:], schema.header_row + 2, build=False)
+            if section == "data"]
+    # Short rows are padded so every KPI column can be read with itemgetter
+    needed = [schema.columns[n] for n in STATUS_COLUMNS + START_COLUMNS + END_COLUMNS if n in schema.columns]
+    width = max(needed) + 1 if needed else 0
+    rows = [row if len(row) >= width else list(row) + [""] * (width - len(row)) for row in rows]
+
+    status = coalesce(rows, schema, STATUS_COLUMNS)
+    done = [any(word in s for word in DONE_WORDS) for s in map(str.upper, map(str, status))]
+    completed = list(compress(rows, done))
+
+    starts = map(parse_sheet_date, map(str, coalesce(completed, schema, START_COLUMNS)))
+    ends = map(parse_sheet_date, map(str, coalesce(completed, schema, END_COLUMNS)))
+    days = [abs((end - start).days) for start, end in zip(starts, ends) if start and end]
+
+    return {
+        "name": name,
+        "volume": len(completed),
+        "efficiency": round(sum(days) / len(days), 1) if days else 0
+    }
+
+
+def team_kpi(directory, values_by_sheet, schemas=None):
+    """KPI payload for the dashboard; values_by_sheet maps each staff sheet to its values (None if missing)."""
+    schemas = schemas or {}
+    ventas, tracker = kpi_groups(directory)
+    return {
+        "success": True,
+        "ventas": [person_kpi(n, values_by_sheet.get(n), schemas.get(n)) for n in ventas],
+        "tracker": [person_kpi(n, values_by_sheet.get(n), schemas.get(n)) for n in tracker]
+    }
@@ -0,0 +1,123 @@
+import re
+
+# A1 notation helpers shared by the Sheets manager and the mock spreadsheet.
+
+_CELL_RE = re.compile(r"^([A-Z]*)(\d*)$")
+MAX_GRID_ROWS = 10000000  # Sheets caps a spreadsheet at 10M cells
+
+
+def quote_sheet_name(sheet_name):
+    return "'" + str(sheet_name).replace("'", "''") + "'"
+
+
+def sheet_range(sheet_name, a1=None):
+    quoted = quote_sheet_name(sheet_name)
+    return f"{quoted}!{a1}" if a1 else quoted
+
+
+def split_range(range_str):
+    """Split "'Sheet'!A1:B2" into ("Sheet", "A1:B2"); the A1 part may be None."""
+    range_str = str(range_str)
+    if range_str.startswith("'"):
+        end = 1
+        while True:
+            end = range_str.index("'", end)
+            if range_str[end + 1:end + 2] == "'":
+                end += 2
+                continue
+            break
+        name = range_str[1:end].replace("''", "'")
+        rest = range_str[end + 1:]
+    else:
+        name, _, rest = range_str.partition("!")
+        rest = "!" + rest if rest else ""
+    a1 = rest[1:] if rest.startswith("!") else None
+    return name, (a1 or None)
+
+
+def column_letter(col):
+    """1-based column number -> letters (1 -> A, 27 -> AA)."""
+    letters = ""
+    while col > 0:
+        col, rem = divmod(col - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+
+def column_number(letters):
+    col = 0
+    for ch in letters.upper():
+        col = col * 26 + (ord(ch) - 64)
+    return col
+
+
+def parse_a1(a1):
+    """
+    Parse an A1 range ("A1:D10", "A:D", "2:10", "B5") into 1-based inclusive
+    bounds (row_start, col_start, row_end, col_end). Open ends are None.
+    """
+    start, _, end = str(a1).upper().partition(":")
+    end = end or start
+    m1, m2 = _CELL_RE.match(start), _CELL_RE.match(end)
+    if not m1 or not m2:
+        raise ValueError(f"Invalid A1 range: {a1}")
+    return (
+        int(m1.group(2)) if m1.group(2) else None,
+        column_number(m1.group(1)) if m1.group(1) else None,
+        int(m2.group(2)) if m2.group(2) else None,
+        column_number(m2.group(1)) if m2.group(1) else None,
+    )
+
+
+def slice_values(values, a1):
+    """Cut an A1 range out of a full grid of values, like values.get does."""
+    if not a1:
+        return [list(row) for row in values]
+    row_start, col_start, row_end, col_end = parse_a1(a1)
+    r0 = (row_start or 1) - 1
+    r1 = row_end if row_end is not None else len(values)
+    c0 = (col_start or 1) - 1
+    rows = []
+    for row in values[r0:r1]:
+        rows.append(list(row[c0:col_end] if col_end is not None else row[c0:]))
+    # The API omits trailing empty rows
+    while rows and not any(str(c) != "" for c in rows[-1]):
+        rows.pop()
+    return rows
+
+
+def rows_range(start, end=None, col_count=None):
+    """
+    Whole rows start..end (open-ended when end is None). With the grid's
+    column count the range is "A5:T" style, which the API accepts for any
+    sheet length; without it, a plain row range for local backends.
+    """
+    if col_count:
+        return f"A{start}:{column_letter(col_count)}{end or ''}"
+    return f"{start}:{end or MAX_GRID_ROWS}"
+
+
+def column_range(col, start_row=1):
+    """One column from start_row down to the last row ("C4:C")."""
+    letter = column_letter(col)
+    return f"{letter}{start_row}:{letter}"
+
+
+def cell_updates(cells):
+    """
+    (row, col, value) triples (1-based) -> values.batchUpdate data entries,
+    one per run of adjacent cells in a row ({"range": "C5:E5", "values": [[...]]}).
+    """
+    data = []
+    run = None
+    for row, col, value in sorted(cells, key=lambda c: (c[0], c[1])):
+        if run is not None and run[0] == row and run[2] + 1 == col:
+            run[2] = col
+            run[3].append(value)
+            continue
+        run = [row, col, col, [value]]
+        data.append(run)
+    return [
+        {"range": f"{column_letter(c0)}{r}:{column_letter(c1)}{r}" if c1 > c0 else f"{column_letter(c0)}{r}", "values": [vals]}
+        for r, c0, c1, vals in data
+    ]
@@ -0,0 +1,211 @@
+from operator import itemgetter
+
+from api.services.schema import SheetSchema
+
+# Sheet values -> task records, shared by every endpoint that returns rows.
+# Everything that depends only on the header row (kept columns, their names,
+# the row getters) is worked out once per parse. Per row, the history marker
+# is only looked for in the cells it is written in (columns A and C, where the
+# Apps Script writes it, and FOLIO / ID and CONCEPTO), the blank/header-repeat checks read the first headed column, and the dict is built with itemgetter + zip instead of
+# cell-by-cell str() calls.
+
+HISTORY_MARKER = "TAREAS REALIZADAS"
+
+
+def check_sheet_values(sheet, values, schema=None):
+    # (schema, None) when values hold a table with a known header row, else (None, response)
+    if not values:
+        return None, {"success": True, "data": [], "history": [], "headers": [], "message": f"Falta hoja: {sheet}"}
+
+    if len(values) < 2:
+        return None, {"success": True, "data": [], "history": [], "headers": [], "message": "Vacía"}
+
+    schema = schema or SheetSchema.from_values(values)
+    if not schema.found:
+        return None, {"success": True, "data": [], "headers": [], "message": "Sin formato válido"}
+
+    return schema, None
+
+
+def sheet_headers(header_row):
+    # (column indices with a header, their header names)
+    raw_headers = [str(h).strip() for h in header_row]
+    valid_indices = [i for i, h in enumerate(raw_headers) if h]
+    return valid_indices, [raw_headers[i] for i in valid_indices]
+
+
+def _getter(indices):
+    # itemgetter that always returns a tuple
+    if len(indices) == 1:
+        index = indices[0]
+        return lambda row: (row[index],)
+    return itemgetter(*indices)
+
+
+class SectionCursor:
+    """offset/limit window over the rows of one section (active or history)."""
+
+    def __init__(self, offset=0, limit=None):
+        self.offset = offset
+        self.limit = limit
+        self.seen = 0
+        self.returned = 0
+        self.more = False  # a row past the window exists
+
+    def take(self):
+        # Called once per row of the section; True if the row is inside the window
+        index = self.seen
+        self.seen += 1
+        if index < self.offset:
+            return False
+        if self.limit is not None and index >= self.offset + self.limit:
+            self.more = True
+            return False
+        self.returned += 1
+        return True
+
+    def info(self):
+        return {
+            "offset": self.offset,
+            "limit": self.limit,
+            "returned": self.returned,
+            "nextOffset": self.offset + self.limit if self.more else None
+        }
+
+
+class RowParser:
+    """
+    Turns the data rows under a header row into records. Rows after the
+    "TAREAS REALIZADAS" marker row are history; blank rows and repeated
+    header rows are skipped. A RowQuery's filter runs on the raw row before
+    any dict is built, and its fields limit the dict's keys.
+    """
+
+    def __init__(self, header_row, query=None):
+        self.valid_indices, self.clean_headers = sheet_headers(header_row)
+        self.query = query
+        self.match = query.match if query is not None else None
+        columns = query.columns if query is not None and query.columns is not None else None
+        if columns is None:
+            self.names = self.clean_headers
+            out_indices = self.valid_indices
+        else:
+            self.names = [name for name, _ in columns]
+            out_indices = [c for _, c in columns]
+        self.headers = self.names
+        # The Apps Script writes the marker in column C (A on narrow sheets); by
+        # hand it goes under FOLIO or CONCEPTO. Other cells (comments) may
+        # mention it without being the marker
+        layout = SheetSchema(-1, header_row)
+        marker_indices = sorted({0, 2, layout.folio_col, layout.col("CONCEPTO")} - {-1})
+        if self.valid_indices:
+            marker_indices = sorted(set(marker_indices) | {self.valid_indices[0]})
+        # Rows shorter than this are padded once so the getters never go out of range
+        self.width = max(self.valid_indices + out_indices + marker_indices) + 1 if self.valid_indices else 0
+        self._markers = _getter(marker_indices)
+        self._values = _getter(self.valid_indices) if self.valid_indices else None
+        self._out = _getter(out_indices) if out_indices else (lambda row: ())
+        self._same_out = out_indices == self.valid_indices
+
+    def iter_rows(self, data_rows, first_row, build=True):
+        """
+        Yields ("data" | "history", record, row); first_row is the sheet row
+        number (1-based) of data_rows[0]. With build=False record is None,
+        for callers that work on the raw rows' columns.
+        """
+        if not self.valid_indices:
+            return
+        width = self.width
+        pad = [""] * width
+        first_col = self.valid_indices[0]
+        first_header = self.clean_headers[0].upper()
+        values_of = self._values
+        out_of = self._out
+        same_out = self._same_out
+        markers_of = self._markers
+        names = self.names
+        match = self.match
+        section = "data"
+
+        for i, row in enumerate(data_rows):
+            if len(row) < width:
+                row = list(row) + pad[len(row):]
+
+            cells = markers_of(row)
+            try:
+                joined = "|".join(cells)
+            except TypeError:
+                # Non-text cells (numbers from a local backend): same checks on their str()
+                joined = "|".join(map(str, cells))
+            if HISTORY_MARKER in joined.upper():
+                section = "history"
+                continue
+
+            first = str(row[first_col])
+            if first.upper() == first_header:
+                continue
+
+            if match is not None and not match(row):
+                continue
+
+            # Blank and whitespace-only rows have no text in any headed column;
+            # a filled first column (the usual FOLIO / ID) settles it without a join
+            values = values_of(row)
+            if not first or first.isspace():
+                try:
+                    has_data = bool("".join(values).strip())
+                except TypeError:
+                    has_data = any(str(v).strip() for v in values)
+                if not has_data:
+                    continue
+
+            if not build:
+                yield section, None, row
+                continue
+            record = dict(zip(names, values if same_out else out_of(row)))
+            record['_rowIndex'] = first_row + i
+            yield section, record, row
+
+    def paged_rows(self, data_rows, first_row, cursors):
+        # Records inside each section's window; stops reading once both windows are known to be full
+        # (sorting needs every matching row first)
+        rows = self.iter_rows(data_rows, first_row)
+        if self.query is not None and self.query.sort_keys:
+            rows = self.query.sorted(rows)
+        for section, record, _ in rows:
+            if cursors[section].take():
+                yield section, record
+            if cursors["history"].more and (cursors["data"].more or section == "history"):
+                break
+
+
+def parse_sheet_rows(header_row, data_rows, first_row, cursors=None, query=None):
+    if cursors is None:
+        cursors = {"data": SectionCursor(), "history": SectionCursor()}
+    parser = RowParser(header_row, query)
+    tasks = {"data": [], "history": []}
+    paged = any(c.offset or c.limit is not None for c in cursors.values())
+    if paged or (query is not None and query.sort_keys):
+        for section, record in parser.paged_rows(data_rows, first_row, cursors):
+            tasks[section].append(record)
+    else:
+        for section, record, _ in parser.iter_rows(data_rows, first_row):
+            tasks[section].append(record)
+
+    result = {
+        "success": True,
+        "data": tasks["data"],
+        "history": tasks["history"],
+        "headers": parser.headers
+    }
+    if paged:
+        result["page"] = {section: c.info() for section, c in cursors.items()}
+    return result
+
+
+def parse_sheet_data(sheet, values, schema=None):
+    schema, error = check_sheet_values(sheet, values, schema)
+    if error:
+        return error
+
+    return parse_sheet_rows(schema.raw_headers, values[schema.data_start:], schema.header_row + 2)
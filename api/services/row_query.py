@@ -0,0 +1,113 @@
+import re
+
+from api.services.dates import parse_sheet_date
+
+# fields= / where= / sort= for sheet reads. Names resolve through the sheet
+# schema (header aliases included) to column indices once per request, and
+# conditions run on the raw row lists, so rejected rows never become dicts.
+#
+#   fields=FOLIO,CONCEPTO,ESTATUS     only these columns (unknown names are skipped)
+#   where=ESTATUS=ASIGNADO            equal, ignoring case and outer spaces
+#   where=RESPONSABLE~luis            contains, ignoring case
+#   where=FECHA>=2025-01-01           on or after / on or before a date (also dd/mm/yy)
+#   sort=-FECHA,FOLIO                 ascending, "-" for descending; blanks go last
+
+_CONDITION_RE = re.compile(r"^(.+?)(>=|<=|~|=)(.*)$", re.S)
+
+
+def _cell(row, c):
+    return str(row[c]) if c < len(row) else ""
+
+
+def _split(text):
+    return [part.strip() for part in str(text).split(",") if part.strip()]
+
+
+def value_key(text):
+    # Dates, then numbers, then text; mixed columns still sort deterministically
+    text = str(text).strip()
+    d = parse_sheet_date(text)
+    if d is not None:
+        return (0, d.toordinal(), "")
+    try:
+        return (1, float(text.replace("%", "").replace(",", "")), "")
+    except ValueError:
+        return (2, 0, text.upper())
+
+
+class RowQuery:
+    def __init__(self, columns=None, conditions=None, sort_keys=None):
+        self.columns = columns  # [(header name, column index)], None for every column
+        self.conditions = conditions or []
+        self.sort_keys = sort_keys or []  # [(column index, descending)]
+
+    @classmethod
+    def parse(cls, schema, fields=None, where=None, sort=None):
+        """Raises ValueError (message for the client) on unknown where/sort columns or bad dates."""
+        columns = None
+        if fields:
+            columns, seen = [], set()
+            for key in _split(fields):
+                c = schema.col(key)
+                if c > -1 and c not in seen:
+                    seen.add(c)
+                    columns.append((schema.raw_headers[c], c))
+
+        conditions = [cls._condition(schema, text) for text in (where or []) if text.strip()]
+
+        sort_keys = []
+        for key in _split(sort or ""):
+            descending = key.startswith("-")
+            name = key.lstrip("+-").strip()
+            c = schema.col(name)
+            if c == -1:
+                raise ValueError(f"Columna desconocida: {name}")
+            sort_keys.append((c, descending))
+
+        return cls(columns, conditions, sort_keys)
+
+    @staticmethod
+    def _condition(schema, text):
+        m = _CONDITION_RE.match(text.strip())
+        if not m:
+            raise ValueError(f"Filtro inválido: {text}")
+        name, op, target = m.group(1).strip(), m.group(2), m.group(3).strip()
+        c = schema.col(name)
+        if c == -1:
+            raise ValueError(f"Columna desconocida: {name}")
+
+        if op == "=":
+            target = target.upper()
+            return lambda row: _cell(row, c).strip().upper() == target
+        if op == "~":
+            target = target.upper()
+            return lambda row: target in _cell(row, c).upper()
+
+        limit = parse_sheet_date(target)
+        if limit is None:
+            raise ValueError(f"Fecha inválida: {target}")
+        if op == ">=":
+            return lambda row: (d := parse_sheet_date(_cell(row, c))) is not None and d >= limit
+        return lambda row: (d := parse_sheet_date(_cell(row, c))) is not None and d <= limit
+
+    @property
+    def match(self):
+        # Row predicate, or None when there is nothing to filter
+        conditions = self.conditions
+        if not conditions:
+            return None
+        if len(conditions) == 1:
+            return conditions[0]
+        return lambda row: all(cond(row) for cond in conditions)
+
+    def sorted(self, items):
+        """Sorts (section, row_obj, row) items within each section; active rows come out first."""
+        sections = {"data": [], "history": []}
+        for item in items:
+            sections[item[0]].append(item)
+        for rows in sections.values():
+            # One stable pass per key, last key first; blanks moved last on every pass
+            for c, descending in reversed(self.sort_keys):
+                rows.sort(key=lambda item: value_key(_cell(item[2], c)), reverse=descending)
+                rows.sort(key=lambda item: not _cell(item[2], c).strip())
+        return sections["data"] + sections["history"]
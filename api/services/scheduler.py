@@ -0,0 +1,230 @@
+import asyncio
+import heapq
+import itertools
+import os
+import random
+import threading
+import time
+
+# --- Configuration ---
+# Google's default Sheets quotas are per minute, per user (the service account).
+READS_PER_MINUTE = int(os.environ.get("SHEETS_READS_PER_MINUTE", "60"))
+WRITES_PER_MINUTE = int(os.environ.get("SHEETS_WRITES_PER_MINUTE", "60"))
+BUCKET_BURST = int(os.environ.get("SHEETS_BUCKET_BURST", "10"))
+MAX_RETRIES = int(os.environ.get("SHEETS_MAX_RETRIES", "5"))
+BACKOFF_BASE_SECONDS = float(os.environ.get("SHEETS_BACKOFF_BASE", "1.0"))
+BACKOFF_MAX_SECONDS = float(os.environ.get("SHEETS_BACKOFF_MAX", "32.0"))
+
+READ = "read"
+WRITE = "write"
+
+# Priority lanes: lower runs first within the same bucket
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 10
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+# A write that got a 5xx may still have been applied (a repeated append
+# duplicates rows), so writes are only retried when rate limited
+WRITE_RETRYABLE_STATUS = {429}
+_POLL_SECONDS = 0.05
+
+
+class SheetsQuotaError(Exception):
+    """A Sheets call was still rate limited after every retry."""
+
+
+def error_status(exc):
+    # gspread.APIError carries .code, SheetsHTTPError carries .status_code
+    status = getattr(exc, "status_code", None) or getattr(exc, "code", None)
+    if isinstance(status, int):
+        return status
+    response = getattr(exc, "response", None)
+    return getattr(response, "status_code", None)
+
+
+def retry_after_seconds(exc):
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """Refills `rate_per_minute` tokens per minute up to `burst`; rate <= 0 is unlimited."""
+
+    def __init__(self, rate_per_minute, burst=BUCKET_BURST, clock=time.monotonic):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self._clock = clock
+        self._updated = clock()
+
+    def try_take(self):
+        """Take a token; returns 0 on success or the seconds until one is available."""
+        if self.rate <= 0:
+            return 0.0
+        now = self._clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class SheetsScheduler:
+    """
+    Central gate for every Sheets API call.
+    Calls wait for a token from the read or write bucket, in priority order,
+    and are retried with exponential backoff plus jitter when the API answers
+    429 (reads also on a transient 5xx). Works from threads (`run`) and from
+    the event loop (`run_async`).
+    """
+
+    def __init__(self, read_per_minute=READS_PER_MINUTE, write_per_minute=WRITES_PER_MINUTE,
+                 burst=BUCKET_BURST, max_retries=MAX_RETRIES, backoff_base=BACKOFF_BASE_SECONDS,
+                 backoff_max=BACKOFF_MAX_SECONDS, clock=time.monotonic, sleep=time.sleep,
+                 async_sleep=asyncio.sleep, rand=random.random):
+        self.buckets = {
+            READ: TokenBucket(read_per_minute, burst, clock),
+            WRITE: TokenBucket(write_per_minute, burst, clock),
+        }
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._clock = clock
+        self._sleep = sleep
+        self._async_sleep = async_sleep
+        self._rand = rand
+        self._cond = threading.Condition()
+        self._lanes = {READ: [], WRITE: []}  # heaps of (priority, seq) tickets
+        self._seq = itertools.count()
+        self._metrics = {kind: {
+            "calls": 0, "maxQueueDepth": 0, "totalWait": 0.0, "maxWait": 0.0,
+            "throttled": 0, "retries": 0, "failures": 0
+        } for kind in (READ, WRITE)}
+
+    # --- Token acquisition ---
+
+    def _enqueue(self, kind, priority):
+        ticket = (priority, next(self._seq))
+        with self._cond:
+            lane = self._lanes[kind]
+            heapq.heappush(lane, ticket)
+            m = self._metrics[kind]
+            m["maxQueueDepth"] = max(m["maxQueueDepth"], len(lane))
+        return ticket
+
+    def _try_acquire(self, kind, ticket):
+        # Caller holds self._cond. Only the head of the lane may take a token.
+        lane = self._lanes[kind]
+        if lane[0] != ticket:
+            return None
+        wait = self.buckets[kind].try_take()
+        if wait == 0:
+            heapq.heappop(lane)
+            self._cond.notify_all()
+        return wait
+
+    def _record_wait(self, kind, started):
+        waited = self._clock() - started
+        with self._cond:
+            m = self._metrics[kind]
+            m["calls"] += 1
+            m["totalWait"] += waited
+            m["maxWait"] = max(m["maxWait"], waited)
+
+    def acquire(self, kind, priority=PRIORITY_INTERACTIVE):
+        started = self._clock()
+        ticket = self._enqueue(kind, priority)
+        with self._cond:
+            while True:
+                wait = self._try_acquire(kind, ticket)
+                if wait == 0:
+                    break
+                self._cond.wait(timeout=wait if wait is not None else _POLL_SECONDS)
+        self._record_wait(kind, started)
+
+    async def acquire_async(self, kind, priority=PRIORITY_INTERACTIVE):
+        started = self._clock()
+        ticket = self._enqueue(kind, priority)
+        while True:
+            with self._cond:
+                wait = self._try_acquire(kind, ticket)
+            if wait == 0:
+                break
+            await self._async_sleep(min(wait, _POLL_SECONDS) if wait is not None else _POLL_SECONDS)
+        self._record_wait(kind, started)
+
+    # --- Retry policy ---
+
+    def _backoff(self, attempt, exc):
+        delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        delay += self._rand() * self.backoff_base
+        retry_after = retry_after_seconds(exc)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+    def _should_retry(self, kind, attempt, exc):
+        status = error_status(exc)
+        if status not in (WRITE_RETRYABLE_STATUS if kind == WRITE else RETRYABLE_STATUS):
+            return False
+        with self._cond:
+            m = self._metrics[kind]
+            if status == 429:
+                m["throttled"] += 1
+            if attempt >= self.max_retries:
+                m["failures"] += 1
+                return False
+            m["retries"] += 1
+        return True
+
+    def _give_up(self, exc):
+        if error_status(exc) == 429:
+            raise SheetsQuotaError(f"Cuota de Google Sheets excedida tras {self.max_retries} reintentos: {exc}") from exc
+        raise exc
+
+    def run(self, kind, fn, *args, priority=PRIORITY_INTERACTIVE, **kwargs):
+        attempt = 0
+        while True:
+            self.acquire(kind, priority)
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                if not self._should_retry(kind, attempt, e):
+                    if error_status(e) in RETRYABLE_STATUS:
+                        self._give_up(e)
+                    raise
+                self._sleep(self._backoff(attempt, e))
+                attempt += 1
+
+    async def run_async(self, kind, fn, *args, priority=PRIORITY_INTERACTIVE, **kwargs):
+        attempt = 0
+        while True:
+            await self.acquire_async(kind, priority)
+            try:
+                return await fn(*args, **kwargs)
+            except Exception as e:
+                if not self._should_retry(kind, attempt, e):
+                    if error_status(e) in RETRYABLE_STATUS:
+                        self._give_up(e)
+                    raise
+                await self._async_sleep(self._backoff(attempt, e))
+                attempt += 1
+
+    def stats(self):
+        with self._cond:
+            out = {}
+            for kind, m in self._metrics.items():
+                out[kind] = {
+                    **m,
+                    "queueDepth": len(self._lanes[kind]),
+                    "avgWait": round(m["totalWait"] / m["calls"], 4) if m["calls"] else 0.0,
+                    "totalWait": round(m["totalWait"], 4),
+                    "maxWait": round(m["maxWait"], 4),
+                    "ratePerMinute": round(self.buckets[kind].rate * 60, 2)
+                }
+            return out
@@ -0,0 +1,182 @@
+import re
+import threading
+
+# Column layout of a worksheet: where the header row is and which column
+# answers to each name, including the alias table used by the Apps Script
+# internalBatchUpdateTasks (FECHA / ALTA / FECHA INICIO, CONCEPTO / DESCRIPCION, ...).
+
+HEADER_SCAN_ROWS = 100 # Header rows always sit within the first 100 rows
+
+HEADER_ALIASES = {
+    'FECHA': ['FECHA', 'FECHAS', 'FECHA ALTA', 'FECHA INICIO', 'ALTA', 'FECHA DE INICIO', 'FECHA VISITA', 'FECHA DE ALTA', 'F_INICIO'],
+    'CONCEPTO': ['CONCEPTO', 'DESCRIPCION', 'DESCRIPCIÓN DE LA ACTIVIDAD', 'DESCRIPCIÓN', 'ACTIVIDAD'],
+    'RESPONSABLE': ['RESPONSABLE', 'RESPONSABLES', 'INVOLUCRADOS', 'VENDEDOR', 'ENCARGADO', 'ASIGNADO'],
+    'RELOJ': ['RELOJ', 'HORAS', 'DIAS', 'DÍAS'],
+    'ESTATUS': ['ESTATUS', 'STATUS'],
+    'CUMPLIMIENTO': ['CUMPLIMIENTO', 'CUMPL.', 'CUMP'],
+    'AVANCE': ['AVANCE', 'AVANCE %', '% AVANCE'],
+    'ALTA': ['AREA', 'DEPARTAMENTO', 'ESPECIALIDAD', 'ALTA'],
+    'FECHA_RESPUESTA': ['FECHA RESPUESTA', 'FECHA FIN', 'FECHA ESTIMADA DE FIN', 'FECHA ESTIMADA', 'FECHA DE ENTREGA', 'FECHA_FIN', 'DEADLINE'],
+    'PRIORIDAD': ['PRIORIDAD', 'PRIORIDADES'],
+    'RIESGOS': ['RIESGO', 'RIESGOS'],
+    'ARCHIVO': ['ARCHIVO', 'ARCHIVOS', 'CLIP', 'LINK', 'URL', 'EVIDENCIA', 'DOCUMENTO', 'FOTO', 'VIDEO'],
+    'CLASIFICACION': ['CLASIFICACION', 'CLASI'],
+    'COMENTARIOS': ['COMENTARIOS', 'COMENTARIO', 'COMENTARIOS SEMANA EN CURSO', 'OBSERVACIONES', 'NOTAS', 'DETALLES'],
+    'PREVIOS': ['COMENTARIOS PREVIOS', 'PREVIOS', 'COMENTARIOS SEMANA PREVIA'],
+    'FECHA_TERMINO': ['FECHA TERMINO', 'FECHA REAL', 'TERMINO', 'REALIZADO']
+}
+
+# alias -> the alias groups it belongs to, in table order (ALTA is in two)
+_GROUPS_BY_ALIAS = {}
+for _group in HEADER_ALIASES.values():
+    for _alias in _group:
+        _GROUPS_BY_ALIAS.setdefault(_alias, []).append(_group)
+
+_SPACES_RE = re.compile(r"\s+")
+
+
+def normalize_header(value):
+    return _SPACES_RE.sub(" ", str(value).upper().replace("\n", " ")).strip()
+
+
+def find_header_row(values):
+    limit = min(HEADER_SCAN_ROWS, len(values))
+    for i in range(limit):
+        # Join columns with |, normalize spaces, uppercase
+        row_str = "|".join([str(c).upper().replace("\n", " ").strip() for c in values[i]])
+
+        if "ID_SITIO" in row_str or "ID_PROYECTO" in row_str:
+            return i
+
+        has_folio = "FOLIO" in row_str
+        has_concepto = "CONCEPTO" in row_str
+        has_date_status = any(x in row_str for x in ["ALTA", "AVANCE", "STATUS", "FECHA"])
+
+        if has_folio and has_concepto and has_date_status:
+            return i
+
+        if "ID" in row_str and "RESPONSABLE" in row_str:
+            return i
+
+        if (("FOLIO" in row_str or "ID" in row_str) and
+            ("DESCRIPCI" in row_str or "RESPONSABLE" in row_str or "CONCEPTO" in row_str)):
+            return i
+
+        if "CLIENTE" in row_str and ("VENDEDOR" in row_str or "AREA" in row_str or "CLASIFICACION" in row_str):
+            return i
+
+        # Extra checks from original code
+        if "ID" in row_str and "TITULO" in row_str and "USUARIO" in row_str: return i
+        if "ID" in row_str and "HABITO" in row_str and "USUARIO" in row_str: return i
+
+    return -1
+
+
+class SheetSchema:
+    """
+    Header row index, normalized headers and the resolved column for every
+    header name and alias. header_row is -1 when no known header row was
+    found; headers then come from the first row, like plain tables (USERS).
+    """
+
+    def __init__(self, header_row, header_values, version=None):
+        self.header_row = header_row
+        self.version = version
+        self.raw_headers = [str(h).strip() for h in header_values]
+        self.headers = [normalize_header(h) for h in header_values]
+        self.width = len(self.headers)
+        # Exact names first (a repeated header resolves to its last column, like colMap)
+        columns = {h: i for i, h in enumerate(self.headers) if h}
+        resolved = dict(columns)
+        for alias, groups in _GROUPS_BY_ALIAS.items():
+            if alias in resolved:
+                continue
+            for group in groups:
+                match = next((columns[a] for a in group if a in columns), None)
+                if match is not None:
+                    resolved[alias] = match
+                    break
+        self.columns = columns
+        self._resolved = resolved
+        folio = self.col("FOLIO")
+        self.folio_col = folio if folio > -1 else self.col("ID")
+
+    @classmethod
+    def from_values(cls, values, version=None):
+        values = values or []
+        header_row = find_header_row(values)
+        header_values = values[header_row if header_row != -1 else 0] if values else []
+        return cls(header_row, header_values, version)
+
+    @property
+    def found(self):
+        return self.header_row != -1
+
+    @property
+    def data_start(self):
+        """0-based index of the first row below the headers."""
+        return self.header_row + 1 if self.found else 1
+
+    def col(self, key):
+        """Column index for a header name or any of its aliases; -1 if the sheet has none."""
+        return self._resolved.get(normalize_header(key), -1)
+
+    def cols(self, keys):
+        # Indices of the keys that resolve, in request order
+        return [c for c in (self.col(k) for k in keys) if c > -1]
+
+    def build_row(self, record):
+        """A new row for `record` laid out on this sheet's columns (as the Apps Script appends it)."""
+        row = [""] * self.width
+        for key, value in record.items():
+            if str(key).startswith("_"):
+                continue
+            c = self.col(key)
+            if c > -1:
+                row[c] = "" if value is None else str(value)
+        folio = record.get("FOLIO") or record.get("ID")
+        if self.folio_col > -1 and not row[self.folio_col] and folio:
+            row[self.folio_col] = str(folio)
+        status = self.col("ESTATUS")
+        if status > -1 and not row[status]:
+            row[status] = "ASIGNADO"
+        return row
+
+
+class SchemaRegistry:
+    """Last schema seen per sheet; reused while the sheet version is unchanged."""
+
+    def __init__(self):
+        self._schemas = {}
+        self._lock = threading.Lock()
+        self.builds = 0
+        self.reuses = 0
+
+    def get(self, sheet_name, version):
+        if version is None:
+            return None
+        with self._lock:
+            schema = self._schemas.get(sheet_name)
+            if schema is None or schema.version != version:
+                return None
+            self.reuses += 1
+            return schema
+
+    def build(self, sheet_name, values, version):
+        schema = SheetSchema.from_values(values, version)
+        with self._lock:
+            if version is not None:
+                self._schemas[sheet_name] = schema
+            self.builds += 1
+        return schema
+
+    def invalidate(self, sheet_name=None):
+        with self._lock:
+            if sheet_name is None:
+                self._schemas.clear()
+            else:
+                self._schemas.pop(sheet_name, None)
+
+    def stats(self):
+        with self._lock:
+            return {"size": len(self._schemas), "builds": self.builds, "reuses": self.reuses}
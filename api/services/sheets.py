@@ -1,6 +1,16 @@
 import os
+import threading
+import time
 import gspread
 from google.oauth2.service_account import Credentials
+from gspread.utils import fill_gaps
+from gspread.urls import DRIVE_FILES_API_V3_URL
+from api.services.cache import SheetCache, ROW_COUNT
+from api.services.ranges import sheet_range, split_range, slice_values, rows_range, column_range, parse_a1, cell_updates
+from api.services.scheduler import SheetsScheduler, READ, WRITE, PRIORITY_INTERACTIVE
+from api.services.schema import SheetSchema, SchemaRegistry, find_header_row, HEADER_SCAN_ROWS
+from api.services.simulator import SheetsSimulator, make_api_error, count_cells, MOCK_PROFILE, DRIVE
+from api.services.storage import SQLiteBackend, BackendSpreadsheet, ReplicaSpreadsheet, SQLITE_PATH
 
 # --- Configuration ---
 SCOPES = [
@@ -8,7 +18,12 @@ SCOPES = [
     "https://www.googleapis.com/auth/drive"
 ]
 CREDENTIALS_FILE = "credentials.json"
-SPREADSHEET_ID = None # Can be set via env var or config. If None, mock gspread will look for "Holtmont Workspace" by name or create a mock.
+SPREADSHEET_ID = os.environ.get("SPREADSHEET_ID") # Opened by key; without it we fall back to a by-name Drive lookup
+CACHE_TTL_SECONDS = float(os.environ.get("SHEETS_CACHE_TTL", "15")) # 0 disables the read cache
+CACHE_MAX_SHEETS = int(os.environ.get("SHEETS_CACHE_MAX_SHEETS", "128"))
+REGISTRY_REFRESH_SECONDS = 30 # Min interval between tab-list reloads triggered by unknown sheet names
+VERSION_CHECK_SECONDS = float(os.environ.get("SHEETS_VERSION_CHECK_SECONDS", "5")) # Reuse one Drive version lookup for this long
+STORAGE_BACKEND = os.environ.get("STORAGE_BACKEND", "sheets").lower() # sheets | sqlite | replica
 
 # --- Constants ---
 INITIAL_DIRECTORY = [
@@ -82,109 +97,662 @@ ALL_DEPTS = {
 }
 
 class MockSheet:
-    def __init__(self, name, data):
+    def __init__(self, name, data, spreadsheet=None):
         self.title = name
         self._data = data
+        self._spreadsheet = spreadsheet
+
+    def _call(self, kind, op, cells=0):
+        if self._spreadsheet is not None:
+            self._spreadsheet._call(kind, op, cells)
 
     def get_all_values(self):
+        self._call(READ, "get_all_values", count_cells(self._data))
         return self._data
 
     def append_row(self, values):
+        self._call(WRITE, "append_row", len(values))
         self._data.append(values)
+        self._bump()
         return {'updates': {'updatedRows': 1}}
 
+    def append_rows(self, values):
+        self._call(WRITE, "append_rows", count_cells(values))
+        self._data.extend(values)
+        self._bump()
+        return {'updates': {'updatedRows': len(values)}}
+
+    def insert_rows(self, values, row=1, **kwargs):
+        self._call(WRITE, "insert_rows", count_cells(values))
+        self._data[row - 1:row - 1] = values
+        self._bump()
+        return {'updates': {'updatedRows': len(values)}}
+
+    def batch_update(self, data, **kwargs):
+        self._call(WRITE, "batch_update", sum(count_cells(d["values"]) for d in data))
+        for d in data:
+            row_start, col_start, _, _ = parse_a1(d["range"])
+            for offset, new_cells in enumerate(d["values"]):
+                r = (row_start or 1) - 1 + offset
+                while len(self._data) <= r:
+                    self._data.append([])
+                row = self._data[r]
+                c0 = (col_start or 1) - 1
+                if len(row) < c0 + len(new_cells):
+                    row.extend([""] * (c0 + len(new_cells) - len(row)))
+                row[c0:c0 + len(new_cells)] = new_cells
+        self._bump()
+        return {"totalUpdatedCells": sum(count_cells(d["values"]) for d in data)}
+
+    def _bump(self):
+        if self._spreadsheet is not None:
+            self._spreadsheet.bump_revision(self.title)
+
 class MockSpreadsheet:
-    def __init__(self):
+    def __init__(self, simulator=None):
         self.sheets = {
+            # Demo logins: admin2025, tonita2025, ppc2025, workorder2026 (low-cost hashes)
             "USERS": [
                 ["USERNAME", "PASSWORD", "ROLE", "LABEL"],
-                ["LUIS_CARLOS", "admin2025", "ADMIN", "Administrador"],
-                ["ANTONIA_VENTAS", "tonita2025", "TONITA", "Ventas"],
-                ["JESUS_CANTU", "ppc2025", "PPC_ADMIN", "PPC Manager"]
+                ["LUIS_CARLOS", "pbkdf2_sha256$1000$VpbCLY2DCsyFSgbiU4vlTQ$uDmOyNIn0sqOtSfwsFpHaacQWJGv7wk02o+DZaxt94w", "ADMIN", "Administrador"],
+                ["ANTONIA_VENTAS", "pbkdf2_sha256$1000$nvQmhVuC0IoIgPUEyYbjFg$gUCHVCuJvJWhduWb0SgD7NKvt1GWRYgoQiIUdJjbD2M", "TONITA", "Ventas"],
+                ["JESUS_CANTU", "pbkdf2_sha256$1000$3h2v/Ys3G8FhOIZb7GWiuA$U86M+isEs9wr+RVLCwyjc2nT7R4jC2KUcV4bI2zQX6c", "PPC_ADMIN", "PPC Manager"],
+                ["PREWORK_ORDER", "pbkdf2_sha256$1000$Ce0myRmznSTUY+DD6eRPGw$wWhpx+bDM1ethZNDswV8X6pT5TfSTzN7M8xIoy4wjok", "WORKORDER_USER", "Workorder"]
             ],
             "ANTONIA_VENTAS": [
                 ["FOLIO", "CLIENTE", "CONCEPTO", "FECHA", "ESTATUS", "AVANCE"],
                 ["1001", "CLIENTE A", "TEST TASK", "01/01/25", "PENDIENTE", "0%"]
             ]
         }
+        self._faults = []  # statuses to raise on the next calls, in order
+        self.simulator = simulator  # optional SheetsSimulator: latency, quotas, payload cost
+        self.revisions = {}  # sheet name -> revision counter, stand-in for Drive's file version
+
+    def inject_errors(self, count=1, status=429):
+        # Make the next `count` API calls fail like Google does (e.g. quota exceeded)
+        self._faults.extend([status] * count)
+
+    def _call(self, kind, op, cells=0):
+        if self._faults:
+            status = self._faults.pop(0)
+            raise make_api_error(status, "Quota exceeded (mock)" if status == 429 else "Mock failure")
+        if self.simulator is not None:
+            self.simulator.charge(kind, op, cells)
+
+    def bump_revision(self, name):
+        # Called by every mock write; call it directly to simulate an edit made in the Sheets UI
+        self.revisions[name] = self.revisions.get(name, 0) + 1
+
+    def sheet_version(self, name):
+        # A Drive metadata call: costs latency but never fails with injected Sheets faults
+        if self.simulator is not None:
+            self.simulator.charge(DRIVE, "sheet_version")
+        return self.revisions.get(name, 0) if name in self.sheets else None
 
     def worksheet(self, name):
+        self._call(READ, "worksheet")
         if name in self.sheets:
-            return MockSheet(name, self.sheets[name])
+            return MockSheet(name, self.sheets[name], self)
         raise gspread.WorksheetNotFound(name)
 
+    def worksheets(self):
+        self._call(READ, "worksheets")
+        return [MockSheet(name, data, self) for name, data in self.sheets.items()]
+
     def add_worksheet(self, title, rows=100, cols=20):
+        self._call(WRITE, "add_worksheet")
         self.sheets[title] = []
-        return MockSheet(title, self.sheets[title])
+        self.bump_revision(title)
+        return MockSheet(title, self.sheets[title], self)
+
+    def values_batch_get(self, ranges, params=None):
+        value_ranges = []
+        for range_str in ranges:
+            name, a1 = split_range(range_str)
+            if name not in self.sheets:
+                self._call(READ, "values_batch_get")
+                raise gspread.WorksheetNotFound(name)
+            value_range = {"range": range_str, "majorDimension": "ROWS"}
+            values = slice_values(self.sheets[name], a1)
+            if values:
+                value_range["values"] = values
+            value_ranges.append(value_range)
+        self._call(READ, "values_batch_get", sum(count_cells(vr.get("values", [])) for vr in value_ranges))
+        return {"valueRanges": value_ranges}
 
 class GSheetsManager:
-    def __init__(self):
+    """
+    The connection is opened on first use (any access to ss, scheduler, creds or
+    the storage mode), not at import, so a serverless cold start only pays for
+    it when a request actually needs Sheets.
+    """
+
+    def __init__(self, lazy=True):
         self.client = None
-        self.ss = None
-        self.is_mock = False
-        self.connect()
+        self._creds = None
+        self._ss = None
+        self._is_mock = False
+        self._storage_mode = "sheets"  # sheets | mock | sqlite | replica
+        self._scheduler = None
+        self.cache = SheetCache(ttl=CACHE_TTL_SECONDS, max_entries=CACHE_MAX_SHEETS)
+        self.schemas = SchemaRegistry()
+        self._worksheets = None  # title -> worksheet handle, resolved in one metadata call
+        self._worksheets_loaded_at = 0.0
+        self._registry_lock = threading.Lock()
+        self._connect_lock = threading.RLock()
+        self.connected = False
+        self.connect_seconds = None
+        self.file_version = (0.0, None)  # (checked_at, Drive version) of the real spreadsheet
+        if not lazy:
+            self.connect()
+
+    def ensure_connected(self):
+        if not self.connected:
+            with self._connect_lock:
+                if not self.connected:
+                    self.connect()
+
+    @property
+    def ss(self):
+        self.ensure_connected()
+        return self._ss
+
+    @ss.setter
+    def ss(self, spreadsheet):
+        self.ensure_connected()
+        self._use_spreadsheet(spreadsheet)
+
+    def _use_spreadsheet(self, spreadsheet):
+        # Handles and cached values belong to the previous spreadsheet.
+        self._ss = spreadsheet
+        self._worksheets = None
+        self.file_version = (0.0, None)
+        self.cache.invalidate()
+        self.schemas.invalidate()
+
+    @property
+    def scheduler(self):
+        self.ensure_connected()
+        return self._scheduler
+
+    @scheduler.setter
+    def scheduler(self, scheduler):
+        self.ensure_connected()
+        self._scheduler = scheduler
+
+    @property
+    def creds(self):
+        self.ensure_connected()
+        return self._creds
+
+    @property
+    def is_mock(self):
+        self.ensure_connected()
+        return self._is_mock
+
+    @property
+    def storage_mode(self):
+        self.ensure_connected()
+        return self._storage_mode
+
+    @property
+    def is_local(self):
+        # Reads never leave the process (mock, SQLite or a local replica)
+        return self.storage_mode != "sheets"
 
     def connect(self):
+        with self._connect_lock:
+            started = time.perf_counter()
+            if STORAGE_BACKEND == "sqlite":
+                self.connect_sqlite(SQLITE_PATH)
+            else:
+                self._connect_sheets()
+            self.connected = True
+            self.connect_seconds = time.perf_counter() - started
+
+    def _open_spreadsheet(self):
+        if SPREADSHEET_ID:
+            # One files.get by key; no Drive search
+            return self.client.open_by_key(SPREADSHEET_ID)
+        print("SPREADSHEET_ID not set; looking up 'Holtmont Workspace' by name (slower).")
+        return self.client.open("Holtmont Workspace")
+
+    def _use_mock(self):
+        self._is_mock = True
+        self._use_spreadsheet(MockSpreadsheet(simulator=SheetsSimulator.from_profile(MOCK_PROFILE)))
+
+    def _connect_sheets(self):
+        self._is_mock = False
         if os.path.exists(CREDENTIALS_FILE):
             try:
                 creds = Credentials.from_service_account_file(CREDENTIALS_FILE, scopes=SCOPES)
                 self.client = gspread.authorize(creds)
-                # Try to open spreadsheet. Usually by name or ID.
-                # For this task, we assume there is one main spreadsheet.
-                # We'll try to find one named "Holtmont Workspace" or similar, or just pick the first one if possible (not possible with gspread without listing).
-                # We will rely on SPREADSHEET_ID env var or a default name.
+                self._creds = creds
                 try:
-                    self.ss = self.client.open("Holtmont Workspace") # Default name assumption
+                    self._use_spreadsheet(self._open_spreadsheet())
                 except gspread.SpreadsheetNotFound:
-                    # Fallback: Create one? Or just use mock if not found?
-                    print("Spreadsheet 'Holtmont Workspace' not found. Using Mock.")
-                    self.is_mock = True
-                    self.ss = MockSpreadsheet()
+                    print(f"Spreadsheet {SPREADSHEET_ID or 'Holtmont Workspace'} not found. Using Mock.")
+                    self._use_mock()
             except Exception as e:
                 print(f"Error connecting to GSheets: {e}. Using Mock.")
-                self.is_mock = True
-                self.ss = MockSpreadsheet()
+                self._use_mock()
         else:
             print("credentials.json not found. Using Mock mode.")
-            self.is_mock = True
-            self.ss = MockSpreadsheet()
+            self._use_mock()
+
+        # Quotas only bind against Google (or a simulated mock); a plain mock still gets retries, lanes and metrics
+        if not self._is_mock or self._ss.simulator is not None:
+            self._scheduler = SheetsScheduler()
+        else:
+            self._scheduler = SheetsScheduler(read_per_minute=0, write_per_minute=0)
+        self._storage_mode = "mock" if self._is_mock else "sheets"
 
-    def get_sheet_values(self, sheet_name):
+        if STORAGE_BACKEND == "replica" and not self._is_mock:
+            # Google stays the source of truth; the replica's own scheduler meters the remote calls
+            # Google only versions the whole file, so any edit makes the replica re-pull the tabs it reads
+            remote_id = self._ss.id
+            self._use_spreadsheet(ReplicaSpreadsheet(
+                self._ss, SQLiteBackend(SQLITE_PATH), scheduler=self._scheduler,
+                remote_version=lambda name: self.fetch_file_version(remote_id)
+            ))
+            self._scheduler = SheetsScheduler(read_per_minute=0, write_per_minute=0)
+            self._storage_mode = "replica"
+
+    def connect_sqlite(self, path):
+        with self._connect_lock:
+            backend = SQLiteBackend(path)
+            if not backend.list_sheets():
+                # Fresh database: start from the same seed data as the mock
+                for name, rows in MockSpreadsheet().sheets.items():
+                    backend.replace_values(name, rows)
+            self._is_mock = False
+            self._use_spreadsheet(BackendSpreadsheet(backend))
+            self._scheduler = SheetsScheduler(read_per_minute=0, write_per_minute=0)
+            self._storage_mode = "sqlite"
+            self.connected = True
+
+    # --- Worksheet registry ---
+
+    def _load_worksheets(self):
+        # One spreadsheet metadata call resolves every tab handle.
+        registry = {ws.title: ws for ws in self.scheduler.run(READ, self.ss.worksheets)}
+        self._worksheets = registry
+        self._worksheets_loaded_at = time.monotonic()
+        return registry
+
+    def get_worksheet(self, sheet_name):
+        with self._registry_lock:
+            registry = self._worksheets
+            if registry is None:
+                registry = self._load_worksheets()
+            ws = registry.get(sheet_name)
+            if ws is None and time.monotonic() - self._worksheets_loaded_at >= REGISTRY_REFRESH_SECONDS:
+                # The tab may have been created from the Sheets UI since the last load.
+                ws = self._load_worksheets().get(sheet_name)
+        if ws is None:
+            raise gspread.WorksheetNotFound(sheet_name)
+        return ws
+
+    def list_sheets(self):
+        with self._registry_lock:
+            registry = self._worksheets if self._worksheets is not None else self._load_worksheets()
+            return list(registry)
+
+    def forget_worksheet(self, sheet_name):
+        # A handle went stale (tab renamed or deleted): reload on next lookup.
+        with self._registry_lock:
+            self._worksheets = None
+        self.cache.invalidate(sheet_name)
+        self.schemas.invalidate(sheet_name)
+
+    def _get_or_create_worksheet(self, sheet_name):
+        try:
+            return self.get_worksheet(sheet_name)
+        except gspread.WorksheetNotFound:
+            pass
+        ws = self.scheduler.run(WRITE, self.ss.add_worksheet, title=sheet_name, rows=1000, cols=26)
+        with self._registry_lock:
+            if self._worksheets is not None:
+                self._worksheets[ws.title] = ws
+        return ws
+
+    # --- Change tracking ---
+
+    def get_version(self, sheet_name):
+        """
+        Cheap change token for a tab, checked before re-downloading it.
+        Mock and local backends count revisions per tab; Google only versions
+        the whole file (Drive `version`), so there any edit to any tab counts.
+        None when the check fails, which forces a download.
+        """
+        sheet_version = getattr(self.ss, "sheet_version", None)
+        if sheet_version is not None:
+            try:
+                return sheet_version(sheet_name)
+            except Exception as e:
+                print(f"Error checking version of {sheet_name}: {e}")
+                return None
+
+        checked_at, version = self.file_version
+        if version is not None and time.monotonic() - checked_at < VERSION_CHECK_SECONDS:
+            return version
+        return self.fetch_file_version(self.ss.id)
+
+    def fetch_file_version(self, file_id):
+        """Drive `version` of the spreadsheet file, always looked up (None on failure)."""
         try:
-            if self.is_mock:
-                return self.ss.worksheet(sheet_name).get_all_values()
+            # Drive metadata has its own quota, so this stays outside the Sheets scheduler
+            response = self.client.http_client.request(
+                "get", f"{DRIVE_FILES_API_V3_URL}/{file_id}",
+                params={"fields": "version,modifiedTime", "supportsAllDrives": True}
+            )
+            meta = response.json()
+        except Exception as e:
+            print(f"Error checking spreadsheet version: {e}")
+            return None
+        return self.record_file_version(meta)
+
+    def record_file_version(self, meta):
+        version = meta.get("version") or meta.get("modifiedTime")
+        self.file_version = (time.monotonic(), version)
+        return version
+
+    def _versions_to_check(self, sheet_names, ranges=None):
+        # Whole-sheet reads that the cache cannot answer on its own
+        ranges = dict(zip(sheet_names, ranges)) if isinstance(ranges, (list, tuple)) else (ranges or {})
+        return [name for name in dict.fromkeys(sheet_names) if not ranges.get(name) and self.cache.peek(name) is None]
+
+    def get_sheet_values(self, sheet_name, priority=PRIORITY_INTERACTIVE):
+        cached = self.cache.get(sheet_name)
+        if cached is not None:
+            return cached
+
+        # Taken before the download, so an edit racing with it is never hidden
+        version = self.get_version(sheet_name) if self.cache.enabled else None
+        unchanged = self.cache.revalidate(sheet_name, version)
+        if unchanged is not None:
+            return unchanged
 
-            sheet = self.ss.worksheet(sheet_name)
-            return sheet.get_all_values()
+        try:
+            ws = self.get_worksheet(sheet_name)
+            values = self.scheduler.run(READ, ws.get_all_values, priority=priority)
+        except gspread.WorksheetNotFound:
+            return None
+        except gspread.exceptions.APIError as e:
+            if "Unable to parse range" in str(e):
+                self.forget_worksheet(sheet_name)
+            return None
         except Exception as e:
             # print(f"Error fetching sheet {sheet_name}: {e}")
             return None
 
-    def append_row(self, sheet_name, values):
+        # Copy so later appends can patch the cached rows without touching
+        # the worksheet's own list (the mock hands out its live storage).
+        values = list(values)
+        self.cache.put(sheet_name, values, version=version)
+        return values
+
+    def _has_worksheet(self, sheet_name):
         try:
-            if self.is_mock:
-                try:
-                    sheet = self.ss.worksheet(sheet_name)
-                except gspread.WorksheetNotFound:
-                    self.ss.sheets[sheet_name] = []
-                    sheet = self.ss.worksheet(sheet_name)
-                return sheet.append_row(values)
+            self.get_worksheet(sheet_name)
+            return True
+        except Exception:
+            return False
 
-            # Real implementation
-            try:
-                sheet = self.ss.worksheet(sheet_name)
-            except gspread.WorksheetNotFound:
-                sheet = self.ss.add_worksheet(title=sheet_name, rows=1000, cols=26)
+    def _plan_batch(self, sheet_names, ranges, is_known, versions=None):
+        # Split a batch request into cache hits and the (name, a1) pairs to fetch.
+        if isinstance(ranges, (list, tuple)):
+            ranges = dict(zip(sheet_names, ranges))
+        ranges = ranges or {}
 
-            return sheet.append_row(values)
+        results = {}
+        to_fetch = []
+        for name in sheet_names:
+            if name in results:
+                continue
+            results[name] = None
+            a1 = ranges.get(name)
+            if not a1:
+                cached = self.cache.get(name)
+                if cached is None and versions:
+                    cached = self.cache.revalidate(name, versions.get(name))
+                if cached is not None:
+                    results[name] = cached
+                    continue
+            # batchGet fails as a whole on an unknown tab, so only ask for registered ones
+            if is_known(name):
+                to_fetch.append((name, a1))
+        return results, to_fetch
+
+    def _store_batch(self, to_fetch, value_ranges, results, versions=None):
+        for (name, a1), value_range in zip(to_fetch, value_ranges):
+            values = value_range.get("values", [])
+            if not a1:
+                # Same rectangular shape get_all_values() returns
+                values = fill_gaps(values) if values else []
+                self.cache.put(name, values, version=(versions or {}).get(name))
+            results[name] = values
+        return results
+
+    def get_many(self, sheet_names, ranges=None, priority=PRIORITY_INTERACTIVE):
+        """
+        Fetch several tabs with one values.batchGet call.
+        `ranges` is an optional A1 range per sheet, as a dict keyed by sheet
+        name or a list aligned with `sheet_names`. Whole-sheet reads are
+        served from and stored into the per-sheet cache; ranged reads are not.
+        Returns {sheet_name: values}, with None for tabs that do not exist.
+        """
+        versions = {name: self.get_version(name) for name in self._versions_to_check(sheet_names, ranges)} if self.cache.enabled else {}
+        results, to_fetch = self._plan_batch(sheet_names, ranges, self._has_worksheet, versions)
+        if not to_fetch:
+            return results
+
+        try:
+            batch_ranges = [sheet_range(name, a1) for name, a1 in to_fetch]
+            response = self.scheduler.run(READ, self.ss.values_batch_get, batch_ranges, priority=priority)
+            value_ranges = response.get("valueRanges", [])
+        except Exception as e:
+            print(f"Error in batch fetch of {len(to_fetch)} sheets: {e}. Falling back to single reads.")
+            for name, a1 in to_fetch:
+                if not a1:
+                    results[name] = self.get_sheet_values(name, priority=priority)
+            return results
+
+        return self._store_batch(to_fetch, value_ranges, results, versions)
+
+    # --- Range-limited reads ---
+
+    def get_ranges(self, sheet_name, ranges, priority=PRIORITY_INTERACTIVE):
+        """
+        Several A1 ranges of one tab in a single batchGet, as a list aligned
+        with `ranges`. Served from the cached whole sheet when there is one,
+        otherwise each range is cached on its own until the sheet changes.
+        Returns None if the tab does not exist or the read fails.
+        """
+        full = self.cache.get(sheet_name)
+        if full is not None:
+            return [slice_values(full, a1) for a1 in ranges]
+        results = [self.cache.get((sheet_name, a1)) for a1 in ranges]
+        missing = [a1 for a1, values in zip(ranges, results) if values is None]
+        if not missing:
+            return results
+
+        try:
+            self.get_worksheet(sheet_name)
+            batch_ranges = [sheet_range(sheet_name, a1) for a1 in missing]
+            response = self.scheduler.run(READ, self.ss.values_batch_get, batch_ranges, priority=priority)
+        except gspread.WorksheetNotFound:
+            return None
+        except Exception as e:
+            print(f"Error reading {missing} from {sheet_name}: {e}")
+            return None
+        return self._store_ranges(sheet_name, ranges, results, missing, response.get("valueRanges", []))
+
+    def _store_ranges(self, sheet_name, ranges, results, missing, value_ranges):
+        fetched = {a1: vr.get("values", []) for a1, vr in zip(missing, value_ranges)}
+        for a1, values in fetched.items():
+            self.cache.put((sheet_name, a1), values)
+        return [fetched.get(a1, []) if values is None else values for a1, values in zip(ranges, results)]
+
+    def _col_count(self, sheet_name):
+        # Grid width from the registry's metadata; local worksheets have none
+        try:
+            return getattr(self.get_worksheet(sheet_name), "col_count", None)
+        except gspread.WorksheetNotFound:
+            return None
+
+    def get_row_count(self, sheet_name, priority=PRIORITY_INTERACTIVE):
+        """Rows down to the last filled cell of column A; cached, and bumped by our own appends."""
+        full = self.cache.get(sheet_name)
+        if full is not None:
+            return len(full)
+        count = self.cache.get((sheet_name, ROW_COUNT))
+        if count is not None:
+            return count
+        column = self.get_ranges(sheet_name, ["A:A"], priority=priority)
+        if column is None:
+            return None
+        self.cache.put((sheet_name, ROW_COUNT), len(column[0]))
+        return len(column[0])
+
+    def get_head(self, sheet_name, n=HEADER_SCAN_ROWS, priority=PRIORITY_INTERACTIVE):
+        values = self.get_ranges(sheet_name, [f"1:{n}"], priority=priority)
+        return values[0] if values is not None else None
+
+    def get_tail(self, sheet_name, n, min_row=1, priority=PRIORITY_INTERACTIVE):
+        """
+        The last `n` rows at or below `min_row`, as (first_row_number, rows).
+        The range is open-ended, so rows past the cached count are not missed.
+        """
+        count = self.get_row_count(sheet_name, priority=priority)
+        if count is None:
+            return None
+        start = max(min_row, count - n + 1)
+        values = self.get_ranges(sheet_name, [rows_range(start, col_count=self._col_count(sheet_name))], priority=priority)
+        if values is None:
+            return None
+        return trim_tail(start, values[0], n)
+
+    def get_columns(self, sheet_name, names, priority=PRIORITY_INTERACTIVE):
+        """
+        Only the columns answering to `names` (header names or aliases), from
+        the header row down, in one batchGet. Returns rows like
+        get_sheet_values(), header row first; unknown names are skipped.
+        """
+        schema = self.get_schema(sheet_name, priority=priority)
+        if schema is None:
+            return None
+        cols = schema.cols(names)
+        if not cols:
+            return []
+        header_row = schema.header_row if schema.found else 0
+        columns = self.get_ranges(sheet_name, [column_range(c + 1, header_row + 1) for c in cols], priority=priority)
+        return assemble_columns(columns) if columns is not None else None
+
+    def get_schema(self, sheet_name, values=None, priority=PRIORITY_INTERACTIVE):
+        """
+        Header layout of a tab, rebuilt only when its version changes.
+        `values` may be any read that starts at row 1 (whole sheet or head);
+        without it the first HEADER_SCAN_ROWS rows are fetched.
+        """
+        if values is None:
+            values = self.cache.peek(sheet_name)  # a head would be sliced from it anyway
+        # Keyed on the version `values` were read at (a cached read may predate the current one)
+        version = self.cache.version(sheet_name, values) if values is not None else self.get_version(sheet_name)
+        schema = self.schemas.get(sheet_name, version)
+        if schema is not None:
+            return schema
+        if values is None:
+            values = self.get_head(sheet_name, priority=priority)
+            if values is None:
+                return None
+        return self.schemas.build(sheet_name, values, version)
+
+    def append_row(self, sheet_name, values, priority=PRIORITY_INTERACTIVE):
+        return self.append_rows(sheet_name, [values], priority=priority)
+
+    def append_rows(self, sheet_name, rows, priority=PRIORITY_INTERACTIVE):
+        # All rows go out in a single values.append call. Failures (including
+        # quota errors that outlived every retry) are raised, never dropped.
+        if not rows:
+            return None
+        try:
+            sheet = self._get_or_create_worksheet(sheet_name)
+            result = self.scheduler.run(WRITE, sheet.append_rows, rows, priority=priority)
         except Exception as e:
             print(f"Error appending to sheet {sheet_name}: {e}")
+            if isinstance(e, gspread.WorksheetNotFound) or "Unable to parse range" in str(e):
+                self.forget_worksheet(sheet_name)
+            self.cache.invalidate(sheet_name)
+            raise
+
+        self.cache.append(sheet_name, rows)
+        self.file_version = (0.0, None)  # our own edit made the memoized Drive version stale
+        return result
+
+    def insert_rows(self, sheet_name, rows, row, priority=PRIORITY_INTERACTIVE):
+        """
+        Insert rows before sheet row `row` (1-based) in one call, shifting the
+        rows below down. Raises on failure like append_rows.
+        """
+        if not rows:
             return None
+        try:
+            sheet = self.get_worksheet(sheet_name)
+            result = self.scheduler.run(WRITE, sheet.insert_rows, rows, row=row,
+                                        value_input_option="USER_ENTERED", priority=priority)
+        except Exception as e:
+            print(f"Error inserting into sheet {sheet_name}: {e}")
+            if isinstance(e, gspread.WorksheetNotFound) or "Unable to parse range" in str(e):
+                self.forget_worksheet(sheet_name)
+            self.cache.invalidate(sheet_name)
+            raise
+
+        self.cache.insert(sheet_name, row, rows)
+        self.file_version = (0.0, None)
+        return result
+
+    def update_cells(self, sheet_name, cells, priority=PRIORITY_INTERACTIVE):
+        """
+        Overwrite single cells, (row, col, value) 1-based, in one
+        values.batchUpdate; adjacent cells of a row share a range. Raises
+        on failure like append_rows.
+        """
+        cells = [(r, c, "" if v is None else str(v)) for r, c, v in cells]
+        if not cells:
+            return None
+        try:
+            sheet = self.get_worksheet(sheet_name)
+            result = self.scheduler.run(WRITE, sheet.batch_update, cell_updates(cells),
+                                        value_input_option="USER_ENTERED", priority=priority)
+        except Exception as e:
+            print(f"Error updating sheet {sheet_name}: {e}")
+            if isinstance(e, gspread.WorksheetNotFound) or "Unable to parse range" in str(e):
+                self.forget_worksheet(sheet_name)
+            self.cache.invalidate(sheet_name)
+            raise
+
+        self.cache.patch(sheet_name, cells)
+        self.file_version = (0.0, None)
+        return result
+
+def assemble_columns(columns):
+    # Single-column ranges come back as [[v], [], [v]...]; zip them into rows
+    height = max((len(col) for col in columns), default=0)
+    return [[col[i][0] if i < len(col) and col[i] else "" for col in columns] for i in range(height)]
+
+def trim_tail(start, rows, n):
+    if len(rows) > n:
+        start += len(rows) - n
+        rows = rows[-n:]
+    return start, rows
 
 gs_manager = GSheetsManager()
 
 def get_directory_from_db():
-    values = gs_manager.get_sheet_values("DB_DIRECTORY")
+    return parse_directory(gs_manager.get_sheet_values("DB_DIRECTORY"))
+
+def parse_directory(values):
     if not values or len(values) < 2:
         return INITIAL_DIRECTORY
 
@@ -206,35 +774,3 @@ def get_directory_from_db():
                 "type": row[type_idx].strip() if len(row) > type_idx else "ESTANDAR"
             })
     return directory
-
-def find_header_row(values):
-    limit = min(100, len(values))
-    for i in range(limit):
-        # Join columns with |, normalize spaces, uppercase
-        row_str = "|".join([str(c).upper().replace("\n", " ").strip() for c in values[i]])
-
-        if "ID_SITIO" in row_str or "ID_PROYECTO" in row_str:
-            return i
-
-        has_folio = "FOLIO" in row_str
-        has_concepto = "CONCEPTO" in row_str
-        has_date_status = any(x in row_str for x in ["ALTA", "AVANCE", "STATUS", "FECHA"])
-
-        if has_folio and has_concepto and has_date_status:
-            return i
-
-        if "ID" in row_str and "RESPONSABLE" in row_str:
-            return i
-
-        if (("FOLIO" in row_str or "ID" in row_str) and
-            ("DESCRIPCI" in row_str or "RESPONSABLE" in row_str or "CONCEPTO" in row_str)):
-            return i
-
-        if "CLIENTE" in row_str and ("VENDEDOR" in row_str or "AREA" in row_str or "CLASIFICACION" in row_str):
-            return i
-
-        # Extra checks from original code
-        if "ID" in row_str and "TITULO" in row_str and "USUARIO" in row_str: return i
-        if "ID" in row_str and "HABITO" in row_str and "USUARIO" in row_str: return i
-
-    return -1
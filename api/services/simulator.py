@@ -0,0 +1,150 @@
+import collections
+import json
+import math
+import os
+import random
+import threading
+import time
+
+import gspread
+import requests
+
+from api.services.scheduler import READ, WRITE
+
+DRIVE = "drive"  # Drive metadata calls: their own (much larger) quota, never counted against Sheets
+
+# Simulated Google Sheets behaviour for the mock spreadsheet.
+# MOCK_SHEETS_PROFILE picks a preset when the app falls back to mock mode.
+MOCK_PROFILE = os.environ.get("MOCK_SHEETS_PROFILE", "instant")
+
+
+def make_api_error(status, message="", reason=None):
+    # Build the same exception gspread raises for an HTTP error from Google
+    response = requests.Response()
+    response.status_code = status
+    response._content = json.dumps({"error": {
+        "code": status,
+        "message": message or f"HTTP {status}",
+        "status": reason or ("RESOURCE_EXHAUSTED" if status == 429 else "UNKNOWN")
+    }}).encode("utf-8")
+    return gspread.exceptions.APIError(response)
+
+
+# --- Latency distributions: callables returning seconds ---
+
+def fixed_latency(seconds):
+    return lambda: seconds
+
+
+def uniform_latency(low, high, rng=None):
+    rng = rng or random.Random()
+    return lambda: rng.uniform(low, high)
+
+
+def lognormal_latency(median, p95, rng=None):
+    # Heavy right tail, like real API round trips
+    rng = rng or random.Random()
+    sigma = math.log(p95 / median) / 1.645
+    mu = math.log(median)
+    return lambda: rng.lognormvariate(mu, sigma)
+
+
+class VirtualClock:
+    """Clock whose sleep() advances time instantly, so simulations run at CPU speed."""
+
+    def __init__(self, start=0.0):
+        self.now = start
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        with self._lock:
+            self.now += max(0.0, seconds)
+
+
+def count_cells(rows):
+    return sum(len(row) for row in rows)
+
+
+class SheetsSimulator:
+    """
+    Adds Google-like cost to mock calls: a latency drawn per call, an extra
+    delay per 1000 cells moved, and per-minute read/write quotas (sliding
+    window) that reject calls with the same 429 APIError gspread raises.
+    Every call is counted, rejected or not.
+    """
+
+    def __init__(self, read_latency=None, write_latency=None, reads_per_minute=0, writes_per_minute=0,
+                 seconds_per_kcell=0.0, drive_latency=None, clock=time.monotonic, sleep=time.sleep):
+        self.latency = {
+            READ: read_latency or fixed_latency(0.0),
+            WRITE: write_latency or fixed_latency(0.0),
+            DRIVE: drive_latency or read_latency or fixed_latency(0.0),
+        }
+        self.quota = {READ: reads_per_minute, WRITE: writes_per_minute, DRIVE: 0}
+        self.seconds_per_kcell = seconds_per_kcell
+        self._clock = clock
+        self._sleep = sleep
+        self._windows = {kind: collections.deque() for kind in (READ, WRITE, DRIVE)}
+        self._lock = threading.Lock()
+        self.calls = collections.Counter()  # operation name -> calls
+        self.reset_stats()
+
+    def reset_stats(self):
+        with self._lock:
+            self.calls.clear()
+            self.metrics = {kind: {"calls": 0, "rejected": 0, "cells": 0, "latency": 0.0} for kind in (READ, WRITE, DRIVE)}
+
+    def charge(self, kind, op, cells=0):
+        """Account one API call; sleeps for its simulated cost or raises a 429."""
+        with self._lock:
+            self.calls[op] += 1
+            m = self.metrics[kind]
+            m["calls"] += 1
+            limit = self.quota[kind]
+            if limit > 0:
+                now = self._clock()
+                window = self._windows[kind]
+                while window and now - window[0] >= 60.0:
+                    window.popleft()
+                if len(window) >= limit:
+                    m["rejected"] += 1
+                    label = "Read requests" if kind == READ else "Write requests"
+                    raise make_api_error(
+                        429,
+                        f"Quota exceeded for quota metric '{label}' and limit '{label} per minute per user' (simulated)"
+                    )
+                window.append(now)
+            delay = self.latency[kind]() + cells / 1000.0 * self.seconds_per_kcell
+            m["cells"] += cells
+            m["latency"] += delay
+        if delay > 0:
+            self._sleep(delay)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "calls": dict(self.calls),
+                **{kind: {**m, "latency": round(m["latency"], 4)} for kind, m in self.metrics.items()}
+            }
+
+    @classmethod
+    def from_profile(cls, name, clock=time.monotonic, sleep=time.sleep, seed=None):
+        """Presets: "instant" (no simulator) or "sheets" (default Google quotas and typical latencies)."""
+        if not name or name == "instant":
+            return None
+        if name != "sheets":
+            raise ValueError(f"Unknown mock profile: {name}")
+        rng = random.Random(seed)
+        return cls(
+            read_latency=lognormal_latency(0.25, 0.9, rng),
+            write_latency=lognormal_latency(0.45, 1.5, rng),
+            drive_latency=lognormal_latency(0.12, 0.4, rng),
+            reads_per_minute=60,
+            writes_per_minute=60,
+            seconds_per_kcell=0.02,
+            clock=clock,
+            sleep=sleep
+        )
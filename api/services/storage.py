@@ -0,0 +1,505 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import gspread
+
+from api.services.ranges import parse_a1, split_range, sheet_range, rows_range
+from api.services.scheduler import READ, WRITE
+
+# --- Configuration ---
+SQLITE_PATH = os.environ.get("STORAGE_SQLITE_PATH", "holtmont.db")
+REPLICA_SYNC_SECONDS = float(os.environ.get("REPLICA_SYNC_SECONDS", "30")) # incremental (new rows) pull interval
+REPLICA_FULL_SYNC_SECONDS = float(os.environ.get("REPLICA_FULL_SYNC_SECONDS", "600")) # full re-download interval; also catches edits when the remote has no versions
+
+
+class StorageBackend:
+    """
+    Storage interface for workspace tabs. A tab is an ordered list of rows,
+    each row a list of cell strings; row numbers are 1-based like in Sheets.
+    """
+
+    def list_sheets(self):
+        raise NotImplementedError
+
+    def create_sheet(self, sheet_name):
+        raise NotImplementedError
+
+    def get_values(self, sheet_name, a1=None):
+        """Rows of the tab (optionally an A1 range of it), or None if the tab does not exist."""
+        raise NotImplementedError
+
+    def append_rows(self, sheet_name, rows):
+        raise NotImplementedError
+
+    def update_range(self, sheet_name, a1, values):
+        """Overwrite the cells starting at the top-left corner of `a1`."""
+        raise NotImplementedError
+
+    def insert_rows(self, sheet_name, row, rows):
+        """Insert rows before row number `row`, shifting the rows below down."""
+        raise NotImplementedError
+
+    def replace_values(self, sheet_name, values):
+        raise NotImplementedError
+
+    def row_count(self, sheet_name):
+        values = self.get_values(sheet_name)
+        return len(values) if values is not None else 0
+
+    def version(self, sheet_name):
+        """Counter bumped by every write to the tab; None if the backend does not track it."""
+        return None
+
+
+def _cell(value):
+    return "" if value is None else str(value)
+
+
+def _next_version(version):
+    # The version one write after `version`, for counters (mock revisions, Drive's `version`)
+    try:
+        return str(int(version) + 1)
+    except (TypeError, ValueError):
+        return None
+
+
+def _row_key(row):
+    # Indexed lookup key: first column (FOLIO / ID in every tracker layout)
+    return str(row[0]).strip().upper() if row else ""
+
+
+class SQLiteBackend(StorageBackend):
+    """
+    Stores each tab as its own table (row_num primary key, indexed first-column
+    key, JSON-encoded cells) plus a catalog of tabs with their row counts.
+    """
+
+    def __init__(self, path=SQLITE_PATH):
+        self.path = path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sheets ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " name TEXT UNIQUE NOT NULL,"
+            " row_count INTEGER NOT NULL DEFAULT 0,"
+            " updated_at REAL,"
+            " version INTEGER NOT NULL DEFAULT 0)"
+        )
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(sheets)")]
+        if "version" not in columns:
+            self._conn.execute("ALTER TABLE sheets ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+        self._tables = {name: f"tab_{sid}" for sid, name in self._conn.execute("SELECT id, name FROM sheets")}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _table(self, sheet_name, create=False):
+        table = self._tables.get(sheet_name)
+        if table is None and create:
+            cur = self._conn.execute("INSERT INTO sheets (name, updated_at) VALUES (?, ?)", (sheet_name, time.time()))
+            table = f"tab_{cur.lastrowid}"
+            self._conn.execute(f"CREATE TABLE {table} (row_num INTEGER PRIMARY KEY, row_key TEXT, cells TEXT NOT NULL)")
+            self._conn.execute(f"CREATE INDEX {table}_key ON {table} (row_key)")
+            self._tables[sheet_name] = table
+        return table
+
+    def _touch(self, sheet_name, row_count):
+        self._conn.execute(
+            "UPDATE sheets SET row_count = ?, updated_at = ?, version = version + 1 WHERE name = ?",
+            (row_count, time.time(), sheet_name)
+        )
+
+    def list_sheets(self):
+        with self._lock:
+            return [name for (name,) in self._conn.execute("SELECT name FROM sheets ORDER BY id")]
+
+    def create_sheet(self, sheet_name):
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._table(sheet_name, create=True)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def row_count(self, sheet_name):
+        with self._lock:
+            row = self._conn.execute("SELECT row_count FROM sheets WHERE name = ?", (sheet_name,)).fetchone()
+            return row[0] if row else 0
+
+    def version(self, sheet_name):
+        with self._lock:
+            row = self._conn.execute("SELECT version FROM sheets WHERE name = ?", (sheet_name,)).fetchone()
+            return row[0] if row else None
+
+    def get_values(self, sheet_name, a1=None):
+        with self._lock:
+            table = self._table(sheet_name)
+            if table is None:
+                return None
+            if not a1:
+                cur = self._conn.execute(f"SELECT cells FROM {table} ORDER BY row_num")
+                return [json.loads(cells) for (cells,) in cur]
+
+            row_start, col_start, row_end, col_end = parse_a1(a1)
+            cur = self._conn.execute(
+                f"SELECT cells FROM {table} WHERE row_num BETWEEN ? AND ? ORDER BY row_num",
+                (row_start or 1, row_end if row_end is not None else 2 ** 62)
+            )
+            rows = [json.loads(cells) for (cells,) in cur]
+        c0 = (col_start or 1) - 1
+        rows = [row[c0:col_end] if col_end is not None else row[c0:] for row in rows]
+        while rows and not any(c != "" for c in rows[-1]):
+            rows.pop()
+        return rows
+
+    def find_rows(self, sheet_name, key):
+        """Row numbers whose first column matches `key` (case-insensitive), via the index."""
+        with self._lock:
+            table = self._table(sheet_name)
+            if table is None:
+                return []
+            cur = self._conn.execute(f"SELECT row_num FROM {table} WHERE row_key = ? ORDER BY row_num", (str(key).strip().upper(),))
+            return [row_num for (row_num,) in cur]
+
+    def append_rows(self, sheet_name, rows):
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                table = self._table(sheet_name, create=True)
+                start = self.row_count(sheet_name)
+                self._conn.executemany(
+                    f"INSERT INTO {table} (row_num, row_key, cells) VALUES (?, ?, ?)",
+                    [(start + i + 1, _row_key(row), json.dumps([_cell(c) for c in row])) for i, row in enumerate(rows)]
+                )
+                self._touch(sheet_name, start + len(rows))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return len(rows)
+
+    def insert_rows(self, sheet_name, row, rows):
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                table = self._table(sheet_name, create=True)
+                count = self.row_count(sheet_name)
+                row = min(row, count + 1)
+                # Shift through negative numbers so the primary key never collides mid-update
+                self._conn.execute(f"UPDATE {table} SET row_num = -(row_num + ?) WHERE row_num >= ?", (len(rows), row))
+                self._conn.execute(f"UPDATE {table} SET row_num = -row_num WHERE row_num < 0")
+                self._conn.executemany(
+                    f"INSERT INTO {table} (row_num, row_key, cells) VALUES (?, ?, ?)",
+                    [(row + i, _row_key(r), json.dumps([_cell(c) for c in r])) for i, r in enumerate(rows)]
+                )
+                self._touch(sheet_name, count + len(rows))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return len(rows)
+
+    def update_range(self, sheet_name, a1, values):
+        row_start, col_start, _, _ = parse_a1(a1)
+        r0, c0 = (row_start or 1), (col_start or 1) - 1
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                table = self._table(sheet_name, create=True)
+                count = self.row_count(sheet_name)
+                for offset, new_cells in enumerate(values):
+                    row_num = r0 + offset
+                    found = self._conn.execute(f"SELECT cells FROM {table} WHERE row_num = ?", (row_num,)).fetchone()
+                    row = json.loads(found[0]) if found else []
+                    if len(row) < c0 + len(new_cells):
+                        row.extend([""] * (c0 + len(new_cells) - len(row)))
+                    row[c0:c0 + len(new_cells)] = [_cell(c) for c in new_cells]
+                    self._conn.execute(
+                        f"INSERT OR REPLACE INTO {table} (row_num, row_key, cells) VALUES (?, ?, ?)",
+                        (row_num, _row_key(row), json.dumps(row))
+                    )
+                last_row = r0 + len(values) - 1
+                if last_row > count:
+                    # Writing below the end leaves empty rows in between, like Sheets
+                    self._conn.executemany(
+                        f"INSERT OR IGNORE INTO {table} (row_num, row_key, cells) VALUES (?, '', '[]')",
+                        [(n,) for n in range(count + 1, r0)]
+                    )
+                    count = last_row
+                self._touch(sheet_name, count)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def replace_values(self, sheet_name, values):
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                table = self._table(sheet_name, create=True)
+                self._conn.execute(f"DELETE FROM {table}")
+                self._conn.executemany(
+                    f"INSERT INTO {table} (row_num, row_key, cells) VALUES (?, ?, ?)",
+                    [(i + 1, _row_key(row), json.dumps([_cell(c) for c in row])) for i, row in enumerate(values)]
+                )
+                self._touch(sheet_name, len(values))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+
+# --- gspread-like facade, so GSheetsManager can use any backend as its spreadsheet ---
+
+class BackendWorksheet:
+    def __init__(self, spreadsheet, title):
+        self.spreadsheet = spreadsheet
+        self.title = title
+
+    def get_all_values(self):
+        return self.spreadsheet._read(self.title) or []
+
+    def append_row(self, values, **kwargs):
+        return self.append_rows([values])
+
+    def append_rows(self, values, **kwargs):
+        self.spreadsheet._append(self.title, values)
+        return {"updates": {"updatedRows": len(values)}}
+
+    def insert_rows(self, values, row=1, **kwargs):
+        self.spreadsheet._insert(self.title, row, values)
+        return {"updates": {"updatedRows": len(values)}}
+
+    def update(self, values, range_name="A1", **kwargs):
+        self.spreadsheet._update(self.title, range_name, values)
+        return {"updatedRows": len(values)}
+
+    def batch_update(self, data, **kwargs):
+        self.spreadsheet._batch_update(self.title, data)
+        return {"totalUpdatedCells": sum(len(row) for d in data for row in d["values"])}
+
+
+class BackendSpreadsheet:
+    def __init__(self, backend, id="local"):
+        self.backend = backend
+        self.id = id
+
+    def _read(self, sheet_name, a1=None):
+        return self.backend.get_values(sheet_name, a1)
+
+    def _append(self, sheet_name, rows):
+        self.backend.append_rows(sheet_name, rows)
+
+    def _insert(self, sheet_name, row, rows):
+        self.backend.insert_rows(sheet_name, row, rows)
+
+    def _update(self, sheet_name, a1, values):
+        self.backend.update_range(sheet_name, a1, values)
+
+    def _batch_update(self, sheet_name, data):
+        for d in data:
+            self.backend.update_range(sheet_name, d["range"], d["values"])
+
+    def sheet_version(self, sheet_name):
+        return self.backend.version(sheet_name)
+
+    def worksheets(self):
+        return [BackendWorksheet(self, name) for name in self.backend.list_sheets()]
+
+    def worksheet(self, name):
+        if name in self.backend.list_sheets():
+            return BackendWorksheet(self, name)
+        raise gspread.WorksheetNotFound(name)
+
+    def add_worksheet(self, title, rows=100, cols=20):
+        self.backend.create_sheet(title)
+        return BackendWorksheet(self, title)
+
+    def values_batch_get(self, ranges, params=None):
+        value_ranges = []
+        for range_str in ranges:
+            name, a1 = split_range(range_str)
+            values = self._read(name, a1)
+            if values is None:
+                raise gspread.WorksheetNotFound(name)
+            value_range = {"range": range_str, "majorDimension": "ROWS"}
+            if values:
+                value_range["values"] = values
+            value_ranges.append(value_range)
+        return {"valueRanges": value_ranges}
+
+
+class ReplicaSpreadsheet(BackendSpreadsheet):
+    """
+    Local replica of a Google spreadsheet. Reads are served from the local
+    backend; a tab read after REPLICA_SYNC_SECONDS is checked against the
+    remote version and re-downloaded only if it changed (rows may have been
+    inserted or edited anywhere, so a changed tab is always pulled in full).
+    Without a remote version, only the rows past the local row count are
+    pulled, plus a full re-download every REPLICA_FULL_SYNC_SECONDS. Writes
+    go to Sheets first and then to the local copy, so the replica never runs
+    ahead of Google.
+    """
+
+    def __init__(self, remote, local, scheduler=None, sync_seconds=REPLICA_SYNC_SECONDS,
+                 full_sync_seconds=REPLICA_FULL_SYNC_SECONDS, clock=time.monotonic, remote_version=None):
+        super().__init__(local, id=getattr(remote, "id", "replica"))
+        self.remote = remote
+        self.scheduler = scheduler
+        self.sync_seconds = sync_seconds
+        self.full_sync_seconds = full_sync_seconds
+        self._clock = clock
+        # name -> remote version token; defaults to the remote's per-tab versions (mock, SQLite)
+        self._remote_version = remote_version or getattr(remote, "sheet_version", None) or (lambda name: None)
+        self._remote_sheets = None  # title -> remote worksheet handle
+        self._synced = {}  # title -> [last_sync, last_full_sync, remote version pulled]
+        self._lock = threading.RLock()
+        self.stats = {"syncs": 0, "fullSyncs": 0, "rowsPulled": 0}
+
+    def _call(self, kind, fn, *args, **kwargs):
+        if self.scheduler is not None:
+            return self.scheduler.run(kind, fn, *args, **kwargs)
+        return fn(*args, **kwargs)
+
+    def _remote_handles(self, refresh=False):
+        if self._remote_sheets is None or refresh:
+            self._remote_sheets = {ws.title: ws for ws in self._call(READ, self.remote.worksheets)}
+        return self._remote_sheets
+
+    def sync(self, sheet_names=None, full=False):
+        """Pull remote changes into the local backend with a single batchGet."""
+        with self._lock:
+            remote = self._remote_handles(refresh=sheet_names is None)
+            names = [n for n in (sheet_names or list(remote)) if n in remote]
+            if not names:
+                return {}
+            now = self._clock()
+            plan = []
+            for name in names:
+                last = self._synced.get(name)
+                # Taken before the pull, so an edit racing with it shows up next time
+                version = self._remote_version(name)
+                if not full and last is not None and version is not None and version == last[2] \
+                        and now - last[1] < self.full_sync_seconds:
+                    last[0] = now  # unchanged since the last pull
+                    continue
+                local_rows = self.backend.row_count(name)
+                do_full = (full or last is None or version is not None or now - last[1] >= self.full_sync_seconds
+                           or local_rows == 0)
+                a1 = None if do_full else rows_range(local_rows + 1, col_count=getattr(remote[name], "col_count", None))
+                plan.append((name, a1, version))
+            if not plan:
+                return {}
+
+            response = self._call(READ, self.remote.values_batch_get, [sheet_range(n, a1) for n, a1, _ in plan])
+            pulled = {}
+            for (name, a1, version), value_range in zip(plan, response.get("valueRanges", [])):
+                values = value_range.get("values", [])
+                if a1 is None:
+                    self.backend.replace_values(name, values)
+                    self._synced[name] = [now, now, version]
+                    self.stats["fullSyncs"] += 1
+                else:
+                    if values:
+                        self.backend.append_rows(name, values)
+                    self._synced[name][0] = now
+                pulled[name] = len(values)
+                self.stats["rowsPulled"] += len(values)
+            self.stats["syncs"] += 1
+            return pulled
+
+    def _ensure_fresh(self, sheet_name, force=False):
+        last = self._synced.get(sheet_name)
+        if force or last is None or self._clock() - last[0] >= self.sync_seconds:
+            self.sync([sheet_name])
+
+    def _read(self, sheet_name, a1=None):
+        self._ensure_fresh(sheet_name)
+        return self.backend.get_values(sheet_name, a1)
+
+    def sheet_version(self, sheet_name):
+        # Pulls due changes first, so the local version reflects Google's
+        self._ensure_fresh(sheet_name)
+        return self.backend.version(sheet_name)
+
+    def _write(self, sheet_name, remote_write, local_write):
+        # Caller holds self._lock. The local copy must match the remote before
+        # a write is mirrored on it (an append lands after the remote's last row)
+        self._ensure_fresh(sheet_name, force=True)
+        before = self._synced[sheet_name][2] if sheet_name in self._synced else None
+        remote_write()
+        local_write()
+        after = self._remote_version(sheet_name)
+        if before is not None and after is not None and _next_version(before) == str(after):
+            self._synced[sheet_name][2] = after
+        elif sheet_name in self._synced:
+            # Someone else wrote around ours (or versions don't count writes): pull on the next read
+            self._synced[sheet_name][0] = float("-inf")
+            self._synced[sheet_name][2] = None
+
+    def _append(self, sheet_name, rows):
+        with self._lock:
+            handle = self._remote_handles().get(sheet_name)
+            if handle is None:
+                handle = self._call(WRITE, self.remote.add_worksheet, title=sheet_name, rows=1000, cols=26)
+                self._remote_sheets[sheet_name] = handle
+            self._write(sheet_name, lambda: self._call(WRITE, handle.append_rows, rows),
+                        lambda: self.backend.append_rows(sheet_name, rows))
+
+    def _insert(self, sheet_name, row, rows):
+        with self._lock:
+            handle = self._remote_handles().get(sheet_name)
+            if handle is None:
+                raise gspread.WorksheetNotFound(sheet_name)
+            self._write(sheet_name, lambda: self._call(WRITE, handle.insert_rows, rows, row=row, value_input_option="USER_ENTERED"),
+                        lambda: self.backend.insert_rows(sheet_name, row, rows))
+
+    def _update(self, sheet_name, a1, values):
+        with self._lock:
+            handle = self._remote_handles().get(sheet_name)
+            if handle is None:
+                raise gspread.WorksheetNotFound(sheet_name)
+            self._write(sheet_name, lambda: self._call(WRITE, handle.update, values, a1),
+                        lambda: self.backend.update_range(sheet_name, a1, values))
+
+    def _batch_update(self, sheet_name, data):
+        # One values.batchUpdate to Google, then the same cells locally
+        with self._lock:
+            handle = self._remote_handles().get(sheet_name)
+            if handle is None:
+                raise gspread.WorksheetNotFound(sheet_name)
+
+            def local_write():
+                for d in data:
+                    self.backend.update_range(sheet_name, d["range"], d["values"])
+
+            self._write(sheet_name, lambda: self._call(WRITE, handle.batch_update, data, value_input_option="USER_ENTERED"),
+                        local_write)
+
+    def worksheets(self):
+        with self._lock:
+            if not self._synced:
+                self.sync()
+        return [BackendWorksheet(self, name) for name in self._remote_handles()]
+
+    def worksheet(self, name):
+        if name in self._remote_handles():
+            return BackendWorksheet(self, name)
+        raise gspread.WorksheetNotFound(name)
+
+    def add_worksheet(self, title, rows=100, cols=20):
+        with self._lock:
+            handle = self._call(WRITE, self.remote.add_worksheet, title=title, rows=rows, cols=cols)
+            self._remote_handles()[title] = handle
+            self.backend.create_sheet(title)
+            self._synced[title] = [self._clock(), self._clock(), self._remote_version(title)]
+        return BackendWorksheet(self, title)
@@ -0,0 +1,308 @@
+from api.services.sheets import gs_manager
+from api.services.weekly_plan import PPC_SHEET, SALES_PPC_SHEET
+from api.services.work_order import get_next_sequence, save_sequence
+
+# Port of the Apps Script internalBatchUpdateTasks for tracker edits. Rows
+# are found by _rowIndex (checked against the row's FOLIO, in case rows
+# moved) or else through a FOLIO index built once per batch; only cells whose
+# text differs from the current values are written, in one batchUpdate; new
+# tasks are inserted right under the header.
+# Instead of a script lock the write is optimistic: the sheet version must be
+# the one the diff was made against, otherwise the batch is re-planned. Edits
+# made by others since the editor loaded the sheet are detected per cell: a
+# task may carry `_original`, the values it was loaded with for the fields it
+# changes, and a cell that no longer holds them is a conflict.
+
+MAX_ATTEMPTS = 3
+
+SALES_SHEET = "ANTONIA_VENTAS"
+ADMIN_SHEET = "ADMINISTRADOR"
+SALES_SEQ = "ANTONIA_SEQ"
+
+# Users who may only change these fields (matched as substrings of the key)
+RESTRICTED_USERS = ["ANGEL_SALINAS", "TERESA_GARZA", "EDUARDO_TERAN", "EDUARDO_MANZANARES",
+                    "RAMIRO_RODRIGUEZ", "SEBASTIAN_PADILLA", "EDGAR_LOPEZ"]
+RESTRICTED_FIELDS = ["FOLIO", "ID", "AVANCE", "AVANCE %", "REQUISITOR", "INFO CLIENTE", "F2",
+                     "COTIZACION", "COT", "TIMELINE", "LAYOUT"]
+# What ANTONIA_VENTAS may still change once a task has its folio (plus any date field)
+SALES_FIELDS = {"FOLIO", "ID", "ESTATUS", "STATUS", "AVANCE", "AVANCE %", "VENDEDOR", "RESPONSABLE",
+                "INVOLUCRADOS", "ENCARGADO", "CONCEPTO", "DESCRIPCION", "CLIENTE", "COTIZACION", "F2",
+                "LAYOUT", "TIMELINE", "AREA", "CLASIFICACION", "CLASI", "DIAS", "RELOJ", "ESPECIALIDAD"}
+
+
+def cell_text(value):
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    return str(value)
+
+
+def _folio(value):
+    return str(value or "").upper().strip()
+
+
+def plan_updates(schema, values, tasks):
+    """
+    (cells, new_rows, updated_rows, conflicts): changed cells as (row, col,
+    text), 1-based; rows to insert for tasks that matched no row; how many
+    rows get cells; cells someone else changed since the task's `_original`.
+    """
+    header_row = schema.header_row
+    folio_col = schema.folio_col
+    folio_rows = None
+    pending = {}  # (row, col) 0-based -> text; a later task wins on the same cell
+    new_rows = []
+    new_by_folio = {}
+    conflicts = []
+
+    for task in tasks:
+        t_folio = _folio(task.get("FOLIO") or task.get("ID"))
+        row_idx = -1
+
+        if task.get("_rowIndex"):
+            try:
+                candidate = int(task["_rowIndex"]) - 1
+            except (TypeError, ValueError):
+                candidate = -1
+            if header_row < candidate < len(values):
+                row = values[candidate]
+                if folio_col > -1 and t_folio:
+                    # Anti-displacement: the row must still hold this folio
+                    if _folio(row[folio_col] if folio_col < len(row) else "") == t_folio:
+                        row_idx = candidate
+                elif not t_folio:
+                    row_idx = candidate
+
+        if row_idx == -1 and t_folio and folio_col > -1:
+            if folio_rows is None:
+                folio_rows = {}
+                for i in range(header_row + 1, len(values)):
+                    row = values[i]
+                    folio_rows.setdefault(_folio(row[folio_col] if folio_col < len(row) else ""), i)
+            row_idx = folio_rows.get(t_folio, -1)
+
+        if row_idx > -1:
+            row = values[row_idx]
+            original = task.get("_original") or {}
+            for key, value in task.items():
+                if str(key).startswith("_"):
+                    continue
+                c = schema.col(key)
+                if c == -1:
+                    continue
+                text = cell_text(value)
+                if key in original:
+                    current = cell_text(row[c] if c < len(row) else "")
+                    # Changed by someone else, and not to what we are writing
+                    if current != cell_text(original[key]) and current != text:
+                        conflicts.append({"row": row_idx + 1, "folio": t_folio, "column": key})
+                        continue
+                pending[(row_idx, c)] = text
+        elif t_folio and t_folio in new_by_folio:
+            # Same new task twice in one batch: update the pending row
+            new_rows[new_by_folio[t_folio]].update(task)
+        else:
+            if t_folio:
+                new_by_folio[t_folio] = len(new_rows)
+            new_rows.append(dict(task))
+
+    cells = []
+    rows = set()
+    for (r, c), text in pending.items():
+        row = values[r]
+        if (row[c] if c < len(row) else "") != text:
+            cells.append((r + 1, c + 1, text))
+            rows.add(r)
+    return cells, [schema.build_row(record) for record in new_rows], len(rows), conflicts
+
+
+def _current_values(manager, sheet_name, version):
+    values = manager.get_sheet_values(sheet_name)
+    if values is None or version is None or not manager.cache.enabled:
+        return values
+    if manager.cache.version(sheet_name, values) != version:
+        # Cached from another version, or patched by a write of ours (version
+        # unknown since): either way it may not be the sheet as it is now
+        manager.cache.invalidate(sheet_name)
+        values = manager.get_sheet_values(sheet_name)
+    return values
+
+
+def save_tracker_batch(sheet_name, tasks, manager=None):
+    """
+    Applies a batch of task edits to a tracker sheet. If any cell was changed
+    by someone else since it was loaded (see `_original`), nothing is written
+    and the conflicting cells are reported.
+    """
+    manager = manager or gs_manager
+    if not tasks:
+        return {"success": True, "updated": 0, "cells": 0, "inserted": 0}
+
+    for _ in range(MAX_ATTEMPTS):
+        version = manager.get_version(sheet_name)
+
+        values = _current_values(manager, sheet_name, version)
+        if values is None:
+            return {"success": False, "message": "Hoja no encontrada: " + sheet_name}
+        if not values:
+            return {"success": False, "message": "Hoja vacía"}
+        schema = manager.get_schema(sheet_name, values)
+        if schema is None or not schema.found:
+            return {"success": False, "message": "Sin cabeceras válidas"}
+
+        cells, new_rows, updated, conflicts = plan_updates(schema, values, tasks)
+
+        # The diff must be against the current sheet: values not known to be
+        # from this version, or a write that landed while planning, mean planning again
+        if version is not None:
+            stale = manager.cache.enabled and manager.cache.version(sheet_name, values) != version
+            if stale or manager.get_version(sheet_name) != version:
+                manager.cache.invalidate(sheet_name)
+                continue
+
+        if conflicts:
+            return {"success": False, "conflict": True, "conflicts": conflicts,
+                    "message": f"Otro usuario modificó {len(conflicts)} celda(s) desde que se cargó. Recarga e intenta de nuevo."}
+
+        try:
+            if cells:
+                manager.update_cells(sheet_name, cells)
+            if new_rows:
+                # Right under the header, like internalBatchUpdateTasks: appended rows
+                # would land below the TAREAS REALIZADAS marker, in the history
+                manager.insert_rows(sheet_name, new_rows, schema.header_row + 2)
+        except Exception as e:
+            return {"success": False, "message": str(e)}
+
+        return {
+            "success": True,
+            "updated": updated,
+            "cells": len(cells),
+            "inserted": len(new_rows),
+            "version": manager.get_version(sheet_name)
+        }
+
+    return {"success": False, "message": "Hoja ocupada, intenta de nuevo."}
+
+
+# --- Rules of the Apps Script apiSaveTrackerBatch / internalUpdateTask ---
+
+def _upper(value):
+    return str(value or "").upper().strip()
+
+
+def restrict_fields(task, username):
+    if _upper(username) not in RESTRICTED_USERS:
+        return task
+    return {k: v for k, v in task.items()
+            if str(k).startswith("_") or any(a in str(k).upper() for a in RESTRICTED_FIELDS)}
+
+
+def _sales_fields(task):
+    return {k: v for k, v in task.items()
+            if str(k).startswith("_") or str(k).upper() in SALES_FIELDS
+            or "FECHA" in str(k).upper() or "ALTA" in str(k).upper()}
+
+
+def _has_content(task):
+    # A new row with only the default VENDEDOR is a blank line of the editor
+    vendor = _upper(task.get("VENDEDOR"))
+    return any(str(task.get(k) or "").strip() for k in ("CONCEPTO", "DESCRIPCION", "CLIENTE")) or \
+        (vendor != "" and vendor != SALES_SHEET)
+
+
+def _numeric_folio(task):
+    try:
+        return int(str(task.get("FOLIO") or task.get("ID") or "").strip())
+    except ValueError:
+        return None
+
+
+def prepare_tasks(sheet_name, tasks, username=None):
+    """
+    Applies the per-user field rules to a batch. New ANTONIA_VENTAS tasks get
+    their folio from ANTONIA_SEQ here; blank ones are dropped.
+    """
+    tasks = [restrict_fields(dict(task), username) for task in tasks]
+    if _upper(sheet_name) != SALES_SHEET:
+        return tasks
+
+    stored = int(get_next_sequence(SALES_SEQ))
+    # Auto-heal: never hand out a folio the batch already shows
+    seq = max([stored] + [f for f in map(_numeric_folio, tasks) if f is not None])
+    prepared = []
+    for task in tasks:
+        if not (task.get("FOLIO") or task.get("ID")):
+            if not _has_content(task):
+                continue
+            seq += 1
+            task["FOLIO"] = str(seq)
+        else:
+            task = _sales_fields(task)
+        prepared.append(task)
+    if seq != stored:
+        save_sequence(SALES_SEQ, seq)
+    return prepared
+
+
+def distribution_targets(sheet_name, tasks, manager):
+    """sheet -> copies of the tasks to save there after sheet_name was saved."""
+    copies = [{k: v for k, v in task.items() if k not in ("_rowIndex", "_original")} for task in tasks]
+    targets = {}
+    if _upper(sheet_name) == SALES_SHEET:
+        # Sales tasks go to the vendor's "(VENTAS)" tab and to ADMINISTRADOR
+        for task in copies:
+            vendor = next((str(v).strip() for k, v in task.items() if _upper(k) == "VENDEDOR" and v), "")
+            if not vendor or vendor.upper() == SALES_SHEET:
+                continue
+            target = vendor if "(VENTAS)" in vendor.upper() else vendor + " (VENTAS)"
+            if target == vendor or manager._has_worksheet(target):
+                targets.setdefault(target, []).append(task)
+        if copies:
+            targets.setdefault(ADMIN_SHEET, []).extend(copies)
+    elif "(VENTAS)" in _upper(sheet_name) and copies:
+        # A vendor's edits are mirrored back to the sales master
+        targets[SALES_SHEET] = copies
+    return targets
+
+
+def save_tracker_tasks(sheet_name, tasks, username=None, manager=None):
+    manager = manager or gs_manager
+    tasks = prepare_tasks(sheet_name, tasks, username)
+    res = save_tracker_batch(sheet_name, tasks, manager=manager)
+    if not res.get("success"):
+        return res
+
+    for target, copies in distribution_targets(sheet_name, tasks, manager).items():
+        copied = save_tracker_batch(target, copies, manager=manager)
+        if not copied.get("success"):
+            print(f"Fallo copia a {target}: {copied.get('message')}")
+    # The frontend takes the assigned folios from here
+    res["data"] = [{k: v for k, v in task.items() if k != "_original"} for task in tasks]
+    return res
+
+
+def update_task(sheet_name, task, username=None, manager=None):
+    if _upper(sheet_name) == PPC_SHEET:
+        return {"success": False, "message": "Operación no permitida: PPCV3 es de solo lectura desde esta vista."}
+    res = save_tracker_tasks(sheet_name, [task], username, manager)
+    if res.get("success"):
+        res["data"] = res["data"][0] if res["data"] else task
+    return res
+
+
+def update_ppc_task(task, username=None, manager=None):
+    task = dict(task)
+    if "COMENTARIOS SEMANA EN CURSO" in task:
+        task["COMENTARIOS"] = task["COMENTARIOS SEMANA EN CURSO"]
+    if "COMENTARIOS SEMANA PREVIA" in task:
+        task["COMENTARIOS PREVIOS"] = task["COMENTARIOS SEMANA PREVIA"]
+
+    target = SALES_PPC_SHEET if _upper(username) == SALES_SHEET else PPC_SHEET
+    if target == SALES_PPC_SHEET:
+        # PPCV4 headers, named as in the sheet
+        for key, header in (("FECHA", "Fecha de Alta"), ("CONCEPTO", "Descripción de la Actividad"), ("ARCHIVO", "Archivos")):
+            if task.get(key):
+                task[header] = task[key]
+    return save_tracker_batch(target, [task], manager=manager)
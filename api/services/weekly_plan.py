@@ -0,0 +1,128 @@
+import threading
+from bisect import bisect_left, bisect_right
+
+from api.services.dates import parse_sheet_date
+from api.services.schema import find_header_row
+
+# Port of the Apps Script apiFetchWeeklyPlanData. The PPC sheet is mapped and
+# every row's ISO week worked out once per sheet version; a request for a
+# week (or a range of weeks) then only reads the rows filed under it.
+
+PPC_SHEET = "PPCV3"
+SALES_PPC_SHEET = "PPCV4"
+NO_WEEK = "-"
+
+
+def weekly_plan_sheet(username):
+    return SALES_PPC_SHEET if str(username).upper().strip() == "ANTONIA_VENTAS" else PPC_SHEET
+
+
+def map_plan_header(header):
+    up = header.upper()
+    if "ESPECIALIDAD" in up or "AREA" in up or "DEPARTAMENTO" in up:
+        return "ESPECIALIDAD"
+    if "DESCRIPCI" in up or "CONCEPTO" in up:
+        return "CONCEPTO"
+    if "INVOLUCRADOS" in up or "RESPONSABLE" in up or "VENDEDOR" in up or "ENCARGADO" in up:
+        return "RESPONSABLE"
+    if "ALTA" in up or "FECHA" in up:
+        return "FECHA"
+    if "RELOJ" in up or "HORAS" in up:
+        return "RELOJ"
+    if "ARCHIV" in up or "CLIP" in up or "LINK" in up or "EVIDENCIA" in up:
+        return "ARCHIVO"
+    if "CUMPLIMIENTO" in up:
+        return "CUMPLIMIENTO"
+    if up in ("COMENTARIOS", "COMENTARIOS SEMANA EN CURSO") or "OBSERVACIONES" in up:
+        return "COMENTARIOS SEMANA EN CURSO"
+    if up in ("COMENTARIOS PREVIOS", "COMENTARIOS SEMANA PREVIA", "PREVIOS"):
+        return "COMENTARIOS SEMANA PREVIA"
+    return up
+
+
+def iso_week(value):
+    # Same number as the Apps Script getWeekNumber, or "-" for a blank / unreadable date
+    date = parse_sheet_date(str(value)) if value else None
+    return date.isocalendar()[1] if date else NO_WEEK
+
+
+class WeekIndex:
+    """Rows of one PPC sheet version, newest first, plus week -> row positions."""
+
+    def __init__(self, values, version=None):
+        self.version = version
+        self.headers = []
+        self.rows = []
+        self.by_week = {}
+        self.weeks = []  # sorted week numbers present in the sheet
+        if not values or len(values) < 2:
+            self.found = True
+            return
+        header_idx = find_header_row(values)
+        self.found = header_idx != -1
+        if not self.found:
+            return
+
+        mapped = [map_plan_header(str(h).strip()) for h in values[header_idx]]
+        self.headers = ["SEMANA"] + mapped
+        records = []
+        for i, row in enumerate(values[header_idx + 1:]):
+            record = {"_rowIndex": header_idx + i + 2}
+            # Later columns win on repeated names, as in the Apps Script forEach
+            record.update(zip(mapped, row))
+            record.update({h: "" for h in mapped[len(row):] if h not in record})
+            if not (record.get("CONCEPTO") or record.get("ID") or record.get("FOLIO")):
+                continue
+            record["SEMANA"] = iso_week(record.get("FECHA"))
+            records.append(record)
+
+        self.rows = records[::-1]
+        for pos, record in enumerate(self.rows):
+            self.by_week.setdefault(record["SEMANA"], []).append(pos)
+        self.weeks = sorted(w for w in self.by_week if w != NO_WEEK)
+
+    def select(self, from_week=None, to_week=None):
+        # Rows with from_week <= SEMANA <= to_week (either bound optional), newest first
+        if from_week is None and to_week is None:
+            return self.rows
+        lo = bisect_left(self.weeks, from_week) if from_week is not None else 0
+        hi = bisect_right(self.weeks, to_week) if to_week is not None else len(self.weeks)
+        weeks = self.weeks[lo:hi]
+        if len(weeks) == 1:
+            positions = self.by_week[weeks[0]]
+        else:
+            positions = sorted(p for w in weeks for p in self.by_week[w])
+        rows = self.rows
+        return [rows[p] for p in positions]
+
+
+class WeekIndexRegistry:
+    """Last WeekIndex per sheet; reused while the sheet version is unchanged."""
+
+    def __init__(self):
+        self._indexes = {}
+        self._lock = threading.Lock()
+        self.builds = 0
+        self.reuses = 0
+
+    def get(self, sheet_name, version):
+        if version is None:
+            return None
+        with self._lock:
+            index = self._indexes.get(sheet_name)
+            if index is None or index.version != version:
+                return None
+            self.reuses += 1
+            return index
+
+    def build(self, sheet_name, values, version):
+        index = WeekIndex(values, version)
+        with self._lock:
+            self.builds += 1
+            if version is not None:
+                self._indexes[sheet_name] = index
+        return index
+
+    def stats(self):
+        with self._lock:
+            return {"size": len(self._indexes), "builds": self.builds, "reuses": self.reuses}
@@ -2,6 +2,9 @@ import json
 import os
 from datetime import datetime
 from api.services.sheets import gs_manager
+from api.services.clients import client_resolver
+from api.services.schema import SheetSchema
+from api.services.scheduler import PRIORITY_INTERACTIVE, PRIORITY_BACKGROUND
 
 SEQUENCES_FILE = "sequences.json"
 
@@ -23,20 +26,95 @@ def get_next_sequence(key, increment=False):
 
     return str(current_val)
 
+def save_sequence(key, value):
+    sequences = {}
+    if os.path.exists(SEQUENCES_FILE):
+        try:
+            with open(SEQUENCES_FILE, 'r') as f:
+                sequences = json.load(f)
+        except json.JSONDecodeError:
+            pass
+
+    sequences[key] = int(value)
+    with open(SEQUENCES_FILE, 'w') as f:
+        json.dump(sequences, f)
+
 def format_date_value(val):
     if not val:
         return ""
     return str(val)
 
-def save_child_data(sheet_name, items, headers):
+class SheetWriteBatch:
+    """Collects rows per target sheet so each sheet is written with one append."""
+
+    def __init__(self):
+        self.rows = {}  # sheet_name -> rows, in first-touched order
+        self.priority = {}  # sheet_name -> scheduler lane
+        self.failed = {}  # sheet_name -> error message, filled by flush()
+        self._checked = set()
+        self._has_rows = {}  # sheet_name -> bool, filled by prefetch()
+        self._schemas = {}  # sheet_name -> SheetSchema of sheets that already have rows
+
+    def prefetch(self, sheet_names):
+        # One batchGet for every sheet whose headers will be checked
+        for name, values in gs_manager.get_many(sheet_names).items():
+            self._has_rows[name] = bool(values)
+            if values:
+                self._schemas[name] = gs_manager.get_schema(name, values)
+
+    def ensure_headers(self, sheet_name, headers):
+        if sheet_name in self._checked:
+            return
+        self._checked.add(sheet_name)
+        if sheet_name in self._has_rows:
+            has_rows = self._has_rows[sheet_name]
+        else:
+            current_values = gs_manager.get_sheet_values(sheet_name)
+            has_rows = bool(current_values)
+            if has_rows:
+                self._schemas[sheet_name] = gs_manager.get_schema(sheet_name, current_values)
+        if not has_rows:
+            # Sheet doesn't exist or is empty, headers go first
+            self.rows.setdefault(sheet_name, []).insert(0, list(headers))
+
+    def add(self, sheet_name, row, headers=None, priority=PRIORITY_INTERACTIVE):
+        if headers is not None:
+            self.ensure_headers(sheet_name, headers)
+        self.rows.setdefault(sheet_name, []).append(row)
+        self.priority[sheet_name] = min(priority, self.priority.get(sheet_name, priority))
+
+    def add_record(self, sheet_name, record, headers, priority=PRIORITY_INTERACTIVE):
+        # Lay the record out on the sheet's own columns (aliases included);
+        # new sheets, and sheets whose folio column can't be found, get `headers`
+        self.ensure_headers(sheet_name, headers)
+        schema = self._schemas.get(sheet_name)
+        if schema is None or schema.folio_col == -1:
+            schema = SheetSchema(0, headers)
+        self.add(sheet_name, schema.build_row(record), priority=priority)
+
+    def flush(self):
+        # Primary sheets first, then the background distribution copies.
+        # A failing sheet does not stop the others; failures are kept in self.failed.
+        results = {}
+        ordered = sorted(self.rows.items(), key=lambda kv: self.priority.get(kv[0], PRIORITY_INTERACTIVE))
+        for sheet_name, rows in ordered:
+            try:
+                results[sheet_name] = gs_manager.append_rows(sheet_name, rows, priority=self.priority.get(sheet_name, PRIORITY_INTERACTIVE))
+            except Exception as e:
+                self.failed[sheet_name] = str(e)
+        self.rows = {}
+        return results
+
+def save_child_data(sheet_name, items, headers, batch=None):
     if not items:
         return
 
+    own_batch = batch is None
+    if own_batch:
+        batch = SheetWriteBatch()
+
     # Ensure sheet exists or create headers
-    current_values = gs_manager.get_sheet_values(sheet_name)
-    if not current_values or len(current_values) == 0:
-        # Sheet doesn't exist or is empty, add headers
-        gs_manager.append_row(sheet_name, headers)
+    batch.ensure_headers(sheet_name, headers)
 
     # Map items to rows
     for item in items:
@@ -46,7 +124,10 @@ def save_child_data(sheet_name, items, headers):
             if val is None:
                 val = item.get(h.replace(" ", "_"), "")
             row.append(str(val))
-        gs_manager.append_row(sheet_name, row)
+        batch.add(sheet_name, row)
+
+    if own_batch:
+        batch.flush()
 
 def generate_work_order_folio(client_name, dept_name):
     # Get next sequence
@@ -117,18 +198,48 @@ def process_and_save_work_order(items, active_user):
     WO_TOOLS_SHEET = "DB_WO_HERRAMIENTAS"
     WO_EQUIP_SHEET = "DB_WO_EQUIPOS"
     WO_PROGRAM_SHEET = "DB_WO_PROGRAMA"
+    ppc_headers = ["ID", "ESPECIALIDAD", "DESCRIPCION", "RESPONSABLE", "FECHA", "RELOJ", "CUMPLIMIENTO", "ARCHIVO", "COMENTARIOS", "COMENTARIOS PREVIOS", "ESTATUS", "AVANCE", "CLASIFICACION", "PRIORIDAD", "RIESGOS", "FECHA_RESPUESTA", "DETALLES_EXTRA", "CLIENTE", "TRABAJO", "REQUISITOR", "CONTACTO", "CELULAR", "FECHA_COTIZACION"]
+
+    # Every row of the payload is collected per target sheet and flushed once at the end
+    batch = SheetWriteBatch()
+
+    child_sheets = {
+        "materiales": WO_MATERIALS_SHEET,
+        "manoObra": WO_LABOR_SHEET,
+        "herramientas": WO_TOOLS_SHEET,
+        "equipos": WO_EQUIP_SHEET,
+        "programa": WO_PROGRAM_SHEET
+    }
+    target_sheets = [PPC_SHEET_NAME, "ADMINISTRADOR"]
+    for item in items:
+        target_sheets.extend(sheet for key, sheet in child_sheets.items() if item.get(key))
+        for resp in str(item.get("responsable", "")).split(","):
+            resp_name = resp.strip()
+            if resp_name and "(VENTAS)" not in resp_name.upper():
+                target_sheets.append(resp_name)
+    batch.prefetch(list(dict.fromkeys(target_sheets)))
 
     # Ensure main sheet exists
-    current_ppc = gs_manager.get_sheet_values(PPC_SHEET_NAME)
-    if not current_ppc or len(current_ppc) == 0:
-        gs_manager.append_row(PPC_SHEET_NAME, ["ID", "ESPECIALIDAD", "DESCRIPCION", "RESPONSABLE", "FECHA", "RELOJ", "CUMPLIMIENTO", "ARCHIVO", "COMENTARIOS", "COMENTARIOS PREVIOS", "ESTATUS", "AVANCE", "CLASIFICACION", "PRIORIDAD", "RIESGOS", "FECHA_RESPUESTA", "DETALLES_EXTRA", "CLIENTE", "TRABAJO", "REQUISITOR", "CONTACTO", "CELULAR", "FECHA_COTIZACION"])
+    batch.ensure_headers(PPC_SHEET_NAME, ppc_headers)
+
+    # Typed client names are saved (and put in folios) under their known spelling
+    resolver = None
+    if any(item.get("cliente") for item in items):
+        try:
+            resolver = client_resolver(gs_manager)
+        except Exception as e:
+            print(f"Error loading client names: {e}")
 
     for item in items:
+        client = item.get("cliente", "")
+        if resolver is not None and client:
+            client = resolver.canonical(client)
+
         # ID Generation
         item_id = item.get("id") or item.get("FOLIO")
         if not item_id:
             if active_user == 'PREWORK_ORDER':
-                item_id = generate_work_order_folio(item.get("cliente"), item.get("especialidad"))
+                item_id = generate_work_order_folio(client, item.get("especialidad"))
             else:
                 import random
                 item_id = "PPC-" + str(random.randint(100000, 999999))
@@ -163,7 +274,7 @@ def process_and_save_work_order(items, active_user):
                     "RESIDENTE_OBRA": pc.get("residenteObra", "")
                 })
                 mat_items.append(new_m)
-            save_child_data(WO_MATERIALS_SHEET, mat_items, ["FOLIO", "CANTIDAD", "UNIDAD", "TIPO", "DESCRIPCION", "COSTO", "ESPECIFICACION", "TOTAL", "RESIDENTE", "COMPRAS", "CONTROLLER", "ORDEN_COMPRA", "PAGOS", "ALMACEN", "LOGISTICA", "RESIDENTE_OBRA"])
+            save_child_data(WO_MATERIALS_SHEET, mat_items, ["FOLIO", "CANTIDAD", "UNIDAD", "TIPO", "DESCRIPCION", "COSTO", "ESPECIFICACION", "TOTAL", "RESIDENTE", "COMPRAS", "CONTROLLER", "ORDEN_COMPRA", "PAGOS", "ALMACEN", "LOGISTICA", "RESIDENTE_OBRA"], batch=batch)
 
         # B. Mano de Obra
         if item.get("manoObra"):
@@ -182,7 +293,7 @@ def process_and_save_work_order(items, active_user):
                 new_l["OTROS"] = l.get("others", "")
                 new_l["TOTAL"] = l.get("total", "")
                 labor_items.append(new_l)
-            save_child_data(WO_LABOR_SHEET, labor_items, ["FOLIO", "CATEGORIA", "SALARIO", "PERSONAL", "SEMANAS", "EXTRAS", "NOCTURNO", "FIN_SEMANA", "OTROS", "TOTAL"])
+            save_child_data(WO_LABOR_SHEET, labor_items, ["FOLIO", "CATEGORIA", "SALARIO", "PERSONAL", "SEMANAS", "EXTRAS", "NOCTURNO", "FIN_SEMANA", "OTROS", "TOTAL"], batch=batch)
 
         # C. Herramientas
         if item.get("herramientas"):
@@ -206,7 +317,7 @@ def process_and_save_work_order(items, active_user):
                     "RESIDENTE_FIN": pc.get("residenteFin", "")
                 })
                 tool_items.append(new_t)
-            save_child_data(WO_TOOLS_SHEET, tool_items, ["FOLIO", "CANTIDAD", "UNIDAD", "DESCRIPCION", "COSTO", "TOTAL", "RESIDENTE", "CONTROLLER", "ALMACEN", "LOGISTICA", "RESIDENTE_FIN"])
+            save_child_data(WO_TOOLS_SHEET, tool_items, ["FOLIO", "CANTIDAD", "UNIDAD", "DESCRIPCION", "COSTO", "TOTAL", "RESIDENTE", "CONTROLLER", "ALMACEN", "LOGISTICA", "RESIDENTE_FIN"], batch=batch)
 
         # D. Equipos
         if item.get("equipos"):
@@ -225,7 +336,7 @@ def process_and_save_work_order(items, active_user):
                 new_e["COSTO"] = e.get("cost", "")
                 new_e["TOTAL"] = e.get("total", "")
                 eq_items.append(new_e)
-            save_child_data(WO_EQUIP_SHEET, eq_items, ["FOLIO", "CANTIDAD", "UNIDAD", "TIPO", "DESCRIPCION", "ESPECIFICACION", "DIAS", "HORAS", "COSTO", "TOTAL"])
+            save_child_data(WO_EQUIP_SHEET, eq_items, ["FOLIO", "CANTIDAD", "UNIDAD", "TIPO", "DESCRIPCION", "ESPECIFICACION", "DIAS", "HORAS", "COSTO", "TOTAL"], batch=batch)
 
         # E. Programa
         if item.get("programa"):
@@ -252,7 +363,7 @@ def process_and_save_work_order(items, active_user):
                 new_p["RESPONSABLE"] = resp
 
                 prog_items.append(new_p)
-            save_child_data(WO_PROGRAM_SHEET, prog_items, ["FOLIO", "DESCRIPCION", "FECHA", "DURACION", "UNIDAD_DURACION", "UNIDAD", "CANTIDAD", "PRECIO", "TOTAL", "RESPONSABLE", "SECCION", "ESTATUS"])
+            save_child_data(WO_PROGRAM_SHEET, prog_items, ["FOLIO", "DESCRIPCION", "FECHA", "DURACION", "UNIDAD_DURACION", "UNIDAD", "CANTIDAD", "PRECIO", "TOTAL", "RESPONSABLE", "SECCION", "ESTATUS"], batch=batch)
 
         # F. Detalles Extra JSON
         detalles_extra = ""
@@ -287,44 +398,29 @@ def process_and_save_work_order(items, active_user):
             'CONTACTO': item.get("contacto", ""),
             'CELULAR': item.get("celular", ""),
             'FECHA_COTIZACION': item.get("fechaCotizacion", ""),
-            'CLIENTE': item.get("cliente", ""),
+            'CLIENTE': client,
             'TRABAJO': item.get("TRABAJO", ""),
             'DETALLES_EXTRA': detalles_extra
         }
 
-        # Save to PPCV3
-        ppc_headers = ["ID", "ESPECIALIDAD", "DESCRIPCION", "RESPONSABLE", "FECHA", "RELOJ", "CUMPLIMIENTO", "ARCHIVO", "COMENTARIOS", "COMENTARIOS PREVIOS", "ESTATUS", "AVANCE", "CLASIFICACION", "PRIORIDAD", "RIESGOS", "FECHA_RESPUESTA", "DETALLES_EXTRA", "CLIENTE", "TRABAJO", "REQUISITOR", "CONTACTO", "CELULAR", "FECHA_COTIZACION"]
-
-        ppc_row = []
-        for h in ppc_headers:
-            val = ""
-            if h == "ID": val = task_data.get("FOLIO", "")
-            elif h == "ESPECIALIDAD": val = task_data.get("AREA", "")
-            elif h == "DESCRIPCION": val = task_data.get("CONCEPTO", "")
-            elif h == "RESPONSABLE": val = task_data.get("INVOLUCRADOS", "")
-            elif h == "FECHA_RESPUESTA": val = task_data.get("FECHA_RESPUESTA", "")
-            else: val = task_data.get(h, "")
-
-            ppc_row.append(str(val))
-
-        gs_manager.append_row(PPC_SHEET_NAME, ppc_row)
-
-        # Save to ADMINISTRADOR
-        admin_sheet = "ADMINISTRADOR"
-        current_admin = gs_manager.get_sheet_values(admin_sheet)
-        if not current_admin or len(current_admin) == 0:
-             gs_manager.append_row(admin_sheet, ppc_headers)
-
-        gs_manager.append_row(admin_sheet, ppc_row)
+        # Save to PPCV3, ADMINISTRADOR and the staff sheets, each on its own column layout
+        batch.add_record(PPC_SHEET_NAME, task_data, ppc_headers)
+        batch.add_record("ADMINISTRADOR", task_data, ppc_headers, priority=PRIORITY_BACKGROUND)
 
         # Distribution logic (Staff sheets)
         responsables = str(item.get("responsable", "")).split(",")
         for resp in responsables:
             resp_name = resp.strip()
             if resp_name and "(VENTAS)" not in resp_name.upper():
-                current_staff = gs_manager.get_sheet_values(resp_name)
-                if not current_staff or len(current_staff) == 0:
-                    gs_manager.append_row(resp_name, ppc_headers)
-                gs_manager.append_row(resp_name, ppc_row)
+                batch.add_record(resp_name, task_data, ppc_headers, priority=PRIORITY_BACKGROUND)
+
+    batch.flush()
+    if batch.failed:
+        return {
+            "success": False,
+            "message": "No se pudieron guardar filas en: " + ", ".join(batch.failed),
+            "errors": batch.failed,
+            "ids": generated_ids
+        }
 
     return {"success": True, "message": "Datos procesados y distribuidos correctamente.", "ids": generated_ids}
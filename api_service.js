@@ -6,6 +6,66 @@ if (!window.google) window.google = {};
 if (!window.google.script) window.google.script = {};
 
 class ApiService {
+    // Last ETag and body per GET URL. The ETag goes back as If-None-Match, and a
+    // 304 reuses the stored body (parsed again, so callers never share objects).
+    static _etagCache = new Map();
+    // Rows of each tracker as loaded (sheet -> FOLIO or row number -> record).
+    // Saves send the loaded values of the fields they change as `_original`,
+    // so the server can refuse to overwrite cells edited since.
+    static _loadedRows = new Map();
+
+    static rowKey(record) {
+        const folio = String(record.FOLIO || record.ID || '').toUpperCase().trim();
+        return folio || (record._rowIndex ? '#' + record._rowIndex : '');
+    }
+
+    static rememberRows(sheetName, res) {
+        const rows = new Map();
+        for (const record of [...(res.data || []), ...(res.history || [])]) {
+            const key = ApiService.rowKey(record);
+            if (key) rows.set(key, record);
+        }
+        ApiService._loadedRows.set(sheetName, rows);
+    }
+
+    static withOriginals(sheetName, tasks) {
+        const rows = ApiService._loadedRows.get(sheetName);
+        if (!rows) return tasks;
+        return tasks.map(task => {
+            const loaded = rows.get(ApiService.rowKey(task));
+            if (!loaded) return task;
+            const original = {};
+            for (const key of Object.keys(task)) {
+                if (key.startsWith('_') || !(key in loaded)) continue;
+                if (String(loaded[key] ?? '') !== String(task[key] ?? '')) original[key] = loaded[key];
+            }
+            return Object.keys(original).length ? { ...task, _original: original } : task;
+        });
+    }
+
+    static rememberSaved(sheetName, tasks) {
+        const rows = ApiService._loadedRows.get(sheetName);
+        if (!rows) return;
+        for (const task of tasks) {
+            const key = ApiService.rowKey(task);
+            if (!key) continue;
+            const { _original, ...values } = task;
+            rows.set(key, { ...(rows.get(key) || {}), ...values });
+        }
+    }
+
+    static async getJson(url) {
+        const cached = ApiService._etagCache.get(url);
+        const response = await fetch(url, cached ? { headers: { 'If-None-Match': cached.etag } } : {});
+        if (response.status === 304 && cached) return JSON.parse(cached.text);
+        if (!response.ok) throw new Error("Network response was not ok");
+        const text = await response.text();
+        const etag = response.headers.get('ETag');
+        if (etag) ApiService._etagCache.set(url, { etag, text });
+        else ApiService._etagCache.delete(url);
+        return JSON.parse(text);
+    }
+
     static async login(username, password) {
         try {
             const response = await fetch(`${API_BASE_URL}/api/login`, {
@@ -22,9 +82,9 @@ class ApiService {
 
     static async fetchSheetData(sheetName) {
         try {
-            const response = await fetch(`${API_BASE_URL}/api/data?sheet=${encodeURIComponent(sheetName)}`);
-            if (!response.ok) throw new Error("Network response was not ok");
-            return await response.json();
+            const res = await ApiService.getJson(`${API_BASE_URL}/api/data?sheet=${encodeURIComponent(sheetName)}`);
+            if (res && res.success && !res.window) ApiService.rememberRows(sheetName, res);
+            return res;
         } catch (e) {
             return { success: false, message: "Connection Error: " + e.toString() };
         }
@@ -76,8 +136,18 @@ class GoogleScriptRunAdapter {
     }
 
     getSystemConfig(role) {
-        fetch(`${API_BASE_URL}/api/config?role=${encodeURIComponent(role)}`)
-            .then(res => res.json())
+        ApiService.getJson(`${API_BASE_URL}/api/config?role=${encodeURIComponent(role)}`)
+            .then(data => {
+                // The server sends the directory once; staff shares it when staffIsDirectory is set
+                if (data.staffIsDirectory) data.staff = data.directory;
+                return data;
+            })
+            .then(data => this._successHandler(data))
+            .catch(err => this._failureHandler(err));
+    }
+
+    apiFetchTeamKPIData(username) {
+        ApiService.getJson(`${API_BASE_URL}/api/kpi?username=${encodeURIComponent(username)}`)
             .then(data => this._successHandler(data))
             .catch(err => this._failureHandler(err));
     }
@@ -88,8 +158,7 @@ class GoogleScriptRunAdapter {
     }
 
     apiUpdateTask(sheet, data, user) {
-        console.warn("apiUpdateTask not implemented");
-        this._successHandler({ success: true });
+        this._postTasks('/api/tracker/task', sheet, { sheet, task: ApiService.withOriginals(sheet, [data])[0], username: user }, [data]);
     }
 
     apiSavePPCData(payload, activeUser) {
@@ -112,14 +181,31 @@ class GoogleScriptRunAdapter {
 
     // --- Stubs to prevent crashes ---
 
-    apiFetchCombinedCalendarData(target) {
-        console.warn("apiFetchCombinedCalendarData stub called");
-        this._successHandler({ success: true, data: [] });
+    apiFetchCombinedCalendarData(target, from, to) {
+        const params = new URLSearchParams({ sheet: target });
+        if (from) params.set('from', from);
+        if (to) params.set('to', to);
+        ApiService.getJson(`${API_BASE_URL}/api/agenda/calendar?${params}`)
+            .then(data => this._successHandler(data))
+            .catch(err => this._failureHandler(err));
     }
 
-    apiFetchCascadeTree() {
-        console.warn("apiFetchCascadeTree stub called");
-        this._successHandler({ success: true, data: [] });
+    apiFetchUnifiedAgenda(username, from, to) {
+        const params = new URLSearchParams({ username: username });
+        if (from) params.set('from', from);
+        if (to) params.set('to', to);
+        ApiService.getJson(`${API_BASE_URL}/api/agenda?${params}`)
+            .then(data => this._successHandler(data))
+            .catch(err => this._failureHandler(err));
+    }
+
+    apiFetchCascadeTree(siteId) {
+        const url = siteId
+            ? `${API_BASE_URL}/api/cascade-tree?site=${encodeURIComponent(siteId)}`
+            : `${API_BASE_URL}/api/cascade-tree`;
+        ApiService.getJson(url)
+            .then(data => this._successHandler(data))
+            .catch(err => this._failureHandler(err));
     }
 
     apiFetchDrafts() {
@@ -128,8 +214,17 @@ class GoogleScriptRunAdapter {
     }
 
     apiFetchInfoBankData(year, month, company, folder) {
-        console.warn("apiFetchInfoBankData stub called");
-        this._successHandler({ success: true, data: [] });
+        const params = new URLSearchParams({ year: year || '2025', month: month || '', company: company || '' });
+        if (folder) params.set('folder', folder);
+        ApiService.getJson(`${API_BASE_URL}/api/infobank?${params}`)
+            .then(data => this._successHandler(data))
+            .catch(err => this._failureHandler(err));
+    }
+
+    apiFetchDistinctClients() {
+        ApiService.getJson(`${API_BASE_URL}/api/infobank/clients`)
+            .then(data => this._successHandler(data))
+            .catch(err => this._failureHandler(err));
     }
 
     uploadFileToDrive(data, type, name) {
@@ -167,14 +262,18 @@ class GoogleScriptRunAdapter {
         this._successHandler({ success: true });
     }
 
-    apiFetchWeeklyPlanData(username) {
-        console.warn("apiFetchWeeklyPlanData stub called");
-        this._successHandler({ success: true, data: [], headers: [] });
+    apiFetchWeeklyPlanData(username, week) {
+        let url = `${API_BASE_URL}/api/weekly-plan?username=${encodeURIComponent(username)}`;
+        if (week) url += `&week=${encodeURIComponent(week)}`;
+        ApiService.getJson(url)
+            .then(data => this._successHandler(data))
+            .catch(err => this._failureHandler(err));
     }
 
     apiUpdatePPCV3(row, username) {
-        console.warn("apiUpdatePPCV3 stub called");
-        this._successHandler({ success: true });
+        // The server saves ANTONIA_VENTAS's plan to PPCV4
+        const sheet = String(username).toUpperCase().trim() === 'ANTONIA_VENTAS' ? 'PPCV4' : 'PPCV3';
+        this._postTasks('/api/tracker/ppc', sheet, { task: ApiService.withOriginals(sheet, [row])[0], username }, [row]);
     }
 
     apiFetchSalesHistory() {
@@ -183,8 +282,23 @@ class GoogleScriptRunAdapter {
     }
 
     apiSaveTrackerBatch(sheetName, data, username) {
-        console.warn("apiSaveTrackerBatch stub called");
-        this._successHandler({ success: true });
+        this._postTasks('/api/tracker/batch', sheetName, { sheet: sheetName, tasks: ApiService.withOriginals(sheetName, data), username }, data);
+    }
+
+    _postTasks(path, sheetName, body, tasks) {
+        fetch(`${API_BASE_URL}${path}`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify(body)
+        })
+        .then(res => res.json())
+        .then(res => {
+            // Saved values (with any folio the server assigned) become the loaded ones;
+            // a conflict keeps the old ones until a reload
+            if (res.success) ApiService.rememberSaved(sheetName, [].concat(res.data || tasks));
+            this._successHandler(res);
+        })
+        .catch(err => this._failureHandler(err));
     }
 
     apiSaveHabitLog(payload) {
@@ -0,0 +1,135 @@
+"""
+Micro-benchmark of the sheet row parser on a synthetic tracker sheet.
+
+Compares the cell-by-cell loop /api/data used before (kept here as the
+baseline) with api.services.row_parser. Usage:
+
+    python -m benchmarks.bench_parser [--rows 50000] [--repeat 3]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from api.services.row_parser import parse_sheet_rows
+from api.services.row_query import RowQuery
+from api.services.schema import SheetSchema
+
+HEADER = ["FOLIO", "CONCEPTO", "RESPONSABLE", "FECHA", "ESTATUS", "AVANCE", "CLIENTE", "AREA", "PRIORIDAD", "COMENTARIOS",
+          "", "RIESGOS", "ARCHIVO", "CLASIFICACION", "FECHA_RESPUESTA", "RELOJ", "CUMPLIMIENTO", "TRABAJO", "CONTACTO", "CELULAR"]
+
+
+def make_rows(rows, seed):
+    rng = random.Random(seed)
+    statuses = ["ASIGNADO", "EN PROCESO", "TERMINADO", "DETENIDO"]
+    people = ["LUIS_CARLOS", "ANTONIA_VENTAS", "JUAN_PEREZ", "ANA_LOPEZ"]
+    data = []
+    for n in range(rows):
+        if n == rows * 4 // 5:
+            data.append(["", "", "TAREAS REALIZADAS"] + [""] * (len(HEADER) - 3))
+        if n % 500 == 250:
+            data.append([""] * len(HEADER))  # blank spacer
+        if n % 5000 == 4999:
+            data.append(list(HEADER))  # header repeated mid-sheet
+        row = [
+            f"PPC-{n}", f"Actividad {n} en sitio {rng.randint(1, 80)}", rng.choice(people),
+            f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/25", rng.choice(statuses), f"{rng.randint(0, 100)}%",
+            f"CLIENTE {rng.randint(1, 200)}", "ELECTROMECANICA", "Media", "Sin comentarios" if n % 3 else "",
+            "", "", "", "", "", "8", "NO", "", "", ""
+        ]
+        data.append(row[:12] if n % 7 == 0 else row)  # some rows come back short, as from the API
+    return data
+
+
+def legacy_parse(header_row, data_rows, first_row):
+    # /api/data row loop before the row_parser module
+    raw_headers = [str(h).strip() for h in header_row]
+    valid_indices = [i for i, h in enumerate(raw_headers) if h]
+    clean_headers = [raw_headers[i] for i in valid_indices]
+
+    active_tasks = []
+    history_tasks = []
+    is_reading_history = False
+
+    for i, row in enumerate(data_rows):
+        row_str = "|".join([str(c).upper() for c in row])
+        if "TAREAS REALIZADAS" in row_str:
+            is_reading_history = True
+            continue
+
+        if not any(str(c).strip() for c in row):
+            continue
+
+        if valid_indices and len(row) > valid_indices[0] and str(row[valid_indices[0]]).upper() == str(clean_headers[0]).upper():
+            continue
+
+        row_obj = {}
+        has_data = False
+
+        for k, col_index in enumerate(valid_indices):
+            header_name = clean_headers[k]
+            val = row[col_index] if col_index < len(row) else ""
+            if str(val).strip():
+                has_data = True
+            row_obj[header_name] = val
+
+        if has_data:
+            row_obj['_rowIndex'] = first_row + i
+            if is_reading_history:
+                history_tasks.append(row_obj)
+            else:
+                active_tasks.append(row_obj)
+
+    return {"success": True, "data": active_tasks, "history": history_tasks, "headers": clean_headers}
+
+
+def best_of(repeat, fn):
+    best = None
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=50000, help="data rows in the synthetic sheet")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per variant (best is kept)")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args(argv)
+
+    rows = make_rows(args.rows, args.seed)
+    query = RowQuery.parse(SheetSchema(0, HEADER), fields="FOLIO,ESTATUS,FECHA", where=["RESPONSABLE=LUIS_CARLOS"])
+    variants = [
+        ("Bucle anterior", lambda: legacy_parse(HEADER, rows, 2)),
+        ("row_parser", lambda: parse_sheet_rows(HEADER, rows, 2)),
+        ("row_parser + fields/where", lambda: parse_sheet_rows(HEADER, rows, 2, query=query)),
+    ]
+
+    results = []
+    baseline = None
+    for label, fn in variants:
+        seconds, parsed = best_of(args.repeat, fn)
+        baseline = baseline or seconds
+        results.append({
+            "variant": label,
+            "seconds": round(seconds, 4),
+            "speedup": round(baseline / seconds, 2) if seconds else 0.0,
+            "rows": len(parsed["data"]) + len(parsed["history"]),
+            "result": parsed,
+        })
+
+    print(f"{'Variante':<28}{'Filas':>10}{'Segundos':>12}{'Aceleración':>14}")
+    for r in results:
+        print(f"{r['variant']:<28}{r['rows']:>10}{r['seconds']:>12}{r['speedup']:>13}x")
+    return results
+
+
+if __name__ == "__main__":
+    main()
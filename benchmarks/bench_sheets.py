@@ -0,0 +1,109 @@
+"""
+Offline benchmark of the Sheets access patterns against the simulated mock.
+
+Runs on a virtual clock, so "seconds" are simulated Google time and the whole
+run takes well under a second. Usage:
+
+    python -m benchmarks.bench_sheets [--rows 2000] [--seed 7]
+"""
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from api.services.cache import SheetCache
+from api.services.scheduler import SheetsScheduler
+from api.services.sheets import GSheetsManager, MockSpreadsheet
+from api.services.simulator import SheetsSimulator, VirtualClock
+
+SHEET_NAMES = [f"STAFF_{i}" for i in range(8)]
+
+
+def make_manager(rows, seed, cache_ttl):
+    clock = VirtualClock()
+    simulator = SheetsSimulator.from_profile("sheets", clock=clock, sleep=clock.sleep, seed=seed)
+    spreadsheet = MockSpreadsheet(simulator=simulator)
+    header = ["ID", "CLIENTE", "CONCEPTO", "FECHA", "ESTATUS", "AVANCE"] + [f"COL_{i}" for i in range(14)]
+    for name in SHEET_NAMES:
+        spreadsheet.sheets[name] = [header] + [[f"{n}"] + [f"v{n}_{c}" for c in range(19)] for n in range(rows)]
+
+    manager = GSheetsManager()
+    manager.cache = SheetCache(ttl=cache_ttl, clock=clock)
+    manager.ss = spreadsheet
+    # Buckets off: quota pressure surfaces as simulated 429s and virtual backoff
+    manager.scheduler = SheetsScheduler(read_per_minute=0, write_per_minute=0, clock=clock, sleep=clock.sleep)
+    simulator.reset_stats()
+    return manager, simulator, clock
+
+
+def measure(label, rows, seed, cache_ttl, work):
+    manager, simulator, clock = make_manager(rows, seed, cache_ttl)
+    work(manager)
+    stats = simulator.stats()
+    retries = sum(v["retries"] for v in manager.scheduler.stats().values())
+    return {
+        "scenario": label,
+        "calls": stats["read"]["calls"] + stats["write"]["calls"],
+        "rejected": stats["read"]["rejected"] + stats["write"]["rejected"],
+        "retries": retries,
+        "seconds": round(clock.now, 2),
+    }
+
+
+def repeated_reads(manager):
+    for _ in range(20):
+        manager.get_sheet_values(SHEET_NAMES[0])
+
+
+def sheet_by_sheet(manager):
+    for name in SHEET_NAMES:
+        manager.get_sheet_values(name)
+
+
+def one_batch(manager):
+    manager.get_many(SHEET_NAMES)
+
+
+def row_by_row(manager):
+    for n in range(30):
+        manager.append_row(SHEET_NAMES[1], [f"NEW{n}", "CLIENTE"])
+
+
+def batched_rows(manager):
+    manager.append_rows(SHEET_NAMES[1], [[f"NEW{n}", "CLIENTE"] for n in range(30)])
+
+
+def hot_loop(manager):
+    # 200 reads across the workspace in quick succession
+    for n in range(200):
+        manager.get_sheet_values(SHEET_NAMES[n % len(SHEET_NAMES)])
+
+
+SCENARIOS = [
+    ("20 lecturas, sin caché", 0, repeated_reads),
+    ("20 lecturas, con caché", 15, repeated_reads),
+    ("8 hojas, una por una", 0, sheet_by_sheet),
+    ("8 hojas, batchGet", 0, one_batch),
+    ("30 filas, append_row", 0, row_by_row),
+    ("30 filas, append_rows", 0, batched_rows),
+    ("200 lecturas, sin caché", 0, hot_loop),
+    ("200 lecturas, con caché", 15, hot_loop),
+]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2000, help="rows per simulated sheet")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args(argv)
+
+    results = [measure(label, args.rows, args.seed, ttl, work) for label, ttl, work in SCENARIOS]
+    print(f"{'Escenario':<28}{'Llamadas':>10}{'429s':>8}{'Reintentos':>12}{'Seg. simulados':>16}")
+    for r in results:
+        print(f"{r['scenario']:<28}{r['calls']:>10}{r['rejected']:>8}{r['retries']:>12}{r['seconds']:>16}")
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+import sys
+import os
+from datetime import date
+
+import pytest
+from fastapi.testclient import TestClient
+
+# Ensure api module can be imported
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from api.main import app, gs_manager, agenda_sources
+from api.services.agenda import SourceEvents, combined_calendar
+from api.services.sheets import MockSpreadsheet
+
+client = TestClient(app)
+
+TRACKER = [
+    ["FOLIO", "CONCEPTO", "FECHA", "ESTATUS"],
+    ["J-1", "Levantamiento", "03/03/25", "ASIGNADO"],
+    ["J-2", "Cotizar", "10/03/25", "ASIGNADO"],
+    ["", "Sin folio", "", "ASIGNADO"],
+    ["J-3", "Visita", "2025-02-28", "ASIGNADO"],
+]
+MIRROR = [
+    ["FOLIO", "CONCEPTO", "FECHA", "ESTATUS"],
+    ["J-2", "Cotizar (copia)", "10/03/25", "ASIGNADO"],
+    ["V-1", "Seguimiento", "05/03/25", "ASIGNADO"],
+]
+PERSONAL = [
+    ["ID", "USUARIO", "TITULO", "TIPO", "FECHA", "HORA_INICIO", "HORA_FIN", "DETALLES", "CLASIFICACION", "ESTATUS"],
+    ["P-1", "JUDITH", "Gimnasio", "PERSONAL", "04/03/25", "07:00", "08:00", "", "SALUD", ""],
+    ["P-2", "OTRA", "Comida", "COMIDA", "04/03/25", "14:00", "15:00", "", "SALUD", ""],
+]
+
+
+def test_combined_calendar_merges_by_date_and_dedupes():
+    sources = {"JUDITH": SourceEvents(TRACKER, "JUDITH"), "JUDITH (VENTAS)": SourceEvents(MIRROR, "JUDITH (VENTAS)"),
+               "AGENDA_PERSONAL": SourceEvents(PERSONAL, "AGENDA_PERSONAL")}
+    data = combined_calendar("JUDITH", sources)["data"]
+    assert [r.get("FOLIO") or r.get("ID") for r in data] == ["J-2", "V-1", "P-1", "J-1", "J-3", None]
+    assert data[0]["CONCEPTO"] == "Cotizar"
+    assert data[2]["CONCEPTO"] == "Gimnasio" and data[2]["CLIENTE"] == "PERSONAL"
+
+    week = combined_calendar("JUDITH", sources, date(2025, 3, 3), date(2025, 3, 9))["data"]
+    assert [r.get("FOLIO") or r.get("ID") for r in week] == ["V-1", "P-1", "J-1"]
+
+
+@pytest.fixture
+def agenda_sheets():
+    if not gs_manager.is_mock:
+        pytest.skip("Skipping test because we are not in Mock Mode (credentials found)")
+    gs_manager.ss = MockSpreadsheet()
+    gs_manager.ss.sheets["JUDITH"] = [list(r) for r in TRACKER]
+    gs_manager.ss.sheets["JUDITH (VENTAS)"] = [list(r) for r in MIRROR]
+    gs_manager.ss.sheets["AGENDA_PERSONAL"] = [list(r) for r in PERSONAL]
+
+
+def test_agenda_endpoints_window_and_reuse_sorted_sources(agenda_sheets):
+    before = agenda_sources.stats()
+    res = client.get("/api/agenda?username=JUDITH&from=2025-03-01&to=07/03/25").json()
+    assert [r["FOLIO"] for r in res["workTasks"]] == ["V-1", "J-1"]
+    assert [r["ID"] for r in res["personalEvents"]] == ["P-1"]
+    assert res["habits"] == []
+    cal = client.get("/api/agenda/calendar?sheet=JUDITH&from=2025-03-01").json()
+    assert [r.get("FOLIO") or r.get("ID") for r in cal["data"]] == ["J-2", "V-1", "P-1", "J-1"]
+    after = agenda_sources.stats()
+    assert after["builds"] - before["builds"] == 3
+    assert after["hits"] - before["hits"] == 3
+
+    gs_manager.append_row("JUDITH", ["J-4", "Nueva", "06/03/25", "ASIGNADO"])
+    res = client.get("/api/agenda?username=JUDITH&from=2025-03-01&to=2025-03-07").json()
+    assert [r["FOLIO"] for r in res["workTasks"]] == ["J-4", "V-1", "J-1"]
+    assert agenda_sources.stats()["builds"] - after["builds"] == 1
+
+    assert client.get("/api/agenda?username=JUDITH&from=mañana").status_code == 400
+    assert client.get("/api/agenda?username=JUDITH&from=2025-03-09&to=2025-03-01").status_code == 400
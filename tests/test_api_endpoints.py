@@ -0,0 +1,167 @@
+import sys
+import os
+import json
+import pytest
+from fastapi.testclient import TestClient
+
+# Ensure api module can be imported
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from api.main import app, gs_manager
+from api.services.sheets import MockSpreadsheet
+
+client = TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def fresh_mock():
+    if not gs_manager.is_mock:
+        pytest.skip("Skipping test because we are not in Mock Mode (credentials found)")
+    gs_manager.ss = MockSpreadsheet()
+
+
+def test_data_batch_returns_every_sheet_parsed():
+    response = client.get("/api/data/batch?sheets=ANTONIA_VENTAS, NOPE")
+    assert response.status_code == 200
+    sheets = response.json()["sheets"]
+    assert list(sheets) == ["ANTONIA_VENTAS", "NOPE"]
+    assert sheets["ANTONIA_VENTAS"]["data"][0]["CLIENTE"] == "CLIENTE A"
+    assert "Falta hoja" in sheets["NOPE"]["message"]
+
+
+def test_data_batch_requires_sheet_names():
+    response = client.get("/api/data/batch?sheets= ,")
+    assert response.status_code == 400
+
+
+def test_startup_report_records_import_and_first_request():
+    client.get("/api/data?sheet=USERS")
+    report = client.get("/api/stats/startup").json()
+    assert report["importSeconds"] >= 0
+    assert report["firstRequest"]["seconds"] >= 0
+    assert report["connected"] is True
+
+
+def tracker_with_history(active, done):
+    gs_manager.ss.add_worksheet("OBRA_X", rows=10, cols=3)
+    rows = [["FOLIO", "CONCEPTO", "FECHA"]]
+    rows += [[f"A-{n}", "Activa", "01/01/25"] for n in range(active)]
+    rows += [["TAREAS REALIZADAS"]]
+    rows += [[f"H-{n}", "Hecha", "01/01/25"] for n in range(done)]
+    gs_manager.append_rows("OBRA_X", rows)
+
+
+def test_data_pagination_has_a_cursor_per_section():
+    tracker_with_history(active=5, done=3)
+    body = client.get("/api/data?sheet=OBRA_X&offset=2&limit=2&history_limit=5").json()
+    assert [r["FOLIO"] for r in body["data"]] == ["A-2", "A-3"]
+    assert [r["FOLIO"] for r in body["history"]] == ["H-0", "H-1", "H-2"]
+    assert body["data"][0]["_rowIndex"] == 4
+    assert body["page"]["data"] == {"offset": 2, "limit": 2, "returned": 2, "nextOffset": 4}
+    assert body["page"]["history"]["nextOffset"] is None
+
+    plain = client.get("/api/data?sheet=OBRA_X").json()
+    assert len(plain["data"]) == 5 and "page" not in plain
+
+
+def test_data_ndjson_streams_rows_between_meta_and_end():
+    tracker_with_history(active=3, done=2)
+    response = client.get("/api/data?sheet=OBRA_X&format=ndjson&limit=2")
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines[0]["type"] == "meta" and lines[0]["headers"] == ["FOLIO", "CONCEPTO", "FECHA"]
+    assert [(l["type"], l["row"]["FOLIO"]) for l in lines[1:-1]] == [("data", "A-0"), ("data", "A-1"), ("history", "H-0"), ("history", "H-1")]
+    assert lines[-1]["type"] == "end"
+    assert lines[-1]["page"]["data"]["nextOffset"] == 2
+
+    missing = client.get("/api/data?sheet=NOPE&format=ndjson").text.splitlines()
+    assert len(missing) == 1 and "Falta hoja" in json.loads(missing[0])["message"]
+
+
+def test_data_etag_answers_304_until_the_sheet_changes():
+    hits = client.get("/api/stats/etag").json()["etags"]["hits"]
+    first = client.get("/api/data?sheet=ANTONIA_VENTAS")
+    etag = first.headers["etag"]
+    assert first.headers["cache-control"] == "private, no-cache"
+
+    again = client.get("/api/data?sheet=ANTONIA_VENTAS", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.content == b""
+    # answered from the version memo, without parsing the sheet again
+    assert client.get("/api/stats/etag").json()["etags"]["hits"] == hits + 1
+
+    gs_manager.append_row("ANTONIA_VENTAS", ["1002", "CLIENTE Z"])
+    changed = client.get("/api/data?sheet=ANTONIA_VENTAS", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+
+
+def test_config_etag_is_per_role():
+    admin = client.get("/api/config?role=ADMIN")
+    tonita = client.get("/api/config?role=TONITA")
+    assert admin.headers["etag"] != tonita.headers["etag"]
+    assert "max-age" in admin.headers["cache-control"]
+    repeat = client.get("/api/config?role=ADMIN", headers={"If-None-Match": admin.headers["etag"]})
+    assert repeat.status_code == 304
+
+
+def test_data_fields_where_and_sort():
+    tracker_with_history(active=4, done=1)
+    gs_manager.append_row("OBRA_X", ["A-9", "Urgente", "03/01/25"])
+    body = client.get("/api/data?sheet=OBRA_X&fields=FOLIO,FECHA&where=DESCRIPCION~urg&where=FECHA>=2025-01-02&sort=-FECHA").json()
+    assert body["headers"] == ["FOLIO", "FECHA"]
+    assert body["data"] == []
+    assert body["history"] == [{"FOLIO": "A-9", "FECHA": "03/01/25", "_rowIndex": 8}]
+
+    sorted_rows = client.get("/api/data?sheet=OBRA_X&fields=FOLIO&sort=-FOLIO&limit=2").json()
+    assert [r["FOLIO"] for r in sorted_rows["data"]] == ["A-3", "A-2"]
+
+    assert client.get("/api/data?sheet=OBRA_X&where=NOPE=1").status_code == 400
+
+
+def test_config_is_built_once_per_directory_version():
+    gs_manager.ss.add_worksheet("DB_DIRECTORY", rows=10, cols=3)
+    gs_manager.append_rows("DB_DIRECTORY", [["NOMBRE", "DEPARTAMENTO", "TIPO_HOJA"], ["ANA_LOPEZ", "COMPRAS", "ESTANDAR"]])
+    before = client.get("/api/stats/config").json()["config"]
+
+    admin = client.get("/api/config?role=ADMIN").json()
+    assert admin["staffIsDirectory"] is True and "staff" not in admin
+    assert admin["directory"] == [{"name": "ANA_LOPEZ", "dept": "COMPRAS", "type": "ESTANDAR"}]
+    client.get("/api/config?role=TONITA")
+    client.get("/api/config?role=OTRO")
+    after = client.get("/api/stats/config").json()["config"]
+    assert after["builds"] - before["builds"] == 6  # every role rendered on the first miss
+    assert after["hits"] - before["hits"] == 2
+
+    gs_manager.append_row("DB_DIRECTORY", ["JUAN_PEREZ", "VENTAS", "ESTANDAR"])
+    updated = client.get("/api/config?role=ADMIN").json()
+    assert [p["name"] for p in updated["directory"]] == ["ANA_LOPEZ", "JUAN_PEREZ"]
+
+
+def test_env_file_settings_reach_the_services(tmp_path):
+    import subprocess
+    (tmp_path / ".env").write_text("SHEETS_CACHE_TTL=7\nSPREADSHEET_ID=abc123\n")
+    root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    env = {k: v for k, v in os.environ.items() if k not in ("SHEETS_CACHE_TTL", "SPREADSHEET_ID")}
+    env["PYTHONPATH"] = root
+    code = "import api.main; from api.services import sheets; print(sheets.CACHE_TTL_SECONDS, sheets.SPREADSHEET_ID)"
+    out = subprocess.run([sys.executable, "-c", code], cwd=tmp_path, env=env, capture_output=True, text=True, check=True)
+    assert out.stdout.strip().splitlines()[-1] == "7.0 abc123"
+
+
+def test_config_without_directory_version_is_still_cached(monkeypatch):
+    from api import main
+    from api.main import async_gs_manager
+
+    async def no_version(sheet_name):
+        return None
+
+    monkeypatch.setattr(async_gs_manager, "get_version", no_version)
+    monkeypatch.setattr(main, "CONFIG_FALLBACK_SECONDS", 3600)
+    client.get("/api/config?role=ADMIN")
+    before = client.get("/api/stats/config").json()["config"]
+    client.get("/api/config?role=ADMIN")
+    client.get("/api/config?role=TONITA")
+    after = client.get("/api/stats/config").json()["config"]
+    assert after["builds"] == before["builds"]
+    assert after["hits"] - before["hits"] == 2
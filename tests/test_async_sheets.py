@@ -0,0 +1,231 @@
+import sys
+import os
+import asyncio
+import json
+import time
+import httpx
+
+# Ensure api module can be imported
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from api.services.async_sheets import AsyncGSheetsManager
+from api.services.cache import SheetCache
+from api.services.ranges import split_range, sheet_range, slice_values
+from api.services.scheduler import SheetsScheduler
+from api.services.schema import SchemaRegistry
+from api.services.sheets import GSheetsManager, MockSpreadsheet
+from api.services.simulator import SheetsSimulator, fixed_latency
+
+
+class FakeCreds:
+    valid = True
+    token = "test-token"
+
+
+class FakeSpreadsheet:
+    id = "sheet-id"
+
+
+class FakeManager:
+    """Stands in for a GSheetsManager connected to the real API."""
+    is_mock = False
+    is_local = False
+    storage_mode = "sheets"
+    connected = True
+
+    def __init__(self):
+        self.creds = FakeCreds()
+        self.ss = FakeSpreadsheet()
+        self.cache = SheetCache(ttl=60)
+        self.scheduler = SheetsScheduler(read_per_minute=0, write_per_minute=0)
+        self.forgotten = []
+        real = GSheetsManager.__new__(GSheetsManager)
+        real.cache = self.cache
+        self._plan_batch = real._plan_batch
+        self._store_batch = real._store_batch
+        self._store_ranges = real._store_ranges
+        self._versions_to_check = real._versions_to_check
+        self.file_version = (0.0, None)
+        self.schemas = SchemaRegistry()
+
+    def forget_worksheet(self, name):
+        self.forgotten.append(name)
+
+    def record_file_version(self, meta):
+        self.file_version = (time.monotonic(), meta.get("version"))
+        return meta.get("version")
+
+
+def make_transport(tabs, calls, drive=None):
+    drive = drive if drive is not None else {"version": "1"}
+
+    def handler(request):
+        calls.append((request.method, request.url.path, request.url.params.multi_items()))
+        assert request.headers["Authorization"] == "Bearer test-token"
+        path = request.url.path
+        if path.startswith("/drive/"):
+            return httpx.Response(200, json=drive)
+        if path.endswith("/sheet-id"):
+            return httpx.Response(200, json={"sheets": [
+                {"properties": {"title": t, "gridProperties": {"columnCount": 26}}} for t in tabs
+            ]})
+        if path.endswith("/values:batchGet"):
+            ranges = [split_range(r) for r in request.url.params.get_list("ranges")]
+            return httpx.Response(200, json={"valueRanges": [
+                {"range": sheet_range(name, a1), "values": slice_values(tabs[name], a1)} for name, a1 in ranges
+            ]})
+        if path.endswith(":append"):
+            name = path.split("/values/")[1][:-len(":append")].strip("'")
+            tabs.setdefault(name, []).extend(json.loads(request.content)["values"])
+            return httpx.Response(200, json={"updates": {"updatedRows": 1}})
+        if path.endswith(":batchUpdate"):
+            title = json.loads(request.content)["requests"][0]["addSheet"]["properties"]["title"]
+            tabs[title] = []
+            return httpx.Response(200, json={})
+        if "/values/" in path:
+            name = path.split("/values/")[1].strip("'")
+            return httpx.Response(200, json={"values": tabs[name]})
+        return httpx.Response(404)
+    return httpx.MockTransport(handler)
+
+
+def test_native_reads_use_shared_cache_and_one_batch_call():
+    tabs = {"USERS": [["USERNAME", "ROLE"], ["LUIS_CARLOS"]], "PPCV3": [["ID"]]}
+    calls = []
+    manager = FakeManager()
+    client = AsyncGSheetsManager(manager, transport=make_transport(tabs, calls))
+
+    async def run():
+        users = await client.get_sheet_values("USERS")
+        again = await client.get_sheet_values("USERS")
+        many = await client.get_many(["USERS", "PPCV3", "NOPE"])
+        await client.aclose()
+        return users, again, many
+
+    users, again, many = asyncio.run(run())
+    assert users == [["USERNAME", "ROLE"], ["LUIS_CARLOS", ""]]
+    assert again is users
+    assert many["PPCV3"] == [["ID"]]
+    assert many["NOPE"] is None
+    paths = [path for _, path, _ in calls]
+    assert paths.count("/v4/spreadsheets/sheet-id") == 1
+    assert sum(p.endswith("batchGet") for p in paths) == 1
+    batch_params = [params for _, path, params in calls if path.endswith("batchGet")][0]
+    assert batch_params == [("ranges", "'PPCV3'")]
+
+
+def test_native_append_creates_missing_tab_and_patches_cache():
+    tabs = {"PPCV3": [["ID"]]}
+    calls = []
+    manager = FakeManager()
+    client = AsyncGSheetsManager(manager, transport=make_transport(tabs, calls))
+
+    async def run():
+        await client.get_sheet_values("PPCV3")
+        manager.file_version = (time.monotonic(), "1")
+        await client.append_rows("PPCV3", [["PPC-1"], ["PPC-2"]])
+        # Our own write: the next version check goes back to Drive
+        assert manager.file_version == (0.0, None)
+        await client.append_row("NUEVA", ["X"])
+        values = await client.get_sheet_values("PPCV3")
+        await client.aclose()
+        return values
+
+    values = asyncio.run(run())
+    assert values == [["ID"], ["PPC-1"], ["PPC-2"]]
+    assert tabs["NUEVA"] == [["X"]]
+    assert manager.forgotten == ["NUEVA"]
+
+
+def test_mock_mode_is_served_by_the_sync_manager():
+    manager = GSheetsManager()
+    client = AsyncGSheetsManager(manager)
+
+    async def run():
+        await client.append_row("ANTONIA_VENTAS", ["1002"])
+        return await client.get_sheet_values("ANTONIA_VENTAS")
+
+    assert asyncio.run(run())[-1] == ["1002"]
+
+
+def test_native_tail_and_column_reads_fetch_only_what_they_need():
+    tabs = {"USERS": [["USERNAME", "PASSWORD", "ROLE", "LABEL"], ["A", "1", "ADMIN", "Admin"], ["B", "2", "TONITA", "Ventas"]],
+            "LOG": [["FOLIO"]] + [[str(n)] for n in range(1, 11)]}
+    calls = []
+    manager = FakeManager()
+    client = AsyncGSheetsManager(manager, transport=make_transport(tabs, calls))
+
+    async def run():
+        users = await client.get_columns("USERS", ["username", "ROLE"])
+        first = await client.get_tail("LOG", 3)
+        second = await client.get_tail("LOG", 3)
+        await client.aclose()
+        return users, first, second
+
+    users, first, second = asyncio.run(run())
+    assert users == [["USERNAME", "ROLE"], ["A", "ADMIN"], ["B", "TONITA"]]
+    assert first == (9, [["8"], ["9"], ["10"]])
+    assert second == first
+    ranges = [v for _, path, params in calls if path.endswith("batchGet") for _, v in params]
+    # Column A once for the row count, then an open-ended window bounded by the grid width
+    assert ranges == ["'USERS'!1:100", "'USERS'!A1:A", "'USERS'!C1:C", "'LOG'!A:A", "'LOG'!A9:Z"]
+
+
+def test_native_expired_read_is_revalidated_by_drive_version():
+    tabs = {"USERS": [["USERNAME"], ["LUIS_CARLOS"]]}
+    calls = []
+    drive = {"version": "7"}
+    manager = FakeManager()
+    manager.cache = SheetCache(ttl=0.01)
+    client = AsyncGSheetsManager(manager, transport=make_transport(tabs, calls, drive))
+
+    async def read_after_expiry():
+        await asyncio.sleep(0.02)
+        manager.file_version = (0.0, None)  # the version lookup is memoized; force a new one
+        return await client.get_sheet_values("USERS")
+
+    async def run():
+        first = await client.get_sheet_values("USERS")
+        same = await read_after_expiry()
+        tabs["USERS"].append(["NUEVO"])
+        drive["version"] = "8"
+        changed = await read_after_expiry()
+        await client.aclose()
+        return first, same, changed
+
+    first, same, changed = asyncio.run(run())
+    assert same is first
+    assert changed[-1] == ["NUEVO"]
+    value_gets = [path for _, path, _ in calls if "/values/" in path]
+    assert len(value_gets) == 2
+    assert manager.cache.stats()["revalidations"] == 1
+
+
+def test_simulated_latency_does_not_block_the_event_loop():
+    manager = GSheetsManager()
+    manager.cache = SheetCache(ttl=0)
+    manager.ss = MockSpreadsheet(simulator=SheetsSimulator(read_latency=fixed_latency(0.2)))
+    manager.scheduler = SheetsScheduler(read_per_minute=0, write_per_minute=0)
+    agm = AsyncGSheetsManager(manager)
+    ticks = []
+
+    async def ticker(stop):
+        while not stop.is_set():
+            ticks.append(1)
+            await asyncio.sleep(0.01)
+
+    async def run():
+        stop = asyncio.Event()
+        task = asyncio.create_task(ticker(stop))
+        started = time.perf_counter()
+        results = await asyncio.gather(*[agm.get_sheet_values("USERS") for _ in range(4)])
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await task
+        return results, elapsed
+
+    results, elapsed = asyncio.run(run())
+    assert all(r and r[0][0] == "USERNAME" for r in results)
+    # The four reads overlap, and the loop kept running meanwhile
+    assert elapsed < 0.6
+    assert len(ticks) > 5
@@ -54,5 +54,37 @@ def test_save_ppc_logic():
     assert "Test Material" in last_mat
     assert response["ids"][0] in last_mat # Folio should match
 
+def test_save_ppc_flushes_each_sheet_once(monkeypatch):
+    if not gs_manager.is_mock:
+        pytest.skip("Skipping test because we are not in Mock Mode (credentials found)")
+
+    appends = []
+    original_append_rows = gs_manager.append_rows
+
+    def counting_append_rows(sheet_name, rows, **kwargs):
+        appends.append((sheet_name, len(rows)))
+        return original_append_rows(sheet_name, rows, **kwargs)
+
+    monkeypatch.setattr(gs_manager, "append_rows", counting_append_rows)
+
+    materials = [{"quantity": str(i), "description": f"Material {i}"} for i in range(40)]
+    payload = [
+        {"concepto": "Batch A", "responsable": "BATCH USER", "materiales": materials},
+        {"concepto": "Batch B", "responsable": "BATCH USER, OTHER USER", "materiales": materials[:5]}
+    ]
+
+    response = api_save_ppc_data(SavePPCRequest(payload=payload, activeUser="TEST_USER"))
+    assert response["success"] is True
+
+    sheets = [name for name, _ in appends]
+    assert len(sheets) == len(set(sheets))
+    counts = dict(appends)
+    assert counts["PPCV3"] >= 2
+    assert counts["BATCH USER"] == 3  # headers + one row per item
+    assert counts["OTHER USER"] == 2
+
+    mat_sheet = gs_manager.get_sheet_values("DB_WO_MATERIALES")
+    assert [r[0] for r in mat_sheet[-45:]] == [response["ids"][0]] * 40 + [response["ids"][1]] * 5
+
 if __name__ == "__main__":
     pytest.main([__file__])
@@ -0,0 +1,66 @@
+import sys
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+# Ensure api module can be imported
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from api.main import app, gs_manager, cascade_cache
+from api.services.cascade import CascadeTree
+from api.services.sheets import MockSpreadsheet
+
+client = TestClient(app)
+
+SITES = [
+    ["ID_SITIO", "NOMBRE", "CLIENTE", "TIPO", "ESTATUS", "FECHA_CREACION", "CREADO_POR"],
+    ["SITE-1", "PLANTA NORTE ", "ACME", "CLIENTE", "ACTIVO", "06/01/2025 10:30:00", "LUIS"],
+    ["", "SIN ID", "ACME", "CLIENTE", "ACTIVO", "", "LUIS"],
+    ["SITE-2", "BODEGA", "OTRO", "CLIENTE", "ACTIVO", "", "ANA"],
+]
+PROJECTS = [
+    ["ID_PROYECTO", "ID_SITIO", "NOMBRE_SUBPROYECTO", "TIPO", "ESTATUS", "FECHA_CREACION", "CREADO_POR"],
+    ["PROJ-1", "SITE-1", "PPC Semanal", "OBRA CIVIL", "ACTIVO", "", "LUIS"],
+    ["PROJ-2", "SITE-9", "Huérfano", "HVAC", "ACTIVO", "", "LUIS"],
+    ["PROJ-3", "SITE-1", "Ductos", "HVAC", "ACTIVO", "", "LUIS"],
+]
+
+
+def test_cascade_tree_joins_projects_to_their_site():
+    tree = CascadeTree(SITES, PROJECTS)
+    assert [s["id"] for s in tree.sites] == ["SITE-1", "SITE-2"]
+    north = tree.sites[0]
+    assert north["name"] == "PLANTA NORTE"
+    assert north["createdAt"] == "06/01/25 10:30"
+    assert [(p["id"], p["icon"]) for p in north["subProjects"]] == [("PROJ-1", "fa-tasks"), ("PROJ-3", "fa-clipboard-list")]
+    assert tree.sites[1]["subProjects"] == []
+    assert [s["subProjectCount"] for s in tree.summary()["data"]] == [2, 0]
+    assert tree.site("SITE-9")["success"] is False
+    assert CascadeTree(None, PROJECTS).sites == []
+
+
+@pytest.fixture
+def project_sheets():
+    if not gs_manager.is_mock:
+        pytest.skip("Skipping test because we are not in Mock Mode (credentials found)")
+    gs_manager.ss = MockSpreadsheet()
+    gs_manager.ss.sheets["DB_SITIOS"] = [list(r) for r in SITES]
+    gs_manager.ss.sheets["DB_PROYECTOS"] = [list(r) for r in PROJECTS]
+
+
+def test_cascade_endpoint_caches_views_until_a_sheet_changes(project_sheets):
+    before = cascade_cache.stats()
+    full = client.get("/api/cascade-tree")
+    assert [len(s["subProjects"]) for s in full.json()["data"]] == [2, 0]
+    assert client.get("/api/cascade-tree", headers={"If-None-Match": full.headers["etag"]}).status_code == 304
+    one = client.get("/api/cascade-tree?site=SITE-1").json()
+    assert [s["id"] for s in one["data"]] == ["SITE-1"]
+    after = cascade_cache.stats()
+    assert after["builds"] - before["builds"] == 2
+    assert after["hits"] - before["hits"] == 1
+
+    gs_manager.append_row("DB_PROYECTOS", ["PROJ-4", "SITE-2", "Rack", "GENERAL", "ACTIVO", "", "ANA"])
+    lazy = client.get("/api/cascade-tree?lazy=true").json()
+    assert [s["subProjectCount"] for s in lazy["data"]] == [2, 1]
+    assert client.get("/api/cascade-tree?site=SITE-2").json()["data"][0]["subProjects"][0]["name"] == "Rack"
@@ -0,0 +1,74 @@
+import sys
+import os
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+# Ensure api module can be imported
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from api.main import app, gs_manager
+from api.services.clients import ClientResolver, client_key
+from api.services.sheets import MockSpreadsheet
+
+client = TestClient(app)
+
+
+def test_client_key_drops_accents_punctuation_and_legal_suffix():
+    assert client_key("  Constructora Peñoles, S.A. de C.V. ") == "CONSTRUCTORA PENOLES"
+    assert client_key("Grupo de Acme SAPI") == "GRUPO DE ACME"
+    assert client_key("") == ""
+
+
+def test_resolver_matches_typos_and_leaves_unknown_names_alone():
+    resolver = ClientResolver(["FEMSA LOGISTICA", "Constructora Peñoles SA de CV", "TERNIUM", "OXXO"])
+    assert resolver.resolve("constructora peñoles") == ("CONSTRUCTORA PEÑOLES SA DE CV", 1.0)
+    name, score = resolver.resolve("Femsa Logistca")
+    assert name == "FEMSA LOGISTICA" and 0.6 <= score < 1.0
+    assert resolver.resolve("Walmart")[0] is None
+    assert resolver.canonical("Walmart") == "Walmart"
+    assert resolver.add("Ternium S.A.") == "TERNIUM"
+    assert len(resolver) == 4
+
+
+def test_resolver_is_fast_on_a_large_directory():
+    resolver = ClientResolver(f"CLIENTE {n} INDUSTRIAL" for n in range(2000))
+    started = time.perf_counter()
+    for _ in range(100):
+        resolver.resolve("Cliente 1234 Industrial SA")
+    assert (time.perf_counter() - started) / 100 < 0.01
+
+
+@pytest.fixture
+def client_sheets():
+    if not gs_manager.is_mock:
+        pytest.skip("Skipping test because we are not in Mock Mode (credentials found)")
+    gs_manager.ss = MockSpreadsheet()
+    gs_manager.ss.sheets["PPCV3"] = [
+        ["ID", "ESPECIALIDAD", "DESCRIPCION", "FECHA", "CLIENTE"],
+        ["PPC-1", "HVAC", "Ducto", "01/01/25", "Ternium México"],
+    ]
+
+
+def test_resolve_endpoint_uses_both_client_sheets(client_sheets):
+    res = client.get("/api/clients/resolve?name=ternium mexico").json()
+    assert res == {"success": True, "input": "ternium mexico", "canonical": "TERNIUM MÉXICO", "score": 1.0}
+    assert client.get("/api/clients/resolve?name=Cliente A").json()["canonical"] == "CLIENTE A"
+    assert client.get("/api/clients/resolve?name=%20").status_code == 400
+
+
+def test_work_order_saves_the_canonical_client(monkeypatch):
+    from api.services import work_order
+    from api.services.sheets import GSheetsManager
+
+    manager = GSheetsManager()
+    if not manager.is_mock:
+        pytest.skip("Skipping test because we are not in Mock Mode (credentials found)")
+    monkeypatch.setattr(work_order, "gs_manager", manager)
+    manager.get_sheet_values("USERS")
+
+    result = work_order.process_and_save_work_order([{"concepto": "X", "cliente": "cliente a"}], "TEST_USER")
+    assert result["success"] is True
+    ppc = manager.ss.sheets["PPCV3"]
+    assert ppc[-1][ppc[0].index("CLIENTE")] == "CLIENTE A"
@@ -0,0 +1,53 @@
+import sys
+import os
+import asyncio
+
+# Ensure api module can be imported
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from api.services.async_sheets import AsyncGSheetsManager
+from api.services.credentials import CredentialStore, build_user_index, hash_password, verify_password
+from api.services.sheets import GSheetsManager
+
+
+def test_hash_round_trip_and_legacy_plain_text():
+    stored = hash_password("secreto", iterations=1000)
+    assert stored.startswith("pbkdf2_sha256$1000$")
+    assert verify_password("secreto", stored)
+    assert not verify_password("Secreto", stored)
+    assert verify_password("admin2025", "admin2025")
+    assert not verify_password("", "")
+    assert not verify_password("x", "pbkdf2_sha256$roto")
+
+
+def test_index_normalizes_usernames_and_keeps_first_row():
+    users = build_user_index([
+        ["USERNAME", "PASSWORD", "ROLE"],
+        [" luis_carlos ", "a", "ADMIN"],
+        ["LUIS_CARLOS", "b", "USER"],
+        ["", "c", "USER"],
+    ])
+    assert list(users) == ["LUIS_CARLOS"]
+    assert users["LUIS_CARLOS"]["password"] == "a"
+    assert users["LUIS_CARLOS"]["name"] == "LUIS_CARLOS"
+
+
+def test_store_rebuilds_only_when_users_change():
+    manager = GSheetsManager()
+    store = CredentialStore(AsyncGSheetsManager(manager))
+
+    async def run():
+        first = await store.authenticate("prework_order", "workorder2026")
+        wrong = await store.authenticate("PREWORK_ORDER", "nope")
+        await store.authenticate("LUIS_CARLOS", "admin2025")
+        builds = store.builds
+        manager.append_row("USERS", ["NUEVO", hash_password("clave", iterations=1000), "ADMIN", "Nuevo"])
+        new = await store.authenticate("nuevo", "clave")
+        return first, wrong, builds, new
+
+    first, wrong, builds, new = asyncio.run(run())
+    assert first["role"] == "WORKORDER_USER"
+    assert wrong is None
+    assert builds == 1
+    assert new["name"] == "Nuevo"
+    assert store.builds == 2
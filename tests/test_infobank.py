@@ -0,0 +1,80 @@
+import sys
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+# Ensure api module can be imported
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from api.main import app, gs_manager, infobank_index
+from api.services.infobank import InfoBankIndex
+from api.services.sheets import MockSpreadsheet
+
+client = TestClient(app)
+
+SALES = [
+    ["FOLIO", "CLIENTE", "CONCEPTO", "FECHA", "ESTATUS", "VENDEDOR"],
+    ["1001", "Acme Norte", "Cotización HVAC", "05/03/25", "PENDIENTE", "ANA"],
+    ["1002", "BETA", "Tablero", "2025-03-20", "VENDIDA", "LUIS"],
+    ["1003", "Acme S.A. de C.V.", "Ductos", "30/03/2025", "PERDIDA", "ANA"],
+    ["1004", "GAMMA", "Sin fecha", "", "PENDIENTE", "ANA"],
+    ["1005", "ACME", "Abril", "02/04/25", "PENDIENTE", "ANA"],
+    ["", "", "TAREAS REALIZADAS", "", "", ""],
+    ["0999", "ZETA", "Histórico", "01/03/25", "VENDIDA", "ANA"],
+]
+
+
+def test_infobank_index_resolves_company_to_one_client_in_sheet_order():
+    index = InfoBankIndex()
+    index.refresh(SALES, version=1)
+    assert index.clients == ["ACME", "ACME NORTE", "ACME S.A. DE C.V.", "BETA", "GAMMA"]
+    data, client, score = index.lookup("acme", 2025, 3)
+    assert ([r["FOLIO"] for r in data], client, score) == (["1003"], "ACME S.A. DE C.V.", 1.0)
+    # Spelling variants land on the same client; a different branch stays separate
+    assert [r["FOLIO"] for r in index.lookup("Acme, S.A.", 2025, 3)[0]] == ["1003"]
+    assert [r["FOLIO"] for r in index.lookup("ACME NORTE", 2025, 3)[0]] == ["1001"]
+    assert index.lookup("BETA", 2025, 3)[0][0] == {"FECHA_INICIO": "2025-03-20", "AREA": "", "CONCEPTO": "Tablero",
+                                                    "VENDEDOR": "LUIS", "ESTATUS": "VENDIDA", "FOLIO": "1002", "COTIZACION": ""}
+    assert index.lookup("ZETA", 2025, 3)[0] == []
+
+
+def test_infobank_index_files_only_appended_rows():
+    active = [list(r) for r in SALES[:6]]
+    index = InfoBankIndex()
+    index.refresh(active, version=1)
+    active.append(["1006", "DELTA", "Nuevo", "10/03/25", "PENDIENTE", "ANA"])
+    index.refresh(active, version=2)
+    assert index.stats()["builds"] == 1 and index.stats()["appends"] == 1
+    assert index.clients == ["ACME", "ACME NORTE", "ACME S.A. DE C.V.", "BETA", "DELTA", "GAMMA"]
+
+    edited = [list(r) for r in active]
+    edited[1][1] = "OMEGA"
+    index.refresh(edited, version=3)
+    assert index.stats()["builds"] == 2
+    assert "ACME NORTE" not in index.clients
+
+
+@pytest.fixture
+def sales_sheet():
+    if not gs_manager.is_mock:
+        pytest.skip("Skipping test because we are not in Mock Mode (credentials found)")
+    gs_manager.ss = MockSpreadsheet()
+    gs_manager.ss.sheets["ANTONIA_VENTAS"] = [list(r) for r in SALES[:6]]
+
+
+def test_infobank_endpoints(sales_sheet):
+    res = client.get("/api/infobank?year=2025&month=marzo&company=ACME").json()
+    assert [r["FOLIO"] for r in res["data"]] == ["1003"]
+    assert res["client"] == "ACME S.A. DE C.V."
+    assert client.get("/api/infobank?month=TREDECIMBRE&company=ACME").json() == {"success": False, "message": "Mes inválido"}
+
+    clients = client.get("/api/infobank/clients")
+    assert clients.json()["data"] == ["ACME", "ACME NORTE", "ACME S.A. DE C.V.", "BETA", "GAMMA"]
+    assert client.get("/api/infobank/clients", headers={"If-None-Match": clients.headers["etag"]}).status_code == 304
+
+    appends = infobank_index.stats()["appends"]
+    gs_manager.append_row("ANTONIA_VENTAS", ["1006", "ACME", "Nuevo", "31/03/25", "PENDIENTE", "ANA"])
+    res = client.get("/api/infobank?year=2025&month=MARZO&company=ACME").json()
+    assert [r["FOLIO"] for r in res["data"]] == ["1003", "1006"]
+    assert infobank_index.stats()["appends"] == appends + 1
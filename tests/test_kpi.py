@@ -0,0 +1,64 @@
+import sys
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+# Ensure api module can be imported
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from api.main import app, gs_manager
+from api.services.kpi import person_kpi
+from api.services.sheets import MockSpreadsheet
+
+client = TestClient(app)
+
+
+def test_person_kpi_counts_finished_active_tasks():
+    values = [
+        ["FOLIO", "CONCEPTO", "ESTATUS", "FECHA", "FECHA FIN", "FECHA TERMINO"],
+        ["1", "A", "Terminado", "01/01/25", "10/01/25", "05/01/25"],   # real end date wins: 4 days
+        ["2", "B", "DONE", "2025-01-01", "2025-01-03", ""],            # planned end: 2 days
+        ["3", "C", "ASIGNADO", "01/01/25", "10/01/25", ""],
+        ["4", "D", "FINALIZADO", "", "10/01/25"],                       # no start: counted, no days
+        ["TAREAS REALIZADAS"],
+        ["5", "E", "TERMINADO", "01/01/25", "31/01/25", ""],            # history is not counted
+    ]
+    assert person_kpi("ANA", values) == {"name": "ANA", "volume": 3, "efficiency": 3.0}
+    assert person_kpi("NADIE", None)["error"] == "Hoja no encontrada"
+
+
+@pytest.fixture
+def directory():
+    if not gs_manager.is_mock:
+        pytest.skip("Skipping test because we are not in Mock Mode (credentials found)")
+    gs_manager.ss = MockSpreadsheet()
+    gs_manager.ss.sheets["DB_DIRECTORY"] = [
+        ["NOMBRE", "DEPARTAMENTO", "TIPO_HOJA"],
+        ["EDUARDO MANZANARES", "VENTAS", "ESTANDAR"],
+        ["JUDITH", "HVAC", "ESTANDAR"],
+        ["ADMINISTRADOR", "HVAC", "ESTANDAR"],
+    ]
+    gs_manager.ss.sheets["JUDITH"] = [
+        ["FOLIO", "CONCEPTO", "ESTATUS", "FECHA", "FECHA RESPUESTA"],
+        ["1", "A", "TERMINADO", "01/01/25", "03/01/25"],
+    ]
+
+
+def test_kpi_endpoint_requires_admin_and_caches_by_versions(directory):
+    assert client.get("/api/kpi?username=ANTONIA_VENTAS").json()["success"] is False
+
+    before = client.get("/api/stats/kpi").json()["kpi"]
+    first = client.get("/api/kpi?username=luis_carlos").json()
+    assert first["ventas"] == [{"name": "EDUARDO MANZANARES", "volume": 0, "efficiency": 0, "error": "Hoja no encontrada"}]
+    assert first["tracker"] == [{"name": "JUDITH", "volume": 1, "efficiency": 2.0}]
+    again = client.get("/api/kpi?username=LUIS_CARLOS")
+    assert again.json() == first
+    after = client.get("/api/stats/kpi").json()["kpi"]
+    assert after["builds"] - before["builds"] == 1
+    assert after["hits"] - before["hits"] == 1
+
+    gs_manager.append_row("JUDITH", ["2", "B", "DONE", "01/01/25", "05/01/25"])
+    gs_manager.cache.invalidate("JUDITH")
+    updated = client.get("/api/kpi?username=LUIS_CARLOS").json()
+    assert updated["tracker"] == [{"name": "JUDITH", "volume": 2, "efficiency": 3.0}]
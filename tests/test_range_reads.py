@@ -0,0 +1,85 @@
+import sys
+import os
+import pytest
+from fastapi.testclient import TestClient
+
+# Ensure api module can be imported
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from api.main import app, gs_manager
+from api.services.sheets import GSheetsManager, MockSpreadsheet
+
+
+def make_manager(rows=50):
+    manager = GSheetsManager()
+    ss = MockSpreadsheet()
+    ss.sheets["PPCV3"] = [["REPORTE"], ["ID", "CONCEPTO", "RESPONSABLE", "FECHA"]] + [
+        [f"PPC-{n}", f"Tarea {n}", "LUIS", "01/01/25"] for n in range(1, rows + 1)
+    ]
+    manager.ss = ss
+    batches = []
+    original = ss.values_batch_get
+    ss.values_batch_get = lambda ranges, params=None: batches.append(list(ranges)) or original(ranges, params)
+    return manager, batches
+
+
+def test_tail_reuses_cached_row_count_and_follows_appends():
+    manager, batches = make_manager()
+
+    assert manager.get_tail("PPCV3", 2) == (51, [["PPC-49", "Tarea 49", "LUIS", "01/01/25"], ["PPC-50", "Tarea 50", "LUIS", "01/01/25"]])
+    assert batches == [["'PPCV3'!A:A"], ["'PPCV3'!51:10000000"]]
+
+    manager.append_rows("PPCV3", [["PPC-51", "Tarea 51", "LUIS", "02/01/25"]])
+    start, rows = manager.get_tail("PPCV3", 2)
+    assert (start, rows[-1][0]) == (52, "PPC-51")
+    # The count was bumped locally, only the window is fetched again
+    assert batches[2:] == [["'PPCV3'!52:10000000"]]
+
+
+def test_tail_respects_min_row():
+    manager, _ = make_manager(rows=2)
+    start, rows = manager.get_tail("PPCV3", 10, min_row=3)
+    assert start == 3
+    assert [r[0] for r in rows] == ["PPC-1", "PPC-2"]
+
+
+def test_head_and_columns_use_header_detection():
+    manager, batches = make_manager()
+    assert len(manager.get_head("PPCV3", 5)) == 5
+    assert manager.get_columns("PPCV3", ["concepto", "ID", "NOPE"])[:2] == [["CONCEPTO", "ID"], ["Tarea 1", "PPC-1"]]
+    assert batches[-1] == ["'PPCV3'!B2:B", "'PPCV3'!A2:A"]
+    assert manager.get_columns("MISSING", ["ID"]) is None
+
+
+def test_ranged_reads_come_from_cached_sheet():
+    manager, batches = make_manager()
+    manager.get_sheet_values("PPCV3")
+    assert manager.get_tail("PPCV3", 1)[1][0][0] == "PPC-50"
+    assert manager.get_columns("PPCV3", ["ID"])[1] == ["PPC-1"]
+    assert batches == []
+
+
+@pytest.fixture
+def api_client():
+    if not gs_manager.is_mock:
+        pytest.skip("Skipping test because we are not in Mock Mode (credentials found)")
+    gs_manager.ss = MockSpreadsheet()
+    return TestClient(app)
+
+
+def test_data_endpoint_tail_window(api_client):
+    gs_manager.ss.sheets["ANTONIA_VENTAS"].extend([[str(n), f"CLIENTE {n}", "X", "01/01/25", "PENDIENTE", "0%"] for n in range(1002, 1010)])
+    body = api_client.get("/api/data?sheet=ANTONIA_VENTAS&tail=3").json()
+    assert [row["FOLIO"] for row in body["data"]] == ["1007", "1008", "1009"]
+    assert body["data"][0]["_rowIndex"] == 8
+    assert body["window"] == {"firstRow": 8, "rows": 3}
+
+    full = api_client.get("/api/data?sheet=ANTONIA_VENTAS").json()
+    assert full["data"][-3:] == body["data"]
+    assert api_client.get("/api/data?sheet=NOPE&tail=3").json()["message"] == "Falta hoja: NOPE"
+
+
+def test_login_reads_only_credential_columns(api_client):
+    ok = api_client.post("/api/login", json={"username": "jesus_cantu", "password": "ppc2025"}).json()
+    assert ok["role"] == "PPC_ADMIN"
+    assert gs_manager.cache.get("USERS") is None
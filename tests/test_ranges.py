@@ -0,0 +1,28 @@
+import sys
+import os
+
+# Ensure api module can be imported
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from api.services.ranges import sheet_range, split_range, parse_a1, slice_values, column_letter, column_number
+
+
+def test_sheet_names_round_trip_through_quoting():
+    for name in ["PPCV3", "JUAN JOSE SANCHEZ", "O'BRIEN (VENTAS)"]:
+        assert split_range(sheet_range(name)) == (name, None)
+        assert split_range(sheet_range(name, "A1:D10")) == (name, "A1:D10")
+    assert split_range("USERS!A:D") == ("USERS", "A:D")
+
+
+def test_column_letters():
+    assert column_letter(1) == "A"
+    assert column_letter(27) == "AA"
+    assert column_number("AZ") == 52
+
+
+def test_parse_and_slice_a1():
+    assert parse_a1("B2:D") == (2, 2, None, 4)
+    assert parse_a1("3:5") == (3, None, 5, None)
+    grid = [["a", "b", "c"], ["d", "e", "f"], ["", "", ""]]
+    assert slice_values(grid, "B1:C") == [["b", "c"], ["e", "f"]]
+    assert slice_values(grid, "2:2") == [["d", "e", "f"]]
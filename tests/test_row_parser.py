@@ -0,0 +1,38 @@
+import sys
+import os
+
+# Ensure api module can be imported
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from api.services.row_parser import parse_sheet_rows, parse_sheet_data
+from benchmarks import bench_parser
+
+
+def test_parser_matches_previous_loop():
+    results = bench_parser.main(["--rows", "3000", "--repeat", "1"])
+    legacy, current = results[0]["result"], results[1]["result"]
+    assert current == legacy
+    assert legacy["history"]  # the synthetic sheet has a TAREAS REALIZADAS section
+
+
+def test_blank_cells_marker_and_non_text_values():
+    header = ["FOLIO", "", "CONCEPTO", "COMENTARIOS"]
+    rows = [
+        ["", "solo aquí", ""],                         # text only under an empty header: not a task
+        [" ", "", "Pendiente"],                        # blank folio, still a task
+        ["FOLIO", "", "CONCEPTO"],                     # header repeated
+        ["F-1", "", "Revisar", "ver tareas realizadas"],  # mentioned in a comment: still a task
+        ["", "", "Tareas realizadas"],                 # marker, any case
+        [1001, "", 3.5],                               # numbers from a local backend
+    ]
+    result = parse_sheet_rows(header, rows, 2)
+    assert result["data"] == [
+        {"FOLIO": " ", "CONCEPTO": "Pendiente", "COMENTARIOS": "", "_rowIndex": 3},
+        {"FOLIO": "F-1", "CONCEPTO": "Revisar", "COMENTARIOS": "ver tareas realizadas", "_rowIndex": 5},
+    ]
+    assert result["history"] == [{"FOLIO": 1001, "CONCEPTO": 3.5, "COMENTARIOS": "", "_rowIndex": 7}]
+
+
+def test_parse_sheet_data_reports_missing_and_unformatted():
+    assert "Falta hoja" in parse_sheet_data("X", None)["message"]
+    assert parse_sheet_data("X", [["A"], ["B"]])["message"] == "Sin formato válido"
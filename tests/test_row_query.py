@@ -0,0 +1,51 @@
+import sys
+import os
+from datetime import date
+
+import pytest
+
+# Ensure api module can be imported
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from api.services.dates import parse_sheet_date
+from api.services.row_query import RowQuery
+from api.services.schema import SheetSchema
+
+SCHEMA = SheetSchema(0, ["FOLIO", "DESCRIPCION", "INVOLUCRADOS", "ESTATUS", "FECHA INICIO", "AVANCE"])
+ROWS = [
+    ["F-1", "Tablero", "LUIS, ANA", "ASIGNADO", "05/01/25", "10%"],
+    ["F-2", "Losa", "ANA", "TERMINADO", "2025-02-01", "100%"],
+    ["F-3", "Muro", "luis", " asignado ", "", "50%"],
+]
+
+
+def test_parse_sheet_date_formats():
+    assert parse_sheet_date("05/01/25") == date(2025, 1, 5)
+    assert parse_sheet_date("5/1/2025 10:30") == date(2025, 1, 5)
+    assert parse_sheet_date("2025-02-01T00:00:00") == date(2025, 2, 1)
+    assert parse_sheet_date("31/02/25") is None
+    assert parse_sheet_date("PENDIENTE") is None
+
+
+def test_conditions_resolve_aliases():
+    query = RowQuery.parse(SCHEMA, where=["STATUS=asignado", "RESPONSABLE~LUIS"])
+    assert [r[0] for r in ROWS if query.match(r)] == ["F-1", "F-3"]
+
+    dated = RowQuery.parse(SCHEMA, where=["FECHA>=01/01/25", "FECHA<=2025-01-31"])
+    assert [r[0] for r in ROWS if dated.match(r)] == ["F-1"]
+
+
+def test_fields_and_sort():
+    query = RowQuery.parse(SCHEMA, fields="FOLIO, CONCEPTO, NOPE", sort="-FECHA")
+    assert query.columns == [("FOLIO", 0), ("DESCRIPCION", 1)]
+    items = [("data", {}, row) for row in ROWS]
+    assert [item[2][0] for item in query.sorted(items)] == ["F-2", "F-1", "F-3"]
+
+
+def test_unknown_columns_and_bad_dates_are_rejected():
+    with pytest.raises(ValueError):
+        RowQuery.parse(SCHEMA, where=["NOPE=1"])
+    with pytest.raises(ValueError):
+        RowQuery.parse(SCHEMA, where=["FECHA>=ayer"])
+    with pytest.raises(ValueError):
+        RowQuery.parse(SCHEMA, sort="NOPE")
@@ -0,0 +1,142 @@
+import sys
+import os
+import asyncio
+import threading
+import time
+import pytest
+
+# Ensure api module can be imported
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from api.services.scheduler import (
+    SheetsScheduler, SheetsQuotaError, TokenBucket, READ, WRITE,
+    PRIORITY_INTERACTIVE, PRIORITY_BACKGROUND
+)
+from api.services.sheets import GSheetsManager, MockSpreadsheet, make_api_error
+from api.services import work_order
+
+
+def no_sleep(seconds):
+    pass
+
+
+def test_token_bucket_refills_at_rate():
+    now = [0.0]
+    bucket = TokenBucket(rate_per_minute=60, burst=2, clock=lambda: now[0])
+    assert bucket.try_take() == 0
+    assert bucket.try_take() == 0
+    assert bucket.try_take() == pytest.approx(1.0)
+    now[0] = 1.0
+    assert bucket.try_take() == 0
+
+
+def test_injected_429s_are_retried_with_backoff():
+    delays = []
+    manager = GSheetsManager()
+    manager.scheduler = SheetsScheduler(read_per_minute=0, write_per_minute=0, sleep=delays.append, rand=lambda: 0.5)
+    manager.get_sheet_values("USERS")  # resolve handles first
+
+    manager.ss.inject_errors(2, status=429)
+    manager.append_row("USERS", ["NEW_USER", "x", "USER", "Nuevo"])
+
+    assert manager.ss.sheets["USERS"][-1][0] == "NEW_USER"
+    assert delays == [1.5, 2.5]
+    stats = manager.scheduler.stats()[WRITE]
+    assert stats["throttled"] == 2
+    assert stats["retries"] == 2
+    assert stats["failures"] == 0
+
+
+def test_exhausted_retries_raise_instead_of_dropping_rows():
+    manager = GSheetsManager()
+    manager.scheduler = SheetsScheduler(read_per_minute=0, write_per_minute=0, max_retries=2, sleep=no_sleep)
+    manager.get_sheet_values("USERS")
+
+    manager.ss.inject_errors(10, status=429)
+    with pytest.raises(SheetsQuotaError):
+        manager.append_row("USERS", ["LOST"])
+    assert manager.scheduler.stats()[WRITE]["failures"] == 1
+
+
+def test_non_retryable_errors_fail_fast():
+    scheduler = SheetsScheduler(read_per_minute=0, write_per_minute=0, sleep=no_sleep)
+    calls = []
+
+    def bad_request():
+        calls.append(1)
+        raise make_api_error(400, "Unable to parse range")
+
+    with pytest.raises(Exception):
+        scheduler.run(READ, bad_request)
+    assert len(calls) == 1
+
+
+def test_writes_are_not_retried_on_server_errors():
+    scheduler = SheetsScheduler(read_per_minute=0, write_per_minute=0, sleep=no_sleep)
+    calls = []
+
+    def flaky(kind):
+        calls.append(kind)
+        if len(calls) == 1:
+            raise make_api_error(503, "Backend Error")
+        return "ok"
+
+    # A read is safe to repeat; an append that got a 503 may already be in the sheet
+    assert scheduler.run(READ, flaky, READ) == "ok"
+    calls.clear()
+    with pytest.raises(Exception):
+        scheduler.run(WRITE, flaky, WRITE)
+    assert calls == [WRITE]
+
+
+def test_save_ppc_reports_sheets_that_could_not_be_written(monkeypatch):
+    manager = GSheetsManager()
+    manager.scheduler = SheetsScheduler(read_per_minute=0, write_per_minute=0, max_retries=1, sleep=no_sleep)
+    monkeypatch.setattr(work_order, "gs_manager", manager)
+    manager.get_sheet_values("USERS")
+
+    manager.ss.inject_errors(100, status=429)
+    result = work_order.process_and_save_work_order([{"concepto": "X", "responsable": "ALGUIEN"}], "TEST_USER")
+
+    assert result["success"] is False
+    assert "PPCV3" in result["errors"]
+    assert len(result["ids"]) == 1
+
+
+def test_interactive_lane_goes_before_background():
+    scheduler = SheetsScheduler(read_per_minute=600, write_per_minute=600, burst=1)
+    scheduler.acquire(WRITE)  # drain the single token
+    order = []
+
+    def worker(name, priority):
+        scheduler.run(WRITE, order.append, name, priority=priority)
+
+    background = threading.Thread(target=worker, args=("background", PRIORITY_BACKGROUND))
+    interactive = threading.Thread(target=worker, args=("interactive", PRIORITY_INTERACTIVE))
+    background.start()
+    time.sleep(0.02)
+    interactive.start()
+    background.join()
+    interactive.join()
+
+    assert order == ["interactive", "background"]
+    assert scheduler.stats()[WRITE]["maxQueueDepth"] == 2
+
+
+def test_async_calls_share_retry_policy():
+    delays = []
+
+    async def fake_sleep(seconds):
+        delays.append(seconds)
+
+    scheduler = SheetsScheduler(read_per_minute=0, write_per_minute=0, async_sleep=fake_sleep, rand=lambda: 0)
+    attempts = []
+
+    async def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise make_api_error(429)
+        return "ok"
+
+    assert asyncio.run(scheduler.run_async(READ, flaky)) == "ok"
+    assert delays == [1.0, 2.0]
@@ -0,0 +1,77 @@
+import sys
+import os
+
+# Ensure api module can be imported
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from api.services.schema import SheetSchema, SchemaRegistry
+from api.services.sheets import GSheetsManager
+
+
+def test_schema_resolves_headers_and_aliases():
+    values = [
+        ["REPORTE SEMANAL"],
+        ["FOLIO", "DESCRIPCIÓN", "Fecha\nInicio", "INVOLUCRADOS", "STATUS", "ESPECIALIDAD"],
+        ["F-1", "Cableado", "01/01/25", "LUIS", "ASIGNADO", "ELECTRO"],
+    ]
+    schema = SheetSchema.from_values(values, version=3)
+    assert schema.header_row == 1
+    assert schema.data_start == 2
+    assert schema.col("CONCEPTO") == 1
+    assert schema.col("fecha") == 2
+    assert schema.col("RESPONSABLE") == 3
+    assert schema.col("ESTATUS") == 4
+    assert schema.col("AREA") == 5
+    assert schema.col("AVANCE") == -1
+    assert schema.cols(["FOLIO", "AVANCE", "CONCEPTO"]) == [0, 1]
+
+
+def test_build_row_follows_sheet_layout():
+    schema = SheetSchema(0, ["ID", "CONCEPTO", "RESPONSABLE", "ESTATUS"])
+    row = schema.build_row({"FOLIO": "PPC-1", "DESCRIPCION": "Tablero", "INVOLUCRADOS": "ANA", "_rowIndex": 9})
+    assert row == ["PPC-1", "Tablero", "ANA", "ASIGNADO"]
+
+
+def test_plain_table_uses_first_row():
+    schema = SheetSchema.from_values([["USERNAME", "PASSWORD", "ROLE"], ["A", "1", "ADMIN"]])
+    assert not schema.found
+    assert schema.cols(["role", "username"]) == [2, 0]
+
+
+def test_registry_reuses_schema_until_version_changes():
+    registry = SchemaRegistry()
+    values = [["FOLIO", "CONCEPTO", "FECHA"]]
+    first = registry.build("PPCV3", values, 1)
+    assert registry.get("PPCV3", 1) is first
+    assert registry.get("PPCV3", 2) is None
+    assert registry.get("PPCV3", None) is None
+    assert registry.stats() == {"size": 1, "builds": 1, "reuses": 1}
+
+
+def test_manager_rebuilds_schema_after_a_write():
+    manager = GSheetsManager()
+    manager.ss.add_worksheet("OBRAS", rows=10, cols=3)
+    manager.append_row("OBRAS", ["FOLIO", "CONCEPTO", "FECHA"])
+    first = manager.get_schema("OBRAS")
+    assert manager.get_schema("OBRAS") is first
+    manager.append_row("OBRAS", ["F-1", "Losa", "01/01/25"])
+    second = manager.get_schema("OBRAS")
+    assert second is not first
+    assert second.col("DESCRIPCION") == 1
+    assert manager.schemas.stats()["builds"] == 2
+
+
+def test_schema_from_a_stale_read_is_not_filed_under_the_new_version():
+    manager = GSheetsManager()
+    manager.ss.add_worksheet("OBRAS", rows=10, cols=3)
+    manager.append_row("OBRAS", ["FOLIO", "CONCEPTO", "FECHA"])
+    manager.cache.invalidate("OBRAS")
+    old = manager.get_sheet_values("OBRAS")
+    # The header is edited in the Sheets UI while `old` is still cached
+    manager.ss.sheets["OBRAS"][0] = ["FOLIO", "DESCRIPCION", "FECHA", "AVANCE"]
+    manager.ss.bump_revision("OBRAS")
+
+    assert manager.get_schema("OBRAS", old).col("AVANCE") == -1
+    # Once the stale copy is gone, the new version gets its own schema
+    manager.cache.invalidate("OBRAS")
+    assert manager.get_schema("OBRAS").col("AVANCE") == 3
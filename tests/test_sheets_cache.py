@@ -0,0 +1,165 @@
+import sys
+import os
+
+# Ensure api module can be imported
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from api.services.cache import SheetCache
+from api.services.sheets import GSheetsManager, MockSpreadsheet, MockSheet
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    cache = SheetCache(ttl=10, max_entries=4, clock=clock)
+    cache.put("USERS", [["USERNAME"]])
+
+    assert cache.get("USERS") == [["USERNAME"]]
+    clock.now = 10.5
+    assert cache.get("USERS") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_least_recently_used_sheet_is_evicted():
+    cache = SheetCache(ttl=60, max_entries=2)
+    cache.put("A", [])
+    cache.put("B", [])
+    cache.get("A")  # B becomes the LRU entry
+    cache.put("C", [])
+
+    assert cache.get("B") is None
+    assert cache.get("A") == []
+    assert cache.get("C") == []
+    assert cache.stats()["evictions"] == 1
+
+
+def test_zero_ttl_disables_cache():
+    cache = SheetCache(ttl=0)
+    cache.put("A", [["x"]])
+    assert cache.get("A") is None
+
+
+def test_manager_serves_reads_from_cache_and_patches_appends():
+    manager = GSheetsManager()
+    assert manager.is_mock
+
+    first = manager.get_sheet_values("ANTONIA_VENTAS")
+    second = manager.get_sheet_values("ANTONIA_VENTAS")
+    assert first is second
+    assert manager.cache.hits == 1
+
+    manager.append_row("ANTONIA_VENTAS", ["1002", "CLIENTE B", "OTRA", "02/01/25", "PENDIENTE", 0])
+    values = manager.get_sheet_values("ANTONIA_VENTAS")
+    assert values[-1] == ["1002", "CLIENTE B", "OTRA", "02/01/25", "PENDIENTE", "0"]
+    # The worksheet itself got exactly one new row (no double append through the cache)
+    assert len(manager.ss.sheets["ANTONIA_VENTAS"]) == 3
+    assert manager.cache.hits == 2
+
+
+def test_worksheet_handles_are_resolved_once():
+    manager = GSheetsManager()
+    calls = []
+    original = manager.ss.worksheets
+    manager.ss.worksheets = lambda: calls.append(1) or original()
+
+    manager.get_sheet_values("USERS")
+    manager.get_sheet_values("ANTONIA_VENTAS")
+    manager.append_row("ANTONIA_VENTAS", ["1003"])
+    assert len(calls) == 1
+
+    # New tabs created through the manager are registered without a reload
+    manager.append_row("DB_WO_MATERIALES", ["FOLIO"])
+    assert manager.get_sheet_values("DB_WO_MATERIALES") == [["FOLIO"]]
+    assert len(calls) == 1
+
+
+def test_stale_registry_reloads_after_forget():
+    manager = GSheetsManager()
+    assert manager.get_sheet_values("EXTERNAL") is None
+
+    # Tab created outside the manager (e.g. from the Sheets UI)
+    manager.ss.sheets["EXTERNAL"] = [["ID", "RESPONSABLE"]]
+    manager.forget_worksheet("EXTERNAL")
+    assert manager.get_sheet_values("EXTERNAL") == [["ID", "RESPONSABLE"]]
+
+
+def test_get_many_fetches_tabs_in_one_batch_and_fills_cache():
+    manager = GSheetsManager()
+    batch_calls = []
+    original = manager.ss.values_batch_get
+    manager.ss.values_batch_get = lambda ranges, params=None: batch_calls.append(ranges) or original(ranges, params)
+
+    manager.get_sheet_values("USERS")  # already cached, not re-fetched
+    result = manager.get_many(["USERS", "ANTONIA_VENTAS", "MISSING"])
+
+    assert batch_calls == [["'ANTONIA_VENTAS'"]]
+    assert result["USERS"][0] == ["USERNAME", "PASSWORD", "ROLE", "LABEL"]
+    assert result["ANTONIA_VENTAS"][1][1] == "CLIENTE A"
+    assert result["MISSING"] is None
+
+    assert manager.get_sheet_values("ANTONIA_VENTAS") is result["ANTONIA_VENTAS"]
+
+
+def test_get_many_with_ranges_bypasses_cache():
+    manager = GSheetsManager()
+    result = manager.get_many(["USERS"], ranges=["A1:B2"])
+    assert result["USERS"][0] == ["USERNAME", "PASSWORD"]
+    assert [row[0] for row in result["USERS"]] == ["USERNAME", "LUIS_CARLOS"]
+    assert manager.cache.stats()["size"] == 0
+
+
+def test_manager_connects_on_first_use():
+    manager = GSheetsManager()
+    assert not manager.connected
+    assert manager.cache.stats()["size"] == 0  # the cache alone does not connect
+
+    assert manager.get_sheet_values("USERS") is not None
+    assert manager.connected
+    assert manager.connect_seconds is not None
+
+
+def test_expired_sheet_is_revalidated_instead_of_downloaded():
+    clock = FakeClock()
+    manager = GSheetsManager()
+    manager.cache = SheetCache(ttl=10, clock=clock)
+    manager.ss = MockSpreadsheet()
+    downloads = []
+    original = MockSheet.get_all_values
+    MockSheet.get_all_values = lambda ws: downloads.append(ws.title) or original(ws)
+    try:
+        first = manager.get_sheet_values("USERS")
+        clock.now = 11
+        assert manager.get_sheet_values("USERS") is first
+        assert downloads == ["USERS"]
+
+        # An edit made outside the app bumps the revision: the next expiry re-downloads
+        manager.ss.sheets["USERS"].append(["NUEVO", "x", "USER", "Nuevo"])
+        manager.ss.bump_revision("USERS")
+        clock.now = 22
+        assert manager.get_sheet_values("USERS")[-1][0] == "NUEVO"
+        assert downloads == ["USERS", "USERS"]
+    finally:
+        MockSheet.get_all_values = original
+    assert manager.cache.stats()["revalidations"] == 1
+
+
+def test_own_writes_invalidate_the_recorded_version():
+    clock = FakeClock()
+    manager = GSheetsManager()
+    manager.cache = SheetCache(ttl=10, clock=clock)
+    manager.ss = MockSpreadsheet()
+    manager.get_many(["ANTONIA_VENTAS"])
+    version = manager.get_version("ANTONIA_VENTAS")
+
+    manager.append_row("ANTONIA_VENTAS", ["1002"])
+    assert manager.get_version("ANTONIA_VENTAS") == version + 1
+    clock.now = 11
+    assert manager.cache.revalidate("ANTONIA_VENTAS", manager.get_version("ANTONIA_VENTAS")) is None
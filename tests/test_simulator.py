@@ -0,0 +1,56 @@
+import sys
+import os
+import gspread
+import pytest
+
+# Ensure api module can be imported
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from api.services.cache import SheetCache
+from api.services.scheduler import SheetsScheduler
+from api.services.sheets import GSheetsManager, MockSpreadsheet
+from api.services.simulator import SheetsSimulator, VirtualClock, fixed_latency
+from benchmarks import bench_sheets
+
+
+
+def test_simulated_quota_raises_gspread_429_and_counts_calls():
+    clock = VirtualClock()
+    simulator = SheetsSimulator(read_latency=fixed_latency(0.5), reads_per_minute=3,
+                                seconds_per_kcell=1.0, clock=clock, sleep=clock.sleep)
+    ss = MockSpreadsheet(simulator=simulator)
+    ws = ss.worksheet("USERS")
+    ws.get_all_values()
+    ws.get_all_values()
+
+    with pytest.raises(gspread.exceptions.APIError) as exc:
+        ws.get_all_values()
+    assert exc.value.code == 429
+    assert simulator.stats()["calls"] == {"worksheet": 1, "get_all_values": 3}
+    assert simulator.stats()["read"]["rejected"] == 1
+    # Rejected calls are counted but cost nothing; 3 accepted at 0.5s plus 20 cells per USERS read
+    assert clock.now == pytest.approx(1.5 + 0.04)
+
+    clock.now += 60
+    assert ws.get_all_values()[0][0] == "USERNAME"
+
+
+def test_scheduler_rides_out_simulated_quota():
+    clock = VirtualClock()
+    manager = GSheetsManager()
+    manager.cache = SheetCache(ttl=0)
+    manager.ss = MockSpreadsheet(simulator=SheetsSimulator(reads_per_minute=5, clock=clock, sleep=clock.sleep))
+    manager.scheduler = SheetsScheduler(read_per_minute=0, write_per_minute=0, max_retries=8,
+                                        clock=clock, sleep=clock.sleep, rand=lambda: 0.0)
+
+    for _ in range(10):
+        assert manager.get_sheet_values("USERS") is not None
+    assert manager.scheduler.stats()["read"]["throttled"] > 0
+    assert clock.now >= 60
+
+
+def test_benchmark_shows_batching_and_caching_savings():
+    results = {r["scenario"]: r for r in bench_sheets.main(["--rows", "50"])}
+    assert results["20 lecturas, con caché"]["calls"] < results["20 lecturas, sin caché"]["calls"]
+    assert results["8 hojas, batchGet"]["calls"] < results["8 hojas, una por una"]["calls"]
+    assert results["30 filas, append_rows"]["seconds"] < results["30 filas, append_row"]["seconds"]
@@ -0,0 +1,176 @@
+import sys
+import os
+
+# Ensure api module can be imported
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from api.services.sheets import GSheetsManager, MockSpreadsheet
+from api.services.storage import SQLiteBackend, ReplicaSpreadsheet
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class CountingSpreadsheet(MockSpreadsheet):
+    def __init__(self):
+        super().__init__()
+        self.batch_ranges = []
+
+    def values_batch_get(self, ranges, params=None):
+        self.batch_ranges.append(list(ranges))
+        return super().values_batch_get(ranges, params)
+
+
+def test_sqlite_backend_roundtrip_and_ranges():
+    backend = SQLiteBackend(":memory:")
+    backend.append_rows("TAREAS", [["ID", "CLIENTE", "AVANCE"], ["1001", "CLIENTE A", 50]])
+    backend.append_rows("TAREAS", [["1002", "CLIENTE B", "0"]])
+
+    assert backend.list_sheets() == ["TAREAS"]
+    assert backend.row_count("TAREAS") == 3
+    assert backend.get_values("TAREAS")[1] == ["1001", "CLIENTE A", "50"]
+    assert backend.get_values("TAREAS", "B2:C3") == [["CLIENTE A", "50"], ["CLIENTE B", "0"]]
+    assert backend.get_values("FALTA") is None
+    assert backend.find_rows("TAREAS", " 1002 ") == [3]
+
+    backend.update_range("TAREAS", "C2", [["100"]])
+    backend.update_range("TAREAS", "A6", [["1003", "CLIENTE C"]])
+    values = backend.get_values("TAREAS")
+    assert values[1] == ["1001", "CLIENTE A", "100"]
+    assert values[3:] == [[], [], ["1003", "CLIENTE C"]]
+    assert backend.row_count("TAREAS") == 6
+
+
+def test_sqlite_backend_persists_to_disk(tmp_path):
+    path = str(tmp_path / "holtmont.db")
+    backend = SQLiteBackend(path)
+    backend.append_rows("USERS", [["USERNAME"], ["LUIS_CARLOS"]])
+    backend.close()
+
+    reopened = SQLiteBackend(path)
+    assert reopened.get_values("USERS") == [["USERNAME"], ["LUIS_CARLOS"]]
+
+
+def test_manager_runs_on_sqlite_backend(tmp_path):
+    manager = GSheetsManager()
+    manager.connect_sqlite(str(tmp_path / "holtmont.db"))
+    assert manager.storage_mode == "sqlite"
+    assert manager.is_local
+
+    # Seeded like the mock so login works out of the box
+    assert manager.get_sheet_values("USERS")[1][0] == "LUIS_CARLOS"
+
+    manager.append_rows("NUEVA_HOJA", [["ID", "CLIENTE"], ["1", "A"]])
+    assert "NUEVA_HOJA" in manager.list_sheets()
+    manager.cache.invalidate()
+    assert manager.get_sheet_values("NUEVA_HOJA") == [["ID", "CLIENTE"], ["1", "A"]]
+    assert manager.get_many(["USERS", "NUEVA_HOJA"], {"NUEVA_HOJA": "B2"})["NUEVA_HOJA"] == [["A"]]
+
+
+def test_replica_without_remote_versions_pulls_only_new_rows_between_full_syncs():
+    clock = FakeClock()
+    remote = CountingSpreadsheet()
+    replica = ReplicaSpreadsheet(remote, SQLiteBackend(":memory:"), sync_seconds=10, full_sync_seconds=100, clock=clock,
+                                 remote_version=lambda name: None)
+
+    assert replica.worksheet("ANTONIA_VENTAS").get_all_values() == remote.sheets["ANTONIA_VENTAS"]
+    assert remote.batch_ranges[-1] == ["'ANTONIA_VENTAS'"]
+
+    # Within the sync interval reads stay local
+    remote.sheets["ANTONIA_VENTAS"].append(["1002", "CLIENTE B", "", "", "", "0"])
+    calls = len(remote.batch_ranges)
+    replica.worksheet("ANTONIA_VENTAS").get_all_values()
+    assert len(remote.batch_ranges) == calls
+
+    # After it, only the rows past the local count are requested
+    clock.now = 11
+    values = replica.worksheet("ANTONIA_VENTAS").get_all_values()
+    assert values[-1][0] == "1002"
+    assert remote.batch_ranges[-1][0].startswith("'ANTONIA_VENTAS'!3:")
+    assert replica.stats["fullSyncs"] == 1
+
+
+def test_replica_writes_through_to_remote():
+    remote = MockSpreadsheet()
+    local = SQLiteBackend(":memory:")
+    replica = ReplicaSpreadsheet(remote, local)
+
+    replica.worksheet("ANTONIA_VENTAS").append_rows([["1003", "CLIENTE C"]])
+    replica.add_worksheet("LOG")
+    replica.worksheet("LOG").append_rows([["x"]])
+
+    assert remote.sheets["ANTONIA_VENTAS"][-1] == ["1003", "CLIENTE C"]
+    assert local.get_values("ANTONIA_VENTAS")[-1] == ["1003", "CLIENTE C"]
+    assert remote.sheets["LOG"] == [["x"]]
+    assert local.get_values("LOG") == [["x"]]
+
+
+def test_sqlite_versions_count_writes():
+    backend = SQLiteBackend(":memory:")
+    assert backend.version("TAREAS") is None
+    backend.append_rows("TAREAS", [["ID"]])
+    first = backend.version("TAREAS")
+    backend.update_range("TAREAS", "A1", [["FOLIO"]])
+    assert backend.version("TAREAS") == first + 1
+
+
+def test_replica_pulls_a_tab_only_when_its_remote_version_changed():
+    clock = FakeClock()
+    remote = CountingSpreadsheet()
+    replica = ReplicaSpreadsheet(remote, SQLiteBackend(":memory:"), sync_seconds=10, full_sync_seconds=100, clock=clock)
+    sheet = replica.worksheet("ANTONIA_VENTAS")
+    sheet.get_all_values()
+    loaded = replica.sheet_version("ANTONIA_VENTAS")
+
+    clock.now = 11
+    calls = len(remote.batch_ranges)
+    sheet.get_all_values()
+    assert len(remote.batch_ranges) == calls  # same remote version: nothing pulled
+
+    # A task inserted at the top and a cell edited, like the Apps Script and the Sheets UI do
+    rows = remote.sheets["ANTONIA_VENTAS"]
+    rows.insert(1, ["1000", "CLIENTE Z", "NUEVA", "", "", "0"])
+    rows[2][4] = "TERMINADO"
+    remote.bump_revision("ANTONIA_VENTAS")
+    clock.now = 22
+    assert sheet.get_all_values() == remote.sheets["ANTONIA_VENTAS"]
+    assert replica.sheet_version("ANTONIA_VENTAS") != loaded
+
+
+def test_replica_catches_up_before_appending():
+    remote = MockSpreadsheet()
+    replica = ReplicaSpreadsheet(remote, SQLiteBackend(":memory:"))
+    sheet = replica.worksheet("ANTONIA_VENTAS")
+    sheet.get_all_values()
+
+    # Another client appends between our syncs, then we append
+    remote.sheets["ANTONIA_VENTAS"].append(["1002", "CLIENTE B"])
+    remote.bump_revision("ANTONIA_VENTAS")
+    sheet.append_rows([["1003", "CLIENTE C"]])
+    assert sheet.get_all_values() == remote.sheets["ANTONIA_VENTAS"]
+    assert [r[0] for r in remote.sheets["ANTONIA_VENTAS"][1:]] == ["1001", "1002", "1003"]
+
+    # Our own write alone does not force a re-download
+    syncs = replica.stats["fullSyncs"]
+    sheet.get_all_values()
+    assert replica.stats["fullSyncs"] == syncs
+
+
+def test_rows_inserted_under_the_header_locally_and_through_the_replica():
+    backend = SQLiteBackend(":memory:")
+    backend.append_rows("TAREAS", [["ID"], ["1"], ["2"]])
+    backend.insert_rows("TAREAS", 2, [["3"], ["4"]])
+    assert backend.get_values("TAREAS") == [["ID"], ["3"], ["4"], ["1"], ["2"]]
+    assert backend.find_rows("TAREAS", "1") == [4]
+
+    remote = MockSpreadsheet()
+    replica = ReplicaSpreadsheet(remote, SQLiteBackend(":memory:"))
+    sheet = replica.worksheet("ANTONIA_VENTAS")
+    sheet.insert_rows([["1002", "CLIENTE B"]], row=2)
+    assert [r[0] for r in remote.sheets["ANTONIA_VENTAS"]] == ["FOLIO", "1002", "1001"]
+    assert sheet.get_all_values() == remote.sheets["ANTONIA_VENTAS"]
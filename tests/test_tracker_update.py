@@ -0,0 +1,211 @@
+import sys
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+# Ensure api module can be imported
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from api.main import app
+from api.services import tracker_update, work_order
+from api.services.ranges import cell_updates
+from api.services.row_parser import parse_sheet_data
+from api.services.schema import SheetSchema
+from api.services.sheets import GSheetsManager, MockSpreadsheet
+from api.services.simulator import SheetsSimulator
+from api.services.tracker_update import plan_updates, save_tracker_batch, save_tracker_tasks
+
+client = TestClient(app)
+
+HEADER = ["FOLIO", "CONCEPTO", "ESTATUS", "AVANCE", "COMENTARIOS"]
+
+
+def tracker(rows=3):
+    return [list(HEADER)] + [[f"F-{n}", f"Tarea {n}", "ASIGNADO", "0%", ""] for n in range(1, rows + 1)]
+
+
+def test_plan_updates_diffs_cells_and_checks_row_index_against_folio():
+    values = tracker()
+    schema = SheetSchema.from_values(values)
+    tasks = [
+        {"_rowIndex": 2, "FOLIO": "F-1", "CONCEPTO": "Tarea 1", "ESTATUS": "EN PROCESO"},  # one changed cell
+        {"_rowIndex": 2, "FOLIO": "F-3", "AVANCE": "50%"},      # stale index: found by folio on row 4
+        {"FOLIO": "F-9", "DESCRIPCION": "Nueva"},               # unknown folio: a new row
+        {"FOLIO": "F-9", "COMENTARIOS": "urgente"},             # same new task again: merged
+        {"_rowIndex": 3, "FOLIO": "F-2", "OBSERVACIONES": ""},  # already blank: nothing to write
+    ]
+    cells, new_rows, updated, conflicts = plan_updates(schema, values, tasks)
+    assert sorted(cells) == [(2, 3, "EN PROCESO"), (4, 4, "50%")]
+    assert updated == 2
+    assert new_rows == [["F-9", "Nueva", "ASIGNADO", "", "urgente"]]
+    assert conflicts == []
+
+
+def test_plan_updates_flags_cells_changed_since_they_were_loaded():
+    values = tracker()
+    values[1][2] = "DETENIDO"  # changed elsewhere
+    values[2][2] = "TERMINADO"  # changed elsewhere, to what we are writing too
+    schema = SheetSchema.from_values(values)
+    tasks = [
+        {"FOLIO": "F-1", "ESTATUS": "EN PROCESO", "AVANCE": "10%", "_original": {"ESTATUS": "ASIGNADO", "AVANCE": "0%"}},
+        {"FOLIO": "F-2", "ESTATUS": "TERMINADO", "_original": {"ESTATUS": "ASIGNADO"}},
+    ]
+    cells, _, _, conflicts = plan_updates(schema, values, tasks)
+    assert conflicts == [{"row": 2, "folio": "F-1", "column": "ESTATUS"}]
+    assert cells == [(2, 4, "10%")]
+
+
+def test_cell_updates_groups_adjacent_cells_of_a_row():
+    assert cell_updates([(5, 4, "d"), (5, 3, "c"), (5, 6, "f"), (7, 1, "a")]) == [
+        {"range": "C5:D5", "values": [["c", "d"]]},
+        {"range": "F5", "values": [["f"]]},
+        {"range": "A7", "values": [["a"]]},
+    ]
+
+
+@pytest.fixture
+def manager():
+    manager = GSheetsManager()
+    if not manager.is_mock:
+        pytest.skip("Skipping test because we are not in Mock Mode (credentials found)")
+    manager.ss = MockSpreadsheet(simulator=SheetsSimulator())
+    manager.ss.sheets["JUDITH"] = tracker(50)
+    return manager
+
+
+def test_saving_many_rows_is_one_batch_update(manager):
+    manager.get_sheet_values("JUDITH")
+    tasks = [{"_rowIndex": n + 1, "FOLIO": f"F-{n}", "AVANCE": "100%"} for n in range(1, 41)]
+    result = save_tracker_batch("JUDITH", tasks, manager=manager)
+    assert result["success"] is True
+    assert (result["updated"], result["cells"], result["inserted"]) == (40, 40, 0)
+    assert manager.ss.simulator.stats()["calls"]["batch_update"] == 1
+    # The cached copy was patched, not dropped
+    assert manager.get_sheet_values("JUDITH")[40][3] == "100%"
+    assert manager.ss.sheets["JUDITH"][41][3] == "0%"
+
+    again = save_tracker_batch("JUDITH", tasks, manager=manager)
+    assert again["cells"] == 0
+    assert manager.ss.simulator.stats()["calls"]["batch_update"] == 1
+
+
+def test_edits_made_elsewhere_are_not_overwritten(manager):
+    manager.get_sheet_values("JUDITH")
+    # Someone edits F-1 in the Sheets UI after our read
+    manager.ss.sheets["JUDITH"][1][4] = "revisar"
+    manager.ss.bump_revision("JUDITH")
+
+    task = {"FOLIO": "F-1", "AVANCE": "50%", "COMENTARIOS": "ok", "_original": {"AVANCE": "0%", "COMENTARIOS": ""}}
+    conflict = save_tracker_batch("JUDITH", [task], manager=manager)
+    assert conflict["success"] is False and conflict["conflict"] is True
+    assert conflict["conflicts"] == [{"row": 2, "folio": "F-1", "column": "COMENTARIOS"}]
+    assert manager.ss.sheets["JUDITH"][1][3] == "0%"  # nothing of the batch written
+
+    # Other cells of the same row are still free to change
+    result = save_tracker_batch("JUDITH", [{"FOLIO": "F-1", "ESTATUS": "DETENIDO", "_original": {"ESTATUS": "ASIGNADO"}}], manager=manager)
+    assert result["cells"] == 1
+    assert manager.ss.sheets["JUDITH"][1][2:5] == ["DETENIDO", "0%", "revisar"]
+
+
+def test_tracker_batch_endpoint(manager, monkeypatch):
+    monkeypatch.setattr(tracker_update, "gs_manager", manager)
+    res = client.post("/api/tracker/batch", json={"sheet": "JUDITH", "tasks": [{"_rowIndex": 2, "FOLIO": "F-1", "ESTATUS": "TERMINADO"}]}).json()
+    assert res["success"] is True and res["cells"] == 1
+    assert client.post("/api/tracker/batch", json={"sheet": "NADIE", "tasks": [{"FOLIO": "1"}]}).json() == {
+        "success": False, "message": "Hoja no encontrada: NADIE"}
+
+
+def test_rows_inserted_after_our_own_save_are_not_overwritten(manager):
+    manager.ss.sheets["JUDITH"] = [list(HEADER), ["A1", "Tarea A", "ASIGNADO", "0%", ""]]
+    assert save_tracker_batch("JUDITH", [{"_rowIndex": 2, "FOLIO": "A1", "AVANCE": "10%"}], manager=manager)["cells"] == 1
+    # Our save left a patched cached copy; then a row is inserted above A1 in the sheet
+    manager.ss.sheets["JUDITH"].insert(1, ["Z9", "Otra", "ASIGNADO", "0%", ""])
+    manager.ss.bump_revision("JUDITH")
+
+    result = save_tracker_batch("JUDITH", [{"_rowIndex": 2, "FOLIO": "A1", "ESTATUS": "HECHO"}], manager=manager)
+    assert result["success"] is True and result["cells"] == 1
+    assert manager.ss.sheets["JUDITH"][1][:3] == ["Z9", "Otra", "ASIGNADO"]
+    assert manager.ss.sheets["JUDITH"][2][:4] == ["A1", "Tarea A", "HECHO", "10%"]
+
+
+def test_writes_to_other_rows_and_tabs_are_not_conflicts(manager, monkeypatch):
+    monkeypatch.setattr(tracker_update, "gs_manager", manager)
+    loaded = parse_sheet_data("JUDITH", manager.get_sheet_values("JUDITH"))["data"][0]
+    # Meanwhile a work order is saved and another row of the tracker is edited
+    manager.append_row("ANTONIA_VENTAS", ["1002", "CLIENTE B"])
+    manager.ss.sheets["JUDITH"][2][2] = "DETENIDO"
+    manager.ss.bump_revision("JUDITH")
+
+    task = {"_rowIndex": loaded["_rowIndex"], "FOLIO": "F-1", "ESTATUS": "EN PROCESO", "_original": {"ESTATUS": loaded["ESTATUS"]}}
+    saved = client.post("/api/tracker/batch", json={"sheet": "JUDITH", "tasks": [task]}).json()
+    assert saved["success"] is True and saved["cells"] == 1
+
+    # A second editor still holding the first load is refused
+    stale = client.post("/api/tracker/batch", json={"sheet": "JUDITH", "tasks": [{**task, "ESTATUS": "DETENIDO"}]}).json()
+    assert stale["conflict"] is True
+    assert manager.ss.sheets["JUDITH"][1][2] == "EN PROCESO"
+
+
+def test_new_tasks_go_under_the_header_not_into_the_history(manager):
+    manager.ss.sheets["JUDITH"] = [list(HEADER), ["1", "Activa", "ASIGNADO", "0%", ""],
+                                   ["", "", "TAREAS REALIZADAS"], ["0", "Vieja", "TERMINADO", "100%", ""]]
+    result = save_tracker_batch("JUDITH", [{"FOLIO": "2", "CONCEPTO": "Nueva"}], manager=manager)
+    assert result["inserted"] == 1
+    assert [r[0] for r in manager.ss.sheets["JUDITH"]] == ["FOLIO", "2", "1", "", "0"]
+    # The patched cache agrees with the sheet
+    assert manager.get_sheet_values("JUDITH") == manager.ss.sheets["JUDITH"]
+    parsed = parse_sheet_data("JUDITH", manager.get_sheet_values("JUDITH"))
+    assert [t["FOLIO"] for t in parsed["data"]] == ["2", "1"]
+    assert [t["FOLIO"] for t in parsed["history"]] == ["0"]
+
+
+SALES_HEADER = ["FOLIO", "CLIENTE", "CONCEPTO", "VENDEDOR", "ESTATUS", "COMENTARIOS"]
+
+
+def test_sales_tasks_get_folios_and_are_copied_to_vendor_and_admin(manager, monkeypatch, tmp_path):
+    monkeypatch.setattr(work_order, "SEQUENCES_FILE", str(tmp_path / "sequences.json"))
+    manager.ss.sheets["ANTONIA_VENTAS"] = [list(SALES_HEADER), ["1005", "A", "Losa", "JUAN", "ASIGNADO", ""]]
+    manager.ss.sheets["JUAN (VENTAS)"] = [list(SALES_HEADER)]
+    manager.ss.sheets["ADMINISTRADOR"] = [list(SALES_HEADER)]
+
+    tasks = [
+        {"CLIENTE": "B", "CONCEPTO": "Muro", "VENDEDOR": "JUAN"},
+        {"VENDEDOR": "ANTONIA_VENTAS"},                                  # blank editor row: dropped
+        {"_rowIndex": 2, "FOLIO": "1005", "ESTATUS": "HECHO", "COMENTARIOS": "no"},  # not editable once saved
+    ]
+    res = save_tracker_tasks("ANTONIA_VENTAS", tasks, "ANTONIA_VENTAS", manager)
+    assert res["success"] is True
+    # Auto-healed past the highest folio of the batch
+    assert [t["FOLIO"] for t in res["data"]] == ["1006", "1005"]
+    assert work_order.get_next_sequence("ANTONIA_SEQ") == "1006"
+    assert manager.ss.sheets["ANTONIA_VENTAS"][1:] == [
+        ["1006", "B", "Muro", "JUAN", "ASIGNADO", ""], ["1005", "A", "Losa", "JUAN", "HECHO", ""]]
+    assert [r[0] for r in manager.ss.sheets["JUAN (VENTAS)"][1:]] == ["1006"]
+    assert sorted(r[0] for r in manager.ss.sheets["ADMINISTRADOR"][1:]) == ["1005", "1006"]
+
+    # A vendor's edit goes back to the master
+    save_tracker_tasks("JUAN (VENTAS)", [{"FOLIO": "1006", "ESTATUS": "EN PROCESO"}], "JUAN", manager)
+    assert manager.ss.sheets["ANTONIA_VENTAS"][1][4] == "EN PROCESO"
+
+
+def test_restricted_users_only_change_follow_up_fields(manager):
+    task = {"_rowIndex": 2, "FOLIO": "F-1", "AVANCE": "50%", "ESTATUS": "CANCELADO"}
+    assert save_tracker_tasks("JUDITH", [task], "ANGEL_SALINAS", manager)["success"] is True
+    assert manager.ss.sheets["JUDITH"][1][2:4] == ["ASIGNADO", "50%"]
+
+
+def test_single_task_and_ppc_endpoints(manager, monkeypatch):
+    monkeypatch.setattr(tracker_update, "gs_manager", manager)
+    manager.ss.sheets["PPCV4"] = [["ID", "Descripción de la Actividad", "Fecha de Alta", "COMENTARIOS"], ["P-1", "Vieja", "", ""]]
+    guard = client.post("/api/tracker/task", json={"sheet": "PPCV3", "task": {"FOLIO": "1"}}).json()
+    assert guard["success"] is False and "solo lectura" in guard["message"]
+
+    res = client.post("/api/tracker/task", json={"sheet": "JUDITH", "task": {"FOLIO": "F-2", "AVANCE": "30%"}}).json()
+    assert res["success"] is True and res["data"]["FOLIO"] == "F-2"
+
+    # ANTONIA_VENTAS's weekly plan lives in PPCV4, under its own header names
+    task = {"ID": "P-1", "CONCEPTO": "Nueva", "FECHA": "02/02/25", "COMENTARIOS SEMANA EN CURSO": "ok"}
+    res = client.post("/api/tracker/ppc", json={"task": task, "username": "ANTONIA_VENTAS"}).json()
+    assert res["success"] is True
+    assert manager.ss.sheets["PPCV4"][1] == ["P-1", "Nueva", "02/02/25", "ok"]
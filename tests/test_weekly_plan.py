@@ -0,0 +1,64 @@
+import sys
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+# Ensure api module can be imported
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from api.main import app, gs_manager, week_indexes
+from api.services.sheets import MockSpreadsheet
+from api.services.weekly_plan import WeekIndex
+
+client = TestClient(app)
+
+PLAN = [
+    ["PLAN SEMANAL"],
+    ["FOLIO", "ESPECIALIDAD", "DESCRIPCION", "INVOLUCRADOS", "FECHA ALTA", "RELOJ"],
+    ["1", "HVAC", "Ducto", "JUAN", "06/01/25", "4"],      # ISO week 2
+    ["2", "HVAC", "Rejilla", "ANA", "2025-01-08"],        # week 2, short row
+    ["", "", "", "", "", ""],
+    ["3", "ELECTRICO", "Tablero", "LUIS", "13/01/25", "2"],  # week 3
+    ["4", "CIVIL", "Muro", "ANA", "", "1"],               # no date
+]
+
+
+def test_week_index_maps_headers_and_files_rows_by_iso_week():
+    index = WeekIndex(PLAN, version=1)
+    assert index.headers == ["SEMANA", "FOLIO", "ESPECIALIDAD", "CONCEPTO", "RESPONSABLE", "FECHA", "RELOJ"]
+    assert [r["FOLIO"] for r in index.rows] == ["4", "3", "2", "1"]
+    assert index.rows[2] == {"_rowIndex": 4, "FOLIO": "2", "ESPECIALIDAD": "HVAC", "CONCEPTO": "Rejilla",
+                             "RESPONSABLE": "ANA", "FECHA": "2025-01-08", "RELOJ": "", "SEMANA": 2}
+    assert index.weeks == [2, 3]
+    assert [r["FOLIO"] for r in index.select(2, 2)] == ["2", "1"]
+    assert [r["FOLIO"] for r in index.select(None, 3)] == ["3", "2", "1"]
+    assert index.select(10, 12) == []
+    assert index.rows[0]["SEMANA"] == "-"
+
+
+@pytest.fixture
+def plan_sheets():
+    if not gs_manager.is_mock:
+        pytest.skip("Skipping test because we are not in Mock Mode (credentials found)")
+    gs_manager.ss = MockSpreadsheet()
+    gs_manager.ss.sheets["PPCV3"] = [list(r) for r in PLAN]
+
+
+def test_weekly_plan_endpoint_reuses_index_until_sheet_changes(plan_sheets):
+    before = week_indexes.stats()
+    first = client.get("/api/weekly-plan?username=LUIS_CARLOS&week=2").json()
+    assert first["success"] is True
+    assert [r["FOLIO"] for r in first["data"]] == ["2", "1"]
+    assert first["weeks"] == [2, 3]
+    ranged = client.get("/api/weekly-plan?username=LUIS_CARLOS&from_week=2&to_week=3").json()
+    assert len(ranged["data"]) == 3
+    after = week_indexes.stats()
+    assert after["builds"] - before["builds"] == 1
+    assert after["reuses"] - before["reuses"] == 1
+
+    gs_manager.append_row("PPCV3", ["5", "HVAC", "Rejilla 2", "ANA", "14/01/25", "1"])
+    assert [r["FOLIO"] for r in client.get("/api/weekly-plan?username=LUIS_CARLOS&week=3").json()["data"]] == ["5", "3"]
+
+    assert client.get("/api/weekly-plan?username=LUIS_CARLOS&from_week=5&to_week=2").status_code == 400
+    assert client.get("/api/weekly-plan?username=ANTONIA_VENTAS").json() == {"success": False, "message": "No existe la hoja PPCV4"}